@@ -2,6 +2,8 @@ from rest_framework import serializers
 
 from django.contrib.auth.models import User
 
+from auth_app import hashing
+
 
 class RegistrationSerializer(serializers.ModelSerializer):
     """
@@ -38,7 +40,8 @@ class RegistrationSerializer(serializers.ModelSerializer):
             first_name=first_name,
             last_name=last_name
         )
-        account.set_password(self.validated_data['password'])
+        # hashing runs on the bounded pool, may raise HashingPoolFull
+        hashing.set_password(account, self.validated_data['password'])
         account.save()
         return account
 
@@ -82,7 +85,7 @@ class LoginSerializer(serializers.Serializer):
         if user is None:
             raise serializers.ValidationError(
                 {"email": "User with this email does not exist."})
-        if not user.check_password(password):
+        if not hashing.check_password(user, password):
             raise serializers.ValidationError(
                 {"password": "Incorrect password."})
 
@@ -90,6 +93,16 @@ class LoginSerializer(serializers.Serializer):
         return data
 
 
+class TokenRevokeSerializer(serializers.Serializer):
+    """
+    serializer for the revoke options, parses form values like "false".
+    """
+    devices = serializers.ListField(
+        child=serializers.CharField(max_length=100), required=False)
+    all = serializers.BooleanField(default=False)
+    keep_current = serializers.BooleanField(default=False)
+
+
 class UserPreviewSerializer(serializers.ModelSerializer):
     """
     serializer to display basic user information."""
@@ -1,10 +1,24 @@
+from django.conf import settings
 from django.urls import path
 
 
-from .views import EmailCheckView, RegistrationView, CustomLoginView
+from .views import (
+    AsyncLoginView, AsyncRegistrationView, CustomLoginView, EmailCheckView, LogoutView,
+    RegistrationView, TokenListView, TokenRevokeView,
+)
+
+# under WSGI the async views would run through async_to_sync on the
+# worker thread, the sync APIViews do the same work without the detour
+if settings.ASYNC_AUTH_VIEWS:
+    registration_view, login_view = AsyncRegistrationView, AsyncLoginView
+else:
+    registration_view, login_view = RegistrationView, CustomLoginView
 
 urlpatterns = [
-    path('registration/', RegistrationView.as_view(), name='registration'),
-    path('login/', CustomLoginView.as_view(), name='login'),
+    path('registration/', registration_view.as_view(), name='registration'),
+    path('login/', login_view.as_view(), name='login'),
+    path('logout/', LogoutView.as_view(), name='logout'),
+    path('tokens/', TokenListView.as_view(), name='token-list'),
+    path('tokens/revoke/', TokenRevokeView.as_view(), name='token-revoke'),
     path('email-check/', EmailCheckView.as_view(), name='email-check'),
 ]
@@ -1,32 +1,120 @@
+import secrets
+
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny
-from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated
 
 
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import User
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+
+from auth_app.hashing import RETRY_AFTER, HashingPoolFull
+from auth_app.models import AuthToken
+from auth_app.throttling import (
+    EarlyThrottleMixin, EmailCheckEmailThrottle, EmailCheckIPThrottle,
+    LoginEmailThrottle, LoginIPThrottle,
+)
+from .serializers import (
+    LoginSerializer, RegistrationSerializer, TokenRevokeSerializer, UserPreviewSerializer,
+)
 
 
-from .serializers import RegistrationSerializer, LoginSerializer, UserPreviewSerializer
+def get_device_name(data, headers):
+    """
+    device/session name of a login. an explicit "device" field names the
+    client, a new login with it rotates that client's token. without it
+    every login gets its own session named after the user agent, clients
+    sharing a user agent must not log each other out.
+    """
+    device = data.get('device')
+    if device:
+        return str(device)[:100]
+    suffix = f' #{secrets.token_hex(4)}'
+    return headers.get('User-Agent', '')[:100 - len(suffix)] + suffix
+
+
+@transaction.atomic
+def issue_token(user, device):
+    """
+    one token per user and device, a new login on the same device
+    rotates the token. expired tokens of the user are dropped as well.
+    """
+    AuthToken.objects.filter(user=user).filter(
+        Q(device=device) | Q(expires_at__lte=timezone.now())).delete()
+    return AuthToken.objects.create(user=user, device=device)
 
 
-def get_auth_response(user):
+def get_auth_response(user, device):
     """
-    helper to create the response dict
+    helper to create the response dict.
+    "device" can be sent with the next login to rotate this session.
     """
-    token, created = Token.objects.get_or_create(user=user)
+    token = issue_token(user, device)
     return {
         'token': token.key,
         'fullname': f"{user.first_name} {user.last_name}".strip(),
         'email': user.email,
-        'user_id': user.id
+        'user_id': user.id,
+        'device': token.device,
     }
 
 
+POOL_FULL_RESPONSE = (
+    {"detail": "Server busy, please retry."},
+    status.HTTP_503_SERVICE_UNAVAILABLE,
+)
+
+
+def handle_registration(data, headers):
+    """
+    validates and creates the account, returns (payload, status code).
+    shared by the sync and async registration views.
+    """
+    serializer = RegistrationSerializer(data=data)
+    try:
+        if not serializer.is_valid():
+            return serializer.errors, status.HTTP_400_BAD_REQUEST
+        saved_account = serializer.save()
+    except HashingPoolFull:
+        return POOL_FULL_RESPONSE
+    return get_auth_response(saved_account, get_device_name(data, headers)), status.HTTP_201_CREATED
+
+
+def handle_login(data, headers):
+    """
+    checks the credentials, returns (payload, status code).
+    shared by the sync and async login views.
+    """
+    serializer = LoginSerializer(data=data)
+    try:
+        if not serializer.is_valid():
+            return serializer.errors, status.HTTP_400_BAD_REQUEST
+    except HashingPoolFull:
+        return POOL_FULL_RESPONSE
+    user = serializer.validated_data['user']
+    return get_auth_response(user, get_device_name(data, headers)), status.HTTP_200_OK
+
+
+def retry_headers(code):
+    if code == status.HTTP_503_SERVICE_UNAVAILABLE:
+        return {'Retry-After': str(RETRY_AFTER)}
+    return None
+
+
 class RegistrationView(APIView):
     """
     API View for user registration.
@@ -38,42 +126,175 @@ class RegistrationView(APIView):
         """
         Handle user registration.
         """
-        serializer = RegistrationSerializer(data=request.data)
-        if serializer.is_valid():
-            saved_account = serializer.save()
-            data = get_auth_response(saved_account)
-            return Response(data, status=status.HTTP_201_CREATED)
-        else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data, code = handle_registration(request.data, request.headers)
+        return Response(data, status=code, headers=retry_headers(code))
 
 
-class CustomLoginView(APIView):
+class CustomLoginView(EarlyThrottleMixin, APIView):
     """
     API View for user login.
+    throttled per IP and per email before any lookup or hashing.
     """
     permission_classes = [AllowAny]
-    serializer_class = LoginSerializer
+    authentication_classes = []
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
+
+    def get_throttle_email(self, request):
+        return request.data.get('email')
 
     def post(self, request):
         """
         Handles the POST request for user login.
         """
-        serializer = self.serializer_class(data=request.data)
+        data, code = handle_login(request.data, request.headers)
+        return Response(data, status=code, headers=retry_headers(code))
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncAuthView(View):
+    """
+    base for async auth views (token auth, no csrf like the DRF views),
+    routed instead of the APIViews under ASGI (settings.ASYNC_AUTH_VIEWS).
+    password hashing runs on the bounded hashing pool, a full pool
+    answers 503 with Retry-After. throttle_classes are checked before
+    the handler runs, rejected requests get 429.
+    """
+    handler = None
+    throttle_classes = []
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES
+
+    def get_throttle_email(self, request):
+        return self.data.get('email')
+
+    def check_throttles(self, request):
+        """
+        returns the seconds to wait of the longest failed throttle, or None.
+        """
+        waits = []
+        for throttle in [throttle_class() for throttle_class in self.throttle_classes]:
+            if not throttle.allow_request(request, self):
+                waits.append(throttle.wait())
+        return max(waits) if waits else None
+
+    async def post(self, request):
+        # the DRF parsers, so json, form and multipart bodies work as in
+        # the APIViews. ASGI has read the body already, parsing is cheap.
+        request = Request(request, parsers=[parser() for parser in self.parser_classes])
+        try:
+            data = request.data
+        except APIException as exc:
+            return JsonResponse({"detail": str(exc.detail)}, status=exc.status_code)
+        if not isinstance(data, dict):
+            return JsonResponse({"detail": "Expected a JSON object."}, status=400)
 
-        if serializer.is_valid():
-            user = serializer.validated_data['user']
-            data = get_auth_response(user)
-            return Response(data, status=status.HTTP_200_OK)
+        self.data = data
+        # the throttle store may be the cache (CacheThrottleStore), a
+        # network round trip that must not block the event loop
+        wait = await sync_to_async(self.check_throttles)(request)
+        if wait is not None:
+            response = JsonResponse(
+                {"detail": f"Request was throttled. Expected available in {wait} seconds."},
+                status=status.HTTP_429_TOO_MANY_REQUESTS)
+            response['Retry-After'] = str(wait)
+            return response
+
+        # under ASGI sync code runs on a per-request thread, the event loop
+        # stays free while the hashing pool works
+        payload, code = await sync_to_async(type(self).handler)(data, request.headers)
+        response = JsonResponse(payload, status=code)
+        for header, value in (retry_headers(code) or {}).items():
+            response[header] = value
+        return response
+
+
+class AsyncRegistrationView(AsyncAuthView):
+    """
+    async version of RegistrationView.
+    """
+    handler = handle_registration
+
+
+class AsyncLoginView(AsyncAuthView):
+    """
+    async version of CustomLoginView.
+    """
+    handler = handle_login
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
+
+
+class LogoutView(APIView):
+    """
+    API View for user logout.
+    deletes the token, the cached lookup is evicted by auth_app.signals.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if request.auth is not None:
+            AuthToken.objects.filter(key=request.auth.key).delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class TokenListView(APIView):
+    """
+    API View to list the active sessions (tokens) of the current user.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        tokens = AuthToken.objects.filter(
+            user=request.user, expires_at__gt=timezone.now()
+        ).order_by('-created')
+        current_key = getattr(request.auth, 'key', None)
+        return Response([{
+            'device': token.device,
+            'created': token.created,
+            'expires_at': token.expires_at,
+            'current': token.key == current_key,
+        } for token in tokens])
+
+
+class TokenRevokeView(APIView):
+    """
+    API View for bulk revocation of the current user's tokens.
+    body: {"devices": [...]} revokes the given devices,
+          {"all": true} revokes every token,
+          {"all": true, "keep_current": true} logs out all other sessions.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = TokenRevokeSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        options = serializer.validated_data
+        tokens = AuthToken.objects.filter(user=request.user)
+
+        if options['all']:
+            if options['keep_current'] and request.auth is not None:
+                tokens = tokens.exclude(key=request.auth.key)
+        elif options.get('devices'):
+            tokens = tokens.filter(device__in=options['devices'])
         else:
-            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            return Response(
+                {"error": "Provide \"devices\" or \"all\"."},
+                status=status.HTTP_400_BAD_REQUEST)
 
+        # deleted one by one through the orm, so auth_app.signals
+        # evicts every revoked key from the token cache.
+        revoked, _ = tokens.delete()
+        return Response({'revoked': revoked})
 
-class EmailCheckView(APIView):
+
+class EmailCheckView(EarlyThrottleMixin, APIView):
     """
     API view to check if an email address exists in DB.
-    only accessible to authenticated users.
+    only accessible to authenticated users, throttled per IP and email.
     """
     permission_classes = [IsAuthenticated]
+    throttle_classes = [EmailCheckIPThrottle, EmailCheckEmailThrottle]
+
+    def get_throttle_email(self, request):
+        return request.query_params.get('email')
 
     def get(self, request):
         """
@@ -0,0 +1,148 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from core.caching import is_shared_cache
+
+
+REVOKED_TOKEN_CACHE_KEY = 'auth_token:{key}:revoked'
+
+
+class TokenCache:
+    """
+    bounded, thread-safe LRU of token key -> (user, token) with a TTL.
+    entries are evicted by auth_app.signals on logout, token deletion,
+    password change and deactivation (see revoke_tokens).
+    with a shared cache (REDIS_URL) revoked keys are also marked there
+    and every hit checks the mark, so the other worker processes reject
+    the token on their next request. with a process-local cache they
+    keep accepting it until the TTL, keep the TTL short then.
+    """
+
+    def __init__(self, max_size=10000, ttl=60):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            user, token, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        if is_shared_cache() and cache.get(_revoked_key(key)):
+            self.evict(key)
+            return None
+        # a copy per request, so requests never share one user instance
+        return copy.copy(user), token
+
+    def set(self, key, user, token):
+        with self._lock:
+            self._entries[key] = (user, token, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def evict(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def evict_user(self, user_id):
+        with self._lock:
+            keys = [key for key, (user, token, expires) in self._entries.items()
+                    if user.pk == user_id]
+            for key in keys:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def _revoked_key(key):
+    return REVOKED_TOKEN_CACHE_KEY.format(key=key)
+
+
+_cache_settings = getattr(settings, 'AUTH_TOKEN_CACHE', {})
+token_cache = TokenCache(
+    max_size=_cache_settings.get('MAX_SIZE', 10000),
+    ttl=_cache_settings.get('TTL', 60),
+)
+
+
+def revoke_tokens(keys=(), user_id=None):
+    """
+    drops token keys (or all tokens of a user) from the token cache.
+    with a shared cache the keys are marked as revoked for one TTL,
+    long enough for every other process to drop its entry.
+    """
+    keys = list(keys)
+    for key in keys:
+        token_cache.evict(key)
+    if user_id is not None:
+        token_cache.evict_user(user_id)
+    if not is_shared_cache():
+        return
+    if user_id is not None:
+        from auth_app.models import AuthToken
+        keys += AuthToken.objects.filter(
+            user_id=user_id).values_list('key', flat=True)
+    if keys:
+        cache.set_many({_revoked_key(key): True for key in keys},
+                       timeout=token_cache.ttl)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication with an in-process token -> user cache,
+    skips the token/user query for repeated requests.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+        user, token = super().authenticate_credentials(key)
+        token_cache.set(key, user, token)
+        return user, token
+
+
+class ExpiringTokenAuthentication(CachedTokenAuthentication):
+    """
+    cached authentication for expiring AuthToken rows.
+    expiry is checked against the cached token, no query per request.
+    tokens are extended (sliding) once less than half the lifetime is left.
+    """
+
+    @property
+    def model(self):
+        from auth_app.models import AuthToken
+        return AuthToken
+
+    def authenticate_credentials(self, key):
+        user, token = super().authenticate_credentials(key)
+
+        now = timezone.now()
+        if token.expires_at <= now:
+            token_cache.evict(key)
+            raise AuthenticationFailed('Token has expired.')
+
+        lifetime = settings.AUTH_TOKEN_LIFETIME
+        if token.expires_at - now < lifetime / 2:
+            token.expires_at = now + lifetime
+            self.model.objects.filter(key=key).update(
+                expires_at=token.expires_at)
+            token_cache.set(key, user, token)
+        return user, token
@@ -0,0 +1,56 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+
+class HashingPoolFull(Exception):
+    """
+    raised when every worker is busy and the queue is full.
+    """
+
+
+class BoundedHashingPool:
+    """
+    runs password hashing (PBKDF2) on a fixed number of worker threads.
+    hashlib releases the GIL while hashing, so threads run in parallel.
+    at most workers + queue_size jobs are accepted, further jobs are
+    rejected right away instead of piling up (backpressure).
+    """
+
+    def __init__(self, workers=4, queue_size=16):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='password-hashing')
+        self._slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def submit(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolFull()
+        try:
+            future = self._executor.submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def run(self, fn, *args):
+        return self.submit(fn, *args).result()
+
+
+_pool_settings = getattr(settings, 'PASSWORD_HASHING_POOL', {})
+hashing_pool = BoundedHashingPool(
+    workers=_pool_settings.get('WORKERS', 4),
+    queue_size=_pool_settings.get('QUEUE_SIZE', 16),
+)
+
+# seconds sent as Retry-After when the pool is full
+RETRY_AFTER = _pool_settings.get('RETRY_AFTER', 1)
+
+
+def check_password(user, raw_password):
+    return hashing_pool.run(user.check_password, raw_password)
+
+
+def set_password(user, raw_password):
+    hashing_pool.run(user.set_password, raw_password)
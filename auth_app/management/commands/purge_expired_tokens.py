@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from auth_app.models import AuthToken
+
+
+class Command(BaseCommand):
+    """
+    deletes expired tokens in small batches, each batch is its own short
+    statement, so the table is never locked for long.
+    usage: python manage.py purge_expired_tokens [--batch-size 1000] [--pause 0.1]
+    """
+    help = 'Delete expired auth tokens in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--pause', type=float, default=0.0,
+            help='seconds to sleep between batches.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        batch_size = options['batch_size']
+        purged = 0
+
+        while True:
+            keys = list(AuthToken.objects.filter(
+                expires_at__lte=now
+            ).values_list('key', flat=True)[:batch_size])
+            if not keys:
+                break
+            deleted, _ = AuthToken.objects.filter(key__in=keys).delete()
+            purged += deleted
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Purged {purged} expired tokens.'))
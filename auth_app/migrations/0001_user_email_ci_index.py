@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:20
+
+from django.db import migrations
+
+
+INDEX_NAME = 'auth_user_email_ci_idx'
+
+
+def create_email_index(apps, schema_editor):
+    """
+    case-insensitive index for email__iexact lookups.
+    sqlite compiles iexact to LIKE, which can use a NOCASE index,
+    postgresql compiles it to UPPER(email::text) = UPPER(%s).
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} '
+            'ON auth_user (email COLLATE NOCASE)')
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {INDEX_NAME} '
+            'ON auth_user (UPPER(email::text))')
+
+
+def drop_email_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {INDEX_NAME}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_email_index, drop_email_index),
+    ]
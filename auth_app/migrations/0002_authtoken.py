@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:24
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def copy_legacy_tokens(apps, schema_editor):
+    """
+    keeps existing logins working, every drf token becomes an AuthToken.
+    """
+    Token = apps.get_model('authtoken', 'Token')
+    AuthToken = apps.get_model('auth_app', 'AuthToken')
+    expires_at = timezone.now() + settings.AUTH_TOKEN_LIFETIME
+    AuthToken.objects.bulk_create([
+        AuthToken(key=token.key, user_id=token.user_id,
+                  device='legacy', expires_at=expires_at)
+        for token in Token.objects.all()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth_app', '0001_user_email_ci_index'),
+        ('authtoken', '0004_alter_tokenproxy_options'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthToken',
+            fields=[
+                ('key', models.CharField(max_length=40, primary_key=True, serialize=False)),
+                ('device', models.CharField(blank=True, max_length=100)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('expires_at', models.DateTimeField(db_index=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='auth_tokens', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'device'], name='authtoken_user_device_idx')],
+            },
+        ),
+        migrations.RunPython(copy_legacy_tokens, migrations.RunPython.noop),
+    ]
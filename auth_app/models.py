@@ -1,3 +1,36 @@
+from django.conf import settings
+from django.contrib.auth.models import User
 from django.db import models
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
 
-# Create your models here.
+
+class AuthToken(models.Model):
+    """
+    expiring auth token, one per user and device/session.
+    """
+    key = models.CharField(max_length=40, primary_key=True)
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name='auth_tokens')
+    device = models.CharField(max_length=100, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'device'], name='authtoken_user_device_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        if not self.key:
+            self.key = Token.generate_key()
+        if not self.expires_at:
+            self.expires_at = timezone.now() + settings.AUTH_TOKEN_LIFETIME
+        return super().save(*args, **kwargs)
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    def __str__(self):
+        return f'Token of {self.user} ({self.device or "unknown device"})'
@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from auth_app.authentication import revoke_tokens
+from auth_app.models import AuthToken
+
+
+@receiver(post_delete, sender=Token)
+@receiver(post_delete, sender=AuthToken)
+def evict_deleted_token(sender, instance, **kwargs):
+    """
+    logout, revocation and token deletion.
+    """
+    revoke_tokens([instance.key])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def evict_user_tokens(sender, instance, **kwargs):
+    """
+    password change, deactivation and other user changes.
+    """
+    if kwargs.get('created'):
+        return
+    revoke_tokens(user_id=instance.pk)
@@ -1,3 +1,453 @@
-from django.test import TestCase
+import asyncio
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import AsyncClient, TestCase, override_settings
+from django.urls import include, path, resolve, reverse
+from django.utils import timezone
+from django.utils.http import urlencode
+from rest_framework.test import APIClient
+
+from auth_app.api.views import (
+    AsyncLoginView, AsyncRegistrationView, CustomLoginView, RegistrationView)
+from auth_app.authentication import ExpiringTokenAuthentication, TokenCache, token_cache
+from auth_app.hashing import BoundedHashingPool
+from auth_app.models import AuthToken
+from auth_app.throttling import CacheThrottleStore, InProcessThrottleStore, get_store
+from core.testing import SHARED_CACHES, Budget, QueryBudgetTestCase
+
+
+THROTTLE = {
+    'BACKEND': 'auth_app.throttling.InProcessThrottleStore',
+    'RATES': {
+        'login_ip': '5/min',
+        'login_email': '3/min',
+        'email_check_ip': '4/min',
+        'email_check_email': '2/min',
+    },
+}
+
+
+class SlidingWindowStoreTests(TestCase):
+    """
+    the estimate weights the previous window by its remaining overlap.
+    """
+
+    def hit_at(self, store, now, limit=10, window=60):
+        with mock.patch('auth_app.throttling.time.monotonic', return_value=now), \
+                mock.patch('auth_app.throttling.time.time', return_value=now):
+            return store.hit('key', limit, window)
+
+    def test_in_process_store(self):
+        store = InProcessThrottleStore()
+        for _ in range(10):
+            self.assertTrue(self.hit_at(store, 6000)[0])
+        allowed, wait = self.hit_at(store, 6030)
+        self.assertFalse(allowed)
+        self.assertEqual(wait, 30)
+        # half into the next window the previous one weighs 5 of 10
+        for _ in range(5):
+            self.assertTrue(self.hit_at(store, 6090)[0])
+        self.assertFalse(self.hit_at(store, 6090)[0])
+        self.assertTrue(self.hit_at(store, 6240)[0])
+
+    def test_compaction_drops_finished_windows(self):
+        store = InProcessThrottleStore(compact_interval=60)
+        self.hit_at(store, 0)
+        self.assertEqual(len(store), 1)
+        self.hit_at(store, 10_000_000)
+        self.assertEqual(len(store), 1)
+
+    def test_cache_store(self):
+        cache.clear()
+        store = CacheThrottleStore()
+        for _ in range(10):
+            self.assertTrue(self.hit_at(store, 6000)[0])
+        self.assertFalse(self.hit_at(store, 6030)[0])
+        self.assertTrue(self.hit_at(store, 6090)[0])
+
+
+@override_settings(AUTH_THROTTLE=THROTTLE, SECURE_SSL_REDIRECT=False)
+class LoginThrottleTests(TestCase):
+
+    def setUp(self):
+        get_store().clear()
+        self.user = User.objects.create_user(
+            username='anna@example.com', email='anna@example.com', password='pw-123456')
+
+    def login(self, email, ip='10.0.0.1'):
+        return self.client.post(
+            '/api/login/', {'email': email, 'password': 'wrong'},
+            content_type='application/json', REMOTE_ADDR=ip)
+
+    def test_email_limit_uses_normalized_email(self):
+        for email in ['anna@example.com', ' ANNA@example.com', 'Anna@Example.com ']:
+            self.assertEqual(self.login(email).status_code, 400)
+        with self.assertNumQueries(0):
+            response = self.login('anna@EXAMPLE.com', ip='10.0.0.2')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+    def test_ip_limit(self):
+        for index in range(5):
+            self.assertEqual(self.login(f'user{index}@example.com').status_code, 400)
+        self.assertEqual(self.login('other@example.com').status_code, 429)
+        self.assertEqual(self.login('other@example.com', ip='10.0.0.2').status_code, 400)
+
+    def test_spoofed_forwarded_for_ignored(self):
+        for index in range(5):
+            response = self.client.post(
+                '/api/login/', {'email': f'user{index}@example.com', 'password': 'wrong'},
+                content_type='application/json', REMOTE_ADDR='10.0.0.1',
+                HTTP_X_FORWARDED_FOR=f'192.0.2.{index}')
+            self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.login('other@example.com').status_code, 429)
+
+    def test_trusted_proxy_uses_forwarded_for(self):
+        rest_framework = {**settings.REST_FRAMEWORK, 'NUM_PROXIES': 1}
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            for index in range(5):
+                response = self.client.post(
+                    '/api/login/', {'email': f'user{index}@example.com', 'password': 'wrong'},
+                    content_type='application/json', REMOTE_ADDR='10.0.0.1',
+                    # a client-supplied entry before the one the proxy added
+                    HTTP_X_FORWARDED_FOR=f'192.0.2.{index}, 198.51.100.7')
+                self.assertEqual(response.status_code, 400)
+            response = self.client.post(
+                '/api/login/', {'email': 'other@example.com', 'password': 'wrong'},
+                content_type='application/json', REMOTE_ADDR='10.0.0.1',
+                HTTP_X_FORWARDED_FOR='198.51.100.8')
+            self.assertEqual(response.status_code, 400)
+            response = self.client.post(
+                '/api/login/', {'email': 'other@example.com', 'password': 'wrong'},
+                content_type='application/json', REMOTE_ADDR='10.0.0.1',
+                HTTP_X_FORWARDED_FOR='192.0.2.99, 198.51.100.7')
+            self.assertEqual(response.status_code, 429)
+
+    def test_email_check_throttled_before_authentication(self):
+        token = AuthToken.objects.create(user=self.user, device='test')
+        client = APIClient(REMOTE_ADDR='10.0.0.3')
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        for _ in range(2):
+            self.assertEqual(
+                client.get('/api/email-check/', {'email': 'Anna@example.com'}).status_code, 200)
+        with self.assertNumQueries(0):
+            response = client.get('/api/email-check/', {'email': 'anna@example.com'})
+        self.assertEqual(response.status_code, 429)
+
+
+class AuthQueryBudgetTests(QueryBudgetTestCase):
+    budgets = [
+        Budget('registration', 6, 'post', status=201, auth=False, data=lambda case: {
+            'fullname': 'New User', 'email': f'new{case.spare()}@example.com',
+            'password': 'secret-pw-1', 'repeated_password': 'secret-pw-1'}),
+        # a known device, the login rotates its token
+        Budget('login', 6, 'post', auth=False, data=lambda case: {
+            'email': 'owner@example.com', 'password': 'pw',
+            'device': case.spare_token().device}),
+        Budget('logout', 3, 'post', status=204, auth=lambda case: case.spare_token()),
+        Budget('token-list', 2),
+        Budget('token-revoke', 3, 'post', data=lambda case: {
+            'devices': [case.spare_token().device]}),
+        Budget('email-check', 2, params='email=owner@example.com'),
+    ]
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TokenCacheTests(TestCase):
+    """
+    cache hits skip the token query, revocations reach other processes
+    through the shared cache.
+    """
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user('owner', 'owner@example.com', 'pw')
+        self.token = AuthToken.objects.create(user=self.user, device='laptop')
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def tearDown(self):
+        token_cache.clear()
+
+    def authenticate(self):
+        return ExpiringTokenAuthentication().authenticate_credentials(self.token.key)
+
+    def test_hit_skips_queries(self):
+        self.authenticate()
+        with self.assertNumQueries(0):
+            user, token = self.authenticate()
+        self.assertEqual(user.pk, self.user.pk)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_lru_eviction_and_ttl(self):
+        tokens = TokenCache(max_size=2, ttl=60)
+        for key in 'abc':
+            tokens.set(key, self.user, self.token)
+        self.assertIsNone(tokens.get('a'))
+        self.assertIsNotNone(tokens.get('b'))
+
+        expired = TokenCache(max_size=2, ttl=0)
+        expired.set('a', self.user, self.token)
+        self.assertIsNone(expired.get('a'))
+
+    def test_logout_evicts(self):
+        self.authenticate()
+        self.assertEqual(self.client.post(reverse('logout')).status_code, 204)
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertEqual(self.client.get(reverse('token-list')).status_code, 401)
+
+    def test_deactivation_evicts(self):
+        self.authenticate()
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(token_cache.get(self.token.key))
+        self.assertEqual(self.client.get(reverse('token-list')).status_code, 401)
+
+    @override_settings(CACHES=SHARED_CACHES)
+    def test_revocation_reaches_other_processes(self):
+        cache.clear()
+        # the token cache of another worker process
+        other = TokenCache()
+        other.set(self.token.key, self.user, self.token)
+        self.assertIsNotNone(other.get(self.token.key))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(other.get(self.token.key))
+
+        key = self.token.key
+        other.set(key, self.user, self.token)
+        self.token.delete()
+        self.assertIsNone(other.get(key))
+        cache.clear()
+
+    def test_process_local_cache_writes_no_marks(self):
+        key = self.token.key
+        other = TokenCache()
+        other.set(key, self.user, self.token)
+        self.token.delete()
+        # documented: only the TTL bounds the other process
+        self.assertIsNotNone(other.get(key))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TokenSessionTests(TestCase):
+    """
+    per-device tokens: expiry, rotation, listing, revocation and purge.
+    """
+
+    def setUp(self):
+        token_cache.clear()
+        self.user = User.objects.create_user(
+            username='anna@example.com', email='anna@example.com', password='pw-123456')
+
+    def tearDown(self):
+        token_cache.clear()
+
+    def login(self, user_agent='Browser/1.0', **data):
+        return self.client.post(
+            reverse('login'), {'email': 'anna@example.com', 'password': 'pw-123456', **data},
+            content_type='application/json', HTTP_USER_AGENT=user_agent)
+
+    def client_for(self, token):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def test_expired_token_rejected(self):
+        token = AuthToken.objects.create(
+            user=self.user, device='old', expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(self.client_for(token).get(reverse('token-list')).status_code, 401)
+        self.assertIsNone(token_cache.get(token.key))
+
+    def test_token_extended_once_half_used(self):
+        expires_at = timezone.now() + timedelta(days=1)
+        token = AuthToken.objects.create(user=self.user, device='laptop', expires_at=expires_at)
+        self.assertEqual(self.client_for(token).get(reverse('token-list')).status_code, 200)
+        token.refresh_from_db()
+        self.assertGreater(token.expires_at, expires_at + timedelta(days=5))
+
+    def test_login_with_device_rotates(self):
+        first = self.login(device='phone').json()
+        second = self.login(device='phone').json()
+        self.assertEqual(second['device'], 'phone')
+        self.assertNotEqual(first['token'], second['token'])
+        self.assertEqual(
+            list(AuthToken.objects.values_list('key', flat=True)), [second['token']])
+
+    def test_same_user_agent_keeps_both_sessions(self):
+        first = self.login().json()
+        second = self.login().json()
+        self.assertNotEqual(first['device'], second['device'])
+        self.assertTrue(first['device'].startswith('Browser/1.0'))
+        self.assertEqual(AuthToken.objects.count(), 2)
+
+    def test_list_marks_current_session(self):
+        current = AuthToken.objects.create(user=self.user, device='laptop')
+        AuthToken.objects.create(user=self.user, device='phone')
+        AuthToken.objects.create(
+            user=self.user, device='expired', expires_at=timezone.now() - timedelta(seconds=1))
+        response = self.client_for(current).get(reverse('token-list'))
+        sessions = {item['device']: item['current'] for item in response.json()}
+        self.assertEqual(sessions, {'laptop': True, 'phone': False})
+
+    def test_revoke_devices(self):
+        current = AuthToken.objects.create(user=self.user, device='laptop')
+        AuthToken.objects.create(user=self.user, device='phone')
+        response = self.client_for(current).post(
+            reverse('token-revoke'), {'devices': ['phone']}, format='json')
+        self.assertEqual(response.json(), {'revoked': 1})
+        self.assertEqual(list(AuthToken.objects.values_list('device', flat=True)), ['laptop'])
+
+    def test_revoke_all_keep_current(self):
+        current = AuthToken.objects.create(user=self.user, device='laptop')
+        AuthToken.objects.create(user=self.user, device='phone')
+        response = self.client_for(current).post(
+            reverse('token-revoke'), {'all': True, 'keep_current': True}, format='json')
+        self.assertEqual(response.json(), {'revoked': 1})
+        self.assertTrue(AuthToken.objects.filter(key=current.key).exists())
+
+    def test_form_false_does_not_revoke_all(self):
+        current = AuthToken.objects.create(user=self.user, device='laptop')
+        AuthToken.objects.create(user=self.user, device='phone')
+        response = self.client_for(current).post(reverse('token-revoke'), {'all': 'false'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(AuthToken.objects.count(), 2)
+
+        response = self.client_for(current).post(
+            reverse('token-revoke'), {'all': 'false', 'devices': 'phone'})
+        self.assertEqual(response.json(), {'revoked': 1})
+
+    def test_purge_expired_tokens(self):
+        kept = AuthToken.objects.create(user=self.user, device='laptop')
+        for index in range(3):
+            AuthToken.objects.create(
+                user=self.user, device=f'old {index}',
+                expires_at=timezone.now() - timedelta(seconds=1))
+        out = StringIO()
+        call_command('purge_expired_tokens', '--batch-size', '2', stdout=out)
+        self.assertIn('Purged 3 expired tokens.', out.getvalue())
+        self.assertEqual(list(AuthToken.objects.values_list('key', flat=True)), [kept.key])
+
+
+# the auth routes as served through ASGI (settings.ASYNC_AUTH_VIEWS)
+urlpatterns = [
+    path('api/registration/', AsyncRegistrationView.as_view(), name='registration'),
+    path('api/login/', AsyncLoginView.as_view(), name='login'),
+    path('', include('core.urls')),
+]
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, ROOT_URLCONF=__name__)
+class AsyncAuthViewTests(TestCase):
+    """
+    the async login and registration views parse json, form and
+    multipart bodies and answer 503 while the hashing pool is full.
+    """
+
+    def setUp(self):
+        get_store().clear()
+        self.user = User.objects.create_user(
+            username='anna@example.com', email='anna@example.com', password='pw-123456')
+        self.client = AsyncClient()
+
+    def registration(self, email):
+        return {
+            'fullname': 'New User', 'email': email,
+            'password': 'secret-pw-1', 'repeated_password': 'secret-pw-1'}
+
+    async def test_login_body_formats(self):
+        credentials = {'email': 'anna@example.com', 'password': 'pw-123456'}
+        for response in [
+            await self.client.post(reverse('login'), credentials, content_type='application/json'),
+            await self.client.post(
+                reverse('login'), urlencode(credentials),
+                content_type='application/x-www-form-urlencoded'),
+            await self.client.post(reverse('login'), credentials),
+        ]:
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['user_id'], self.user.pk)
+
+    async def test_login_wrong_password(self):
+        response = await self.client.post(
+            reverse('login'), {'email': 'anna@example.com', 'password': 'wrong'},
+            content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('password', response.json())
+
+    async def test_malformed_json(self):
+        response = await self.client.post(
+            reverse('login'), '{"email": ', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        response = await self.client.post(
+            reverse('login'), '[]', content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    async def test_registration(self):
+        response = await self.client.post(
+            reverse('registration'), self.registration('new@example.com'),
+            content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(await User.objects.filter(email='new@example.com').aexists())
+
+        response = await self.client.post(
+            reverse('registration'), self.registration('form@example.com'))
+        self.assertEqual(response.status_code, 201)
+
+    async def test_pool_full_returns_503(self):
+        pool = BoundedHashingPool(workers=1, queue_size=0)
+        release = threading.Event()
+        pool.submit(release.wait)
+        try:
+            with mock.patch('auth_app.hashing.hashing_pool', pool):
+                login = await self.client.post(
+                    reverse('login'), {'email': 'anna@example.com', 'password': 'pw-123456'},
+                    content_type='application/json')
+                registration = await self.client.post(
+                    reverse('registration'), self.registration('busy@example.com'),
+                    content_type='application/json')
+        finally:
+            release.set()
+        for response in [login, registration]:
+            self.assertEqual(response.status_code, 503)
+            self.assertEqual(response['Retry-After'], '1')
+        self.assertFalse(await User.objects.filter(email='busy@example.com').aexists())
+
+    @override_settings(AUTH_THROTTLE={
+        **THROTTLE, 'BACKEND': 'auth_app.throttling.CacheThrottleStore'}, CACHES=SHARED_CACHES)
+    async def test_throttled_with_the_cache_store(self):
+        await sync_to_async(cache.clear)()
+        on_loop = []
+        hit = CacheThrottleStore.hit
+
+        def recording_hit(store, *args):
+            try:
+                on_loop.append(asyncio.get_running_loop() is not None)
+            except RuntimeError:
+                on_loop.append(False)
+            return hit(store, *args)
+
+        with mock.patch.object(CacheThrottleStore, 'hit', recording_hit):
+            for _ in range(4):
+                response = await self.client.post(
+                    reverse('login'), {'email': 'anna@example.com', 'password': 'wrong'},
+                    content_type='application/json')
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+        # the cache round trips ran on the sync thread, not the event loop
+        self.assertTrue(on_loop)
+        self.assertFalse(any(on_loop))
+
+    def test_wsgi_routes_the_sync_views(self):
+        with override_settings(ROOT_URLCONF='core.urls'):
+            self.assertIs(resolve(reverse('login')).func.view_class, CustomLoginView)
+            self.assertIs(
+                resolve(reverse('registration')).func.view_class, RegistrationView)
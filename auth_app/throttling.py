@@ -0,0 +1,222 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+from rest_framework.throttling import BaseThrottle
+
+
+PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    "10/min" -> (10, 60), None disables the throttle.
+    """
+    if rate is None:
+        return None
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def normalize_email(email):
+    if not isinstance(email, str):
+        return None
+    return email.strip().lower() or None
+
+
+def sliding_window(previous, current, elapsed, window, limit):
+    """
+    sliding-window estimate: the previous window counts with the share
+    that still overlaps the last `window` seconds.
+    returns (allowed, seconds to wait).
+    """
+    estimate = previous * (window - elapsed) / window + current
+    if estimate < limit:
+        return True, 0
+    if current >= limit or not previous:
+        return False, window - elapsed
+    # time until the previous window's weight has dropped far enough
+    return False, max(window - elapsed - (limit - current) * window / previous, 0)
+
+
+class InProcessThrottleStore:
+    """
+    per-process store: key -> [window, window index, previous, current].
+    constant memory per key; keys whose windows are over are dropped
+    every COMPACT_INTERVAL seconds.
+    """
+
+    def __init__(self, compact_interval=60):
+        self.compact_interval = compact_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._next_compaction = time.monotonic() + compact_interval
+
+    def hit(self, key, limit, window):
+        now = time.monotonic()
+        index = int(now // window)
+        with self._lock:
+            if now >= self._next_compaction:
+                self._compact(now)
+
+            entry = self._entries.get(key)
+            if entry is None or entry[1] < index - 1:
+                previous, current = 0, 0
+            elif entry[1] == index - 1:
+                previous, current = entry[3], 0
+            else:
+                previous, current = entry[2], entry[3]
+
+            allowed, wait = sliding_window(
+                previous, current, now - index * window, window, limit)
+            if allowed:
+                current += 1
+            self._entries[key] = [window, index, previous, current]
+        return allowed, wait
+
+    def _compact(self, now):
+        expired = [key for key, (window, index, previous, current) in self._entries.items()
+                   if int(now // window) - index >= 2]
+        for key in expired:
+            del self._entries[key]
+        self._next_compaction = now + self.compact_interval
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class CacheThrottleStore:
+    """
+    shared store on a django cache (e.g. redis), so the limits hold
+    across worker processes. two counters per key, expired by the cache.
+    """
+
+    def __init__(self, cache_alias='default', compact_interval=None):
+        # compact_interval is accepted for a shared OPTIONS dict,
+        # the cache timeouts do the compaction here
+        self.cache = caches[cache_alias]
+
+    def hit(self, key, limit, window):
+        now = time.time()
+        index = int(now // window)
+        current_key = f'throttle:{key}:{index}'
+        previous_key = f'throttle:{key}:{index - 1}'
+
+        counts = self.cache.get_many([current_key, previous_key])
+        allowed, wait = sliding_window(
+            counts.get(previous_key, 0), counts.get(current_key, 0),
+            now - index * window, window, limit)
+        if allowed:
+            self.cache.add(current_key, 0, timeout=2 * window)
+            try:
+                self.cache.incr(current_key)
+            except ValueError:
+                # expired between add and incr
+                self.cache.set(current_key, 1, timeout=2 * window)
+        return allowed, wait
+
+    def clear(self):
+        pass
+
+
+_store = None
+_store_config = None
+
+
+def get_store():
+    """
+    the configured store, rebuilt when AUTH_THROTTLE changes.
+    """
+    global _store, _store_config
+    config = getattr(settings, 'AUTH_THROTTLE', {})
+    if _store is None or config is not _store_config:
+        options = dict(config.get('OPTIONS', {}))
+        backend = import_string(
+            config.get('BACKEND', 'auth_app.throttling.InProcessThrottleStore'))
+        _store, _store_config = backend(**options), config
+    return _store
+
+
+def get_rate(scope):
+    return parse_rate(getattr(settings, 'AUTH_THROTTLE', {}).get('RATES', {}).get(scope))
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    DRF throttle on the sliding-window store. the rate of `scope`
+    comes from AUTH_THROTTLE['RATES'].
+    subclasses return the key, None skips the throttle.
+    """
+    scope = None
+
+    def get_key(self, request, view):
+        raise NotImplementedError('.get_key() must be overridden')
+
+    def allow_request(self, request, view):
+        self.wait_time = None
+        rate = get_rate(self.scope)
+        key = self.get_key(request, view)
+        if rate is None or key is None:
+            return True
+        allowed, wait = get_store().hit(f'{self.scope}:{key}', *rate)
+        if not allowed:
+            self.wait_time = math.ceil(wait) or 1
+        return allowed
+
+    def wait(self):
+        return self.wait_time
+
+
+class IPThrottle(SlidingWindowThrottle):
+    def get_key(self, request, view):
+        return self.get_ident(request)
+
+
+class EmailThrottle(SlidingWindowThrottle):
+    """
+    keyed by the normalized email the view is asked about
+    (view.get_throttle_email(request)).
+    """
+
+    def get_key(self, request, view):
+        return normalize_email(view.get_throttle_email(request))
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = 'login_ip'
+
+
+class LoginEmailThrottle(EmailThrottle):
+    scope = 'login_email'
+
+
+class EmailCheckIPThrottle(IPThrottle):
+    scope = 'email_check_ip'
+
+
+class EmailCheckEmailThrottle(EmailThrottle):
+    scope = 'email_check_email'
+
+
+class EarlyThrottleMixin:
+    """
+    runs the throttles before authentication and permissions,
+    so rejected requests never reach the database.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        self.check_throttles(request)
+        request._throttles_checked = True
+        super().initial(request, *args, **kwargs)
+
+    def check_throttles(self, request):
+        if getattr(request, '_throttles_checked', False):
+            return
+        super().check_throttles(request)
@@ -0,0 +1,122 @@
+"""
+load test of the database profiles: django's sqlite defaults
+(new connection per request, rollback journal, deferred transactions)
+against the profile in core/settings.py (WAL, synchronous=NORMAL, mmap,
+busy timeout, IMMEDIATE transactions, persistent connections).
+requests go through a real threaded http server, 80% task list reads
+and 20% task updates.
+
+    python -m benchmarks.db_profiles [--threads 8] [--requests 200]
+"""
+import argparse
+import copy
+import http.client
+import json
+import random
+import threading
+import time
+from urllib.parse import urlparse
+
+from benchmarks.utils import benchmark_database, serve_wsgi, setup_django
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def create_data(threads):
+    from django.contrib.auth.models import User
+
+    from auth_app.models import AuthToken
+    from board_app.models import Board
+    from task_app.models import Task
+
+    users = [User.objects.create_user(
+        username=f'user{index}@example.com', email=f'user{index}@example.com')
+        for index in range(threads)]
+    board = Board.objects.create(title='Load test', owner=users[0])
+    board.members.set(users)
+    task_ids = [Task.objects.create(
+        board=board, creator=users[0], title=f'Task {index}', status='to-do',
+        priority='low', assignee=users[index % threads]).id for index in range(200)]
+    tokens = [AuthToken.objects.create(user=user, device='loadtest').key for user in users]
+    return tokens, task_ids
+
+
+def worker(base_url, token, task_ids, amount, results, lock):
+    url = urlparse(base_url)
+    client = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+    headers = {'Authorization': f'Token {token}', 'Content-Type': 'application/json'}
+    latencies, errors = [], 0
+    for _ in range(amount):
+        if random.random() < 0.8:
+            method, path, body = 'GET', '/api/tasks/assigned-to-me/', None
+        else:
+            method, path = 'PATCH', f'/api/tasks/{random.choice(task_ids)}/'
+            body = json.dumps({'status': random.choice(['to-do', 'review', 'done'])})
+        started = time.perf_counter()
+        client.request(method, path, body=body, headers=headers)
+        response = client.getresponse()
+        response.read()
+        latencies.append(time.perf_counter() - started)
+        if response.status >= 400:
+            errors += 1
+    client.close()
+    with lock:
+        results['latencies'] += latencies
+        results['errors'] += errors
+
+
+def run_profile(name, conn_max_age, options, args):
+    from django.db import connection
+
+    with benchmark_database(on_disk=True):
+        tokens, task_ids = create_data(args.threads)
+        connection.settings_dict['CONN_MAX_AGE'] = conn_max_age
+        connection.settings_dict['OPTIONS'] = options
+        connection.close()
+
+        results, lock = {'latencies': [], 'errors': 0}, threading.Lock()
+        with serve_wsgi() as base_url:
+            threads = [threading.Thread(target=worker, args=(
+                base_url, tokens[index], task_ids, args.requests, results, lock))
+                for index in range(args.threads)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+
+    latencies = results['latencies']
+    print(f'{name:10} {len(latencies) / elapsed:8.1f} '
+          f'{percentile(latencies, 0.5) * 1000:8.1f} {percentile(latencies, 0.95) * 1000:8.1f} '
+          f'{percentile(latencies, 0.99) * 1000:8.1f} {results["errors"]:7}')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=200,
+                        help='requests per thread and profile.')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.test import override_settings
+
+    database = settings.DATABASES['default']
+    if database['ENGINE'] != 'django.db.backends.sqlite3':
+        raise SystemExit('the profiles compare sqlite settings, unset DB_ENGINE.')
+    tuned_options = copy.deepcopy(database['OPTIONS'])
+
+    with override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=['127.0.0.1']):
+        print(f'{args.threads} threads x {args.requests} requests (80% reads)')
+        print(f'{"profile":10} {"req/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"errors":>7}')
+        run_profile('default', 0, {}, args)
+        run_profile('tuned', database['CONN_MAX_AGE'], tuned_options, args)
+
+
+if __name__ == '__main__':
+    main()
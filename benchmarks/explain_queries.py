@@ -0,0 +1,92 @@
+"""
+runs EXPLAIN on the hot query shapes and reports whether they use an index.
+exits with status 1 if any shape falls back to a full table scan.
+
+    python -m benchmarks.explain_queries
+"""
+import re
+import sys
+
+from benchmarks.utils import benchmark_database, setup_django
+
+
+# sqlite reports "SCAN <table>" for full scans, postgresql "Seq Scan on <table>"
+FULL_SCAN = re.compile(r'\bSCAN (\w+)|Seq Scan on (\w+)')
+
+
+def seed():
+    from django.contrib.auth.models import User
+
+    from board_app.models import Board
+    from task_app.models import Comment, Task
+
+    users = User.objects.bulk_create([
+        User(username=f'user{index}@example.com',
+             email=f'user{index}@example.com')
+        for index in range(200)
+    ])
+    boards = Board.objects.bulk_create([
+        Board(title=f'Board {index}', owner=users[index % len(users)])
+        for index in range(50)
+    ])
+    tasks = Task.objects.bulk_create([
+        Task(board=boards[index % len(boards)], creator=users[0],
+             title=f'Task {index}', status='to-do', priority='high',
+             assignee=users[index % len(users)],
+             reviewer=users[(index + 1) % len(users)])
+        for index in range(2000)
+    ])
+    Comment.objects.bulk_create([
+        Comment(task=tasks[index % len(tasks)], author=users[0],
+                content=f'Comment {index}')
+        for index in range(4000)
+    ])
+    return users[1], boards[1], tasks[1]
+
+
+def query_shapes(user, board, task):
+    from django.contrib.auth.models import User
+
+    from task_app.models import Comment, Task
+
+    return {
+        'Task(assignee=user)': Task.objects.filter(
+            assignee=user).order_by('created_at', 'id'),
+        'Task(reviewer=user)': Task.objects.filter(
+            reviewer=user).order_by('created_at', 'id'),
+        "Task(board, status='to-do')": Task.objects.filter(
+            board=board, status='to-do'),
+        "Task(board, priority='high')": Task.objects.filter(
+            board=board, priority='high'),
+        'Comment(task).order_by(created_at)': Comment.objects.filter(
+            task=task).order_by('created_at'),
+        'User(email__iexact)': User.objects.filter(
+            email__iexact='USER1@example.com'),
+    }
+
+
+def main():
+    setup_django()
+    from django.db import connection
+
+    with benchmark_database():
+        shapes = query_shapes(*seed())
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        failures = 0
+        for label, queryset in shapes.items():
+            plan = queryset.explain()
+            scans = [match.group(1) or match.group(2)
+                     for match in FULL_SCAN.finditer(plan)]
+            verdict = 'FULL SCAN ' + ', '.join(scans) if scans else 'index'
+            failures += bool(scans)
+            print(f'{label:40} {verdict}')
+            for line in plan.splitlines():
+                print(f'    {line}')
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+encode time and bytes on the wire for board detail payloads.
+compares DRF's JSONRenderer with core.renderers.FastJSONRenderer
+and the response size with and without gzip (CompressionMiddleware).
+
+    python -m benchmarks.json_rendering [--sizes 10 100 1000] [--rounds 50]
+"""
+import argparse
+import time
+
+from benchmarks.utils import benchmark_database, setup_django
+
+
+def best_of(rounds, fn):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def create_board(tasks, users):
+    from board_app.models import Board
+    from task_app.models import Comment, Task
+
+    board = Board.objects.create(title=f'Board with {tasks} tasks', owner=users[0])
+    board.members.set(users)
+    created = Task.objects.bulk_create([
+        Task(board=board, creator=users[0], title=f'Implement feature #{index}',
+             description='As a user I want to see the board, so that I can plan '
+                         'the sprint. Acceptance criteria follow in the comments.',
+             status=('to-do', 'in-progress', 'review', 'done')[index % 4],
+             priority=('low', 'medium', 'high')[index % 3],
+             assignee=users[index % len(users)],
+             reviewer=users[(index + 1) % len(users)] if index % 3 else None,
+             due_date='2025-06-01' if index % 2 else None)
+        for index in range(tasks)])
+    Comment.objects.bulk_create([
+        Comment(task=task, author=users[0], content='looks good')
+        for task in created[::3]])
+    return board
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000])
+    parser.add_argument('--rounds', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.utils.text import compress_string
+    from rest_framework.renderers import JSONRenderer
+
+    from board_app.api.serializers import BoardDetailSerializer
+    from core import renderers
+    from core.renderers import FastJSONRenderer
+
+    if renderers.orjson is None:
+        print('orjson is not installed, FastJSONRenderer falls back to json\n')
+
+    with benchmark_database():
+        users = [User.objects.create_user(
+            username=f'member{index}@example.com', email=f'member{index}@example.com',
+            first_name=f'Member{index}', last_name='Example') for index in range(12)]
+
+        print(f'{"tasks":>6} {"json ms":>8} {"fast ms":>8} {"speedup":>8} '
+              f'{"raw KB":>8} {"gzip KB":>8} {"ratio":>6}')
+        for size in args.sizes:
+            board = create_board(size, users)
+            data = BoardDetailSerializer(board).data
+
+            stdlib = best_of(args.rounds, lambda: JSONRenderer().render(data))
+            fast = best_of(args.rounds, lambda: FastJSONRenderer().render(data))
+            body = FastJSONRenderer().render(data)
+            compressed = compress_string(body, max_random_bytes=100)
+            print(f'{size:>6} {stdlib * 1000:8.3f} {fast * 1000:8.3f} {stdlib / fast:7.1f}x '
+                  f'{len(body) / 1024:8.1f} {len(compressed) / 1024:8.1f} '
+                  f'{len(body) / len(compressed):5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
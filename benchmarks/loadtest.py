@@ -0,0 +1,255 @@
+"""
+mixed traffic load test: board list and detail, task crud, comments and
+login, replayed by concurrent clients. reports throughput and latency
+percentiles per endpoint as json, so runs can be compared across commits.
+
+without --url a throwaway database is filled by the generate_dataset
+command and served on a local port. with --url a running server is used,
+generate the data set there first (default password, at least --threads
+users) and expect 429s on login from the auth throttles.
+
+    python -m benchmarks.loadtest [--threads 8] [--requests 300] [--seed 1]
+                                  [--users 200] [--boards 60]
+                                  [--url http://127.0.0.1:8000] [--output run.json]
+"""
+import argparse
+import http.client
+import io
+import json
+import random
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+from benchmarks.utils import benchmark_database, serve_wsgi, setup_django
+
+
+PASSWORD = 'kanmind-dataset'
+# operation weights of the traffic mix
+PROFILE = {
+    'board list': 15,
+    'board detail': 15,
+    'task read': 15,
+    'task create': 8,
+    'task update': 12,
+    'task delete': 5,
+    'comment list': 15,
+    'comment create': 10,
+    'login': 2,
+}
+LOADTEST_TITLE = 'Load test task'
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+class Worker:
+    """
+    one simulated user on its own keep-alive connection.
+    only reads and updates tasks of the data set, deletes only tasks it
+    created itself, so workers never trip over each other.
+    """
+
+    def __init__(self, base_url, email, rng):
+        url = urlparse(base_url)
+        self.connection = http.client.HTTPConnection(url.hostname, url.port, timeout=60)
+        self.email = email
+        self.rng = rng
+        self.token = None
+        self.user_id = None
+        self.boards = []
+        self.tasks = []
+        self.own_tasks = []
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def call(self, name, method, path, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        started = time.perf_counter()
+        self.connection.request(
+            method, path, body=json.dumps(body) if body is not None else None, headers=headers)
+        response = self.connection.getresponse()
+        content = response.read()
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status >= 400:
+            self.errors[name] += 1
+            return None
+        return json.loads(content) if content else {}
+
+    def run(self, requests):
+        self.login()
+        self.board_list()
+        if self.boards:
+            self.board_detail()
+        operations, weights = zip(*PROFILE.items())
+        for _ in range(requests):
+            operation = self.rng.choices(operations, weights)[0]
+            getattr(self, operation.replace(' ', '_'))()
+        self.connection.close()
+
+    def login(self):
+        data = self.call('login', 'POST', '/api/login/', {
+            'email': self.email, 'password': PASSWORD, 'device': 'loadtest'})
+        if data:
+            self.token, self.user_id = data['token'], data['user_id']
+
+    def board_list(self):
+        data = self.call('board list', 'GET', '/api/boards/')
+        if data is not None:
+            self.boards = [board['id'] for board in data]
+
+    def board_detail(self):
+        if not self.boards:
+            return self.board_list()
+        data = self.call('board detail', 'GET', f'/api/boards/{self.rng.choice(self.boards)}/')
+        if data:
+            self.tasks = [task['id'] for task in data['tasks']
+                          if not task['title'].startswith(LOADTEST_TITLE)] or self.tasks
+
+    def pick_task(self):
+        if not self.tasks:
+            self.board_detail()
+        return self.rng.choice(self.tasks) if self.tasks else None
+
+    def task_read(self):
+        task_id = self.pick_task()
+        if task_id:
+            self.call('task read', 'GET', f'/api/tasks/{task_id}/')
+
+    def task_update(self):
+        task_id = self.pick_task()
+        if task_id:
+            self.call('task update', 'PATCH', f'/api/tasks/{task_id}/', {
+                'status': self.rng.choice(['to-do', 'in-progress', 'review', 'done'])})
+
+    def task_create(self):
+        if not self.boards:
+            return self.board_list()
+        data = self.call('task create', 'POST', '/api/tasks/', {
+            'board': self.rng.choice(self.boards), 'title': f'{LOADTEST_TITLE} {self.email}',
+            'description': 'created by benchmarks.loadtest', 'status': 'to-do',
+            'priority': self.rng.choice(['low', 'medium', 'high']),
+            'assignee_id': self.user_id})
+        if data:
+            self.own_tasks.append(data['id'])
+
+    def task_delete(self):
+        if not self.own_tasks:
+            return self.task_create()
+        task_id = self.own_tasks.pop(self.rng.randrange(len(self.own_tasks)))
+        self.call('task delete', 'DELETE', f'/api/tasks/{task_id}/')
+
+    def comment_list(self):
+        task_id = self.pick_task()
+        if task_id:
+            self.call('comment list', 'GET', f'/api/tasks/{task_id}/comments/')
+
+    def comment_create(self):
+        task_id = self.pick_task()
+        if task_id:
+            self.call('comment create', 'POST', f'/api/tasks/{task_id}/comments/', {
+                'content': 'Load test comment'})
+
+
+def run(base_url, args):
+    workers = [Worker(base_url, f'user{index}@example.com', random.Random(args.seed + index))
+               for index in range(args.threads)]
+    threads = [threading.Thread(target=worker.run, args=(args.requests,)) for worker in workers]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies, errors = defaultdict(list), defaultdict(int)
+    for worker in workers:
+        for name, values in worker.latencies.items():
+            latencies[name] += values
+            errors[name] += worker.errors[name]
+
+    endpoints = {}
+    for name in sorted(latencies):
+        values = latencies[name]
+        endpoints[name] = {
+            'requests': len(values),
+            'errors': errors[name],
+            'throughput': round(len(values) / elapsed, 1),
+            'mean_ms': round(sum(values) / len(values) * 1000, 2),
+            'p50_ms': round(percentile(values, 0.5) * 1000, 2),
+            'p95_ms': round(percentile(values, 0.95) * 1000, 2),
+            'p99_ms': round(percentile(values, 0.99) * 1000, 2),
+        }
+    total = sum(endpoint['requests'] for endpoint in endpoints.values())
+    return {
+        'duration_s': round(elapsed, 2),
+        'requests': total,
+        'errors': sum(errors.values()),
+        'throughput': round(total / elapsed, 1),
+        'endpoints': endpoints,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+            check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--requests', type=int, default=300, help='requests per thread.')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--users', type=int, default=200, help='data set size without --url.')
+    parser.add_argument('--boards', type=int, default=60, help='data set size without --url.')
+    parser.add_argument('--url', help='benchmark a running server instead.')
+    parser.add_argument('--output', help='write the json here instead of stdout.')
+    args = parser.parse_args()
+
+    report = {
+        'commit': git_commit(),
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'profile': PROFILE,
+    }
+    if args.url:
+        report.update(run(args.url.rstrip('/'), args))
+    else:
+        setup_django()
+        from django.conf import settings
+        from django.core.management import call_command
+        from django.test import override_settings
+
+        if args.users < args.threads:
+            raise SystemExit('--users must be at least --threads.')
+        # the throttles would answer most logins with 429 from one ip
+        throttle = {**settings.AUTH_THROTTLE, 'RATES': {
+            scope: '100000/min' for scope in settings.AUTH_THROTTLE['RATES']}}
+        with override_settings(SECURE_SSL_REDIRECT=False, ALLOWED_HOSTS=['127.0.0.1'],
+                               AUTH_THROTTLE=throttle), benchmark_database(on_disk=True):
+            call_command('generate_dataset', users=args.users, boards=args.boards,
+                         seed=args.seed, password=PASSWORD, stdout=io.StringIO())
+            with serve_wsgi() as base_url:
+                report.update(run(base_url, args))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+login throughput under concurrency.
+every thread logs in repeatedly through POST /api/login/, the report shows
+logins per second, latency percentiles and how many requests were
+rejected with 503 by the bounded hashing pool.
+
+    python -m benchmarks.login_throughput [--concurrency 1 4 16 64] [--logins 8]
+    [--iterations 100000]   (PBKDF2 iterations, django default is 1000000)
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+from benchmarks.utils import benchmark_database, setup_django
+
+
+class BenchmarkHasher(PBKDF2PasswordHasher):
+    iterations = int(os.environ.get('BENCHMARK_PBKDF2_ITERATIONS', '100000'))
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_level(concurrency, logins, users):
+    from django.test import Client
+
+    latencies, statuses = [], []
+    lock = threading.Lock()
+
+    def worker(index):
+        client = Client()
+        email = users[index % len(users)]
+        for _ in range(logins):
+            started = time.perf_counter()
+            response = client.post(
+                '/api/login/', {'email': email, 'password': 'benchmark-pw'},
+                content_type='application/json')
+            with lock:
+                latencies.append(time.perf_counter() - started)
+                statuses.append(response.status_code)
+
+    threads = [threading.Thread(target=worker, args=(index,))
+               for index in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    ok = statuses.count(200)
+    return {
+        'concurrency': concurrency,
+        'logins_per_second': ok / elapsed,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'mean_ms': statistics.mean(latencies) * 1000,
+        'rejected_503': statuses.count(503),
+        'other_errors': len(statuses) - ok - statuses.count(503),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16, 64])
+    parser.add_argument('--logins', type=int, default=8,
+                        help='logins per thread and level.')
+    parser.add_argument('--iterations', type=int, default=100000)
+    args = parser.parse_args()
+
+    os.environ['BENCHMARK_PBKDF2_ITERATIONS'] = str(args.iterations)
+    BenchmarkHasher.iterations = args.iterations
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.test import override_settings
+
+    with benchmark_database(on_disk=True), override_settings(
+            SECURE_SSL_REDIRECT=False,
+            AUTH_THROTTLE={'RATES': {}},
+            PASSWORD_HASHERS=['benchmarks.login_throughput.BenchmarkHasher']):
+        users = []
+        for index in range(max(args.concurrency)):
+            email = f'user{index}@example.com'
+            User.objects.create_user(username=email, email=email, password='benchmark-pw')
+            users.append(email)
+
+        print(f'{"threads":>8} {"logins/s":>10} {"p50 ms":>8} {"p99 ms":>8} {"503":>6} {"errors":>7}')
+        for concurrency in args.concurrency:
+            result = run_level(concurrency, args.logins, users)
+            print(f'{result["concurrency"]:>8} {result["logins_per_second"]:>10.1f} '
+                  f'{result["p50_ms"]:>8.1f} {result["p99_ms"]:>8.1f} '
+                  f'{result["rejected_503"]:>6} {result["other_errors"]:>7}')
+
+
+if __name__ == '__main__':
+    main()
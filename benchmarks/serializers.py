@@ -0,0 +1,88 @@
+"""
+compares the DRF serializers with the fast .values() serializer on
+task lists: serialization only (rows already fetched) and end to end
+(query + serialization).
+
+    python -m benchmarks.serializers [--tasks 500] [--rounds 20]
+"""
+import argparse
+import time
+
+from benchmarks.utils import benchmark_database, setup_django
+
+
+def best_of(rounds, fn):
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def create_tasks(amount):
+    from django.contrib.auth.models import User
+
+    from board_app.models import Board
+    from task_app.models import Comment, Task
+
+    users = [User.objects.create_user(
+        username=f'user{index}@example.com', email=f'user{index}@example.com',
+        first_name=f'First{index}' if index % 2 else '', last_name='Last')
+        for index in range(10)]
+    board = Board.objects.create(title='Benchmark', owner=users[0])
+    tasks = Task.objects.bulk_create([
+        Task(board=board, creator=users[0], title=f'Task {index}',
+             description='lorem ipsum ' * 10, status='to-do', priority='medium',
+             assignee=users[index % 10], reviewer=users[(index + 3) % 10] if index % 4 else None,
+             due_date='2025-06-01' if index % 3 else None)
+        for index in range(amount)])
+    Comment.objects.bulk_create([
+        Comment(task=task, author=users[0], content='comment')
+        for task in tasks[::2]])
+    return Task.objects.filter(board=board)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tasks', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db.models import Count
+
+    from board_app.api.serializers import BoardTaskSerializer
+    from task_app.api.fast_serializers import get_fast_serializer
+    from task_app.api.serializers import TaskReadSerializer
+
+    with benchmark_database():
+        tasks = create_tasks(args.tasks)
+
+        print(f'{args.tasks} tasks, best of {args.rounds} rounds')
+        print(f'{"serializer":22} {"part":14} {"drf ms":>8} {"fast ms":>8} {"speedup":>8}')
+        for serializer_class in (TaskReadSerializer, BoardTaskSerializer):
+            fast = get_fast_serializer(serializer_class)
+            instances = list(tasks.select_related('assignee', 'reviewer').annotate(
+                comments_count=Count('comments')))
+            rows = list(fast.values(tasks))
+
+            results = {
+                'serialize': (
+                    best_of(args.rounds, lambda: serializer_class(instances, many=True).data),
+                    best_of(args.rounds, lambda: fast.serialize(rows)),
+                ),
+                'query+serialize': (
+                    best_of(args.rounds, lambda: serializer_class(
+                        tasks.select_related('assignee', 'reviewer').annotate(
+                            comments_count=Count('comments')), many=True).data),
+                    best_of(args.rounds, lambda: fast.data(tasks)),
+                ),
+            }
+            for part, (drf, fast_time) in results.items():
+                print(f'{serializer_class.__name__:22} {part:14} {drf * 1000:8.2f} '
+                      f'{fast_time * 1000:8.2f} {drf / fast_time:7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+compares TokenAuthentication with the cached authentication classes.
+measures requests per second and queries per request on
+GET /api/tasks/assigned-to-me/ (small payload, auth dominates).
+
+    python -m benchmarks.token_auth [--requests 2000]
+"""
+import argparse
+import time
+
+from benchmarks.utils import benchmark_database, setup_django
+
+
+def run(client, url, headers, amount):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    client.get(url, headers=headers)  # warm up
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for _ in range(amount):
+            client.get(url, headers=headers)
+        elapsed = time.perf_counter() - started
+    return amount / elapsed, len(queries) / amount
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.contrib.auth.models import User
+    from django.test import Client, override_settings
+    from rest_framework.authentication import TokenAuthentication
+    from rest_framework.authtoken.models import Token
+
+    from auth_app.authentication import CachedTokenAuthentication, ExpiringTokenAuthentication
+    from auth_app.models import AuthToken
+    from task_app.api.views import TasksAssignedToMeView
+
+    with benchmark_database(), override_settings(SECURE_SSL_REDIRECT=False):
+        user = User.objects.create_user(
+            username='bench@example.com', email='bench@example.com')
+        token = Token.objects.create(user=user)
+        auth_token = AuthToken.objects.create(user=user)
+        client = Client()
+        url = '/api/tasks/assigned-to-me/'
+
+        results = {}
+        for auth_class, key in ((TokenAuthentication, token.key),
+                                (CachedTokenAuthentication, token.key),
+                                (ExpiringTokenAuthentication, auth_token.key)):
+            TasksAssignedToMeView.authentication_classes = [auth_class]
+            headers = {'Authorization': f'Token {key}'}
+            results[auth_class.__name__] = run(
+                client, url, headers, args.requests)
+
+    for name, (rps, queries) in results.items():
+        print(f'{name:28} {rps:8.0f} req/s  {queries:.2f} queries/request')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+shared helpers for the benchmark scripts.
+run a benchmark from the project root, e.g.:
+    python -m benchmarks.explain_queries
+"""
+import os
+import threading
+from contextlib import contextmanager
+
+
+def setup_django():
+    """
+    configures django for a standalone script.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+    os.environ.setdefault('SECRET_KEY', 'benchmark-only-secret-key')
+
+    import django
+    django.setup()
+
+
+@contextmanager
+def benchmark_database(on_disk=False):
+    """
+    runs the benchmark against a throwaway test database,
+    so the development db.sqlite3 is never touched.
+    on_disk: use a sqlite file instead of memory, needed when
+    several threads write concurrently.
+    """
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    if on_disk and connection.vendor == 'sqlite':
+        connection.settings_dict['TEST']['NAME'] = 'benchmark_db.sqlite3'
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        test_name = connection.settings_dict['NAME']
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        if on_disk:
+            # WAL sidecar files of connections other threads left open
+            for suffix in ('-wal', '-shm'):
+                if os.path.exists(f'{test_name}{suffix}'):
+                    os.remove(f'{test_name}{suffix}')
+
+
+@contextmanager
+def serve_wsgi():
+    """
+    serves the project on a free local port (threaded, like runserver),
+    yields the base url. requests go through the full server path,
+    including closing connections after each request.
+    """
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+
+    class QuietHandler(WSGIRequestHandler):
+        # like production servers, otherwise headers and body wait
+        # for the client's delayed ack (~40ms per keep-alive request)
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadedWSGIServer(('127.0.0.1', 0), QuietHandler, allow_reuse_address=False)
+    server.set_app(WSGIHandler())
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://127.0.0.1:{server.server_port}'
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from board_app.membership import is_board_member
+
 
 class IsBoardOwnerOrMember(permissions.BasePermission):
     """
@@ -11,8 +13,7 @@ class IsBoardOwnerOrMember(permissions.BasePermission):
         return bool(request.user and request.user.is_authenticated)
 
     def has_object_permission(self, request, view, obj):
-        user = request.user
-        return user == obj.owner or user in obj.members.all()
+        return is_board_member(obj, request.user, request)
 
 
 class isOwnerOnly(permissions.BasePermission):
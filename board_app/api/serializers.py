@@ -1,9 +1,12 @@
 from rest_framework import serializers
 
 from django.contrib.auth.models import User
+from django.db import transaction
 
 from board_app.models import Board
 from task_app.models import Task
+from task_app.api.fast_serializers import get_fast_serializer
+from task_app.api.serializers import SparseFieldsMixin
 
 
 class BoardSerializer(serializers.ModelSerializer):
@@ -16,7 +19,8 @@ class BoardSerializer(serializers.ModelSerializer):
     tasks_to_do_count = serializers.SerializerMethodField(read_only=True)
     tasks_high_prio_count = serializers.SerializerMethodField(read_only=True)
 
-    owner_id = serializers.IntegerField(source='owner.id', read_only=True)
+    # read the fk column directly, no join on the owner row needed
+    owner_id = serializers.IntegerField(read_only=True)
     # write_only=True ensure it accepts IDs on POST but hides them on GET
     members = serializers.PrimaryKeyRelatedField(
         queryset=User.objects.all(), many=True, required=False, write_only=True
@@ -35,16 +39,34 @@ class BoardSerializer(serializers.ModelSerializer):
             'owner_id',
         ]
 
+    # counters are read from the denormalized BoardCounter row,
+    # fall back to single queries if a board has no row yet.
+    def _stored_counter(self, obj, field):
+        counter = getattr(obj, 'counter', None)
+        return getattr(counter, field) if counter is not None else None
+
     def get_member_count(self, obj):
+        stored = self._stored_counter(obj, 'member_count')
+        if stored is not None:
+            return stored
         return obj.members.count()
 
     def get_ticket_count(self, obj):
+        stored = self._stored_counter(obj, 'task_count')
+        if stored is not None:
+            return stored
         return obj.tasks.count()
 
     def get_tasks_to_do_count(self, obj):
+        stored = self._stored_counter(obj, 'to_do_count')
+        if stored is not None:
+            return stored
         return obj.tasks.filter(status='to-do').count()
 
     def get_tasks_high_prio_count(self, obj):
+        stored = self._stored_counter(obj, 'high_prio_count')
+        if stored is not None:
+            return stored
         return obj.tasks.filter(priority='high').count()
 
 
@@ -67,7 +89,7 @@ class BoardMemberSerializer(serializers.ModelSerializer):
         return full if full else obj.username
 
 
-class BoardTaskSerializer(serializers.ModelSerializer):
+class BoardTaskSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     serializer for tasks nested inside board details.
     """
@@ -90,6 +112,10 @@ class BoardTaskSerializer(serializers.ModelSerializer):
         ]
 
     def get_comments_count(self, obj):
+        # annotated by BoardDetailSerializer.get_tasks
+        annotated = getattr(obj, 'comments_count', None)
+        if annotated is not None:
+            return annotated
         return obj.comments.count()
 
 
@@ -113,11 +139,8 @@ class BoardDetailSerializer(serializers.ModelSerializer):
         ]
 
     def get_tasks(self, obj):
-        tasks = obj.tasks.all().select_related(
-            'assignee',
-            'reviewer'
-        )
-        return BoardTaskSerializer(tasks, many=True).data
+        # same output as BoardTaskSerializer, built from .values() rows
+        return get_fast_serializer(BoardTaskSerializer).data(obj.tasks.all())
 
 
 class BoardUpdateSerializer(serializers.ModelSerializer):
@@ -136,6 +159,7 @@ class BoardUpdateSerializer(serializers.ModelSerializer):
             'members',
         ]
 
+    @transaction.atomic
     def update(self, instance, validated_data):
         if "title" in validated_data:
             instance.title = validated_data["title"]
@@ -147,6 +171,7 @@ class BoardUpdateSerializer(serializers.ModelSerializer):
             if owner not in new_members:
                 new_members.append(owner)
 
+            # member_count is refreshed by the m2m_changed signal
             instance.members.set(new_members)
 
         instance.save()
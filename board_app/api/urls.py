@@ -1,8 +1,11 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
 
-from .views import BoardViewSet
+from .views import BoardEventsView, BoardViewSet
 
 router = DefaultRouter()
 router.register(r'boards', BoardViewSet, basename='board')
 
-urlpatterns = router.urls
+urlpatterns = [
+    path('boards/<int:pk>/events/', BoardEventsView.as_view(), name='board-events'),
+] + router.urls
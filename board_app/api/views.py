@@ -1,19 +1,47 @@
-from django.db.models import Q
+import asyncio
+import json
 
-from rest_framework import viewsets, permissions
-from rest_framework.exceptions import NotAuthenticated
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Q
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils.http import parse_etags
+from django.views import View
+
+from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
 from rest_framework.response import Response
 
+from auth_app.authentication import ExpiringTokenAuthentication
+from core.db_routers import primary_reads
+from core.responses import ChunkedStreamingHttpResponse
 from board_app.models import Board
-from .serializers import BoardDetailSerializer, BoardSerializer, BoardUpdateSerializer, BoardUpdateResponseSerializer
+from task_app.models import Comment
+from board_app.changes import collect_changes, latest_cursor
+from board_app.transfer import export_board
+from board_app.events import get_broker, issue_ticket, read_ticket, ticket_max_age
+from board_app.membership import is_board_member
+from board_app.caching import (
+    board_cache_enabled, board_etag, get_board_version, get_cached_board_detail,
+    set_cached_board_detail,
+)
+from task_app.api.filters import TaskFilterBackend, TaskOrderingFilter, parse_fields, select_task_fields
+from task_app.api.fast_serializers import get_fast_serializer
+from task_app.api.pagination import OptionalCursorPagination, stream_json_chunks, wants_stream
+from task_app.api.serializers import CommentSerializer
+from .serializers import BoardDetailSerializer, BoardMemberSerializer, BoardSerializer, BoardTaskSerializer, BoardUpdateSerializer, BoardUpdateResponseSerializer
 from .permissions import IsBoardOwnerOrMember, isOwnerOnly
 
 
 class BoardViewSet(viewsets.ModelViewSet):
     """
     viewset for handling CRUD operations matches with API DOC.
+    safe requests read from the replicas (core.db_routers).
     """
     serializer_class = BoardSerializer
+    use_read_replica = True
 
     def get_queryset(self):
         """
@@ -24,21 +52,25 @@ class BoardViewSet(viewsets.ModelViewSet):
         """
         if self.action == 'list':
             user = self.request.user
-            return Board.objects.filter(
+            # counters are stored per board, no scan over tasks needed.
+            visible_ids = Board.objects.filter(
                 Q(owner=user) | Q(members=user)
-            ).distinct()
+            ).values('id')
+            return Board.objects.filter(
+                id__in=visible_ids
+            ).select_related('counter')
         # if user not authenticated → 403 forbidden
         return Board.objects.all()
 
     def get_permissions(self):
         """
         assign perm based on action according to API DOC.
-        DELTE → owner only
+        DELTE, export → owner only
         others → owner or member
         """
         if self.action in ['list', 'create']:
             return [permissions.IsAuthenticated()]
-        if self.action == 'destroy':
+        if self.action in ['destroy', 'export']:
             return [permissions.IsAuthenticated(),
                     isOwnerOnly()]
         return [permissions.IsAuthenticated(),
@@ -54,6 +86,35 @@ class BoardViewSet(viewsets.ModelViewSet):
             return BoardUpdateSerializer
         return BoardSerializer
 
+    def retrieve(self, request, *args, **kwargs):
+        """
+        board details, cached per board version.
+        supports If-None-Match, an unchanged board returns 304.
+        without a shared cache every request is serialized, no ETag.
+        """
+        instance = self.get_object()
+        if not board_cache_enabled():
+            return Response(self.get_serializer(instance).data)
+        version = get_board_version(instance.id)
+        etag = board_etag(instance.id, version)
+
+        if_none_match = request.headers.get('If-None-Match', '')
+        # weak comparison, the compression middleware sends W/"..."
+        client_etags = [tag.removeprefix('W/') for tag in parse_etags(if_none_match)]
+        if etag in client_etags or if_none_match.strip() == '*':
+            return Response(status=status.HTTP_304_NOT_MODIFIED,
+                            headers={'ETag': etag})
+
+        data = get_cached_board_detail(instance.id, version)
+        if data is None:
+            # cached for every client, so never built from a lagging replica
+            with primary_reads():
+                if instance._state.db != 'default':
+                    instance = self.get_object()
+                data = self.get_serializer(instance).data
+            set_cached_board_detail(instance.id, version, data)
+        return Response(data, headers={'ETag': etag})
+
     def partial_update(self, request, *args, **kwargs):
         """
         custom update to return specific response format.
@@ -71,5 +132,202 @@ class BoardViewSet(viewsets.ModelViewSet):
         """
         creates board, set current user as owner, and adds owner to members.
         """
-        board = serializer.save(owner=self.request.user)
-        board.members.add(self.request.user)
+        with transaction.atomic():
+            board = serializer.save(owner=self.request.user)
+            board.members.add(self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def tasks(self, request, pk=None):
+        """
+        tasks of a board without the rest of the detail payload.
+        GET /api/boards/{id}/tasks/
+        optional: ?cursor= / ?page_size= for pagination, ?stream=1 for streaming,
+        ?status= / ?priority= / ?due_from= / ?due_to= filters, ?ordering=
+        and ?fields= sparse fieldsets.
+        """
+        board = self.get_object()
+        fields = parse_fields(request, BoardTaskSerializer)
+        tasks = board.tasks.all()
+        for backend in (TaskFilterBackend, TaskOrderingFilter):
+            tasks = backend().filter_queryset(request, tasks, self)
+
+        if OptionalCursorPagination.is_requested(request) and not wants_stream(request):
+            paginator = OptionalCursorPagination()
+            page = paginator.paginate_queryset(
+                select_task_fields(tasks, fields), request, view=self)
+            serializer = BoardTaskSerializer(page, many=True, fields=fields)
+            return paginator.get_paginated_response(serializer.data)
+
+        fast = get_fast_serializer(BoardTaskSerializer, fields)
+        if wants_stream(request):
+            if not tasks.query.order_by:
+                tasks = tasks.order_by('created_at', 'id')
+            return stream_json_chunks(
+                fast.values(tasks).iterator(chunk_size=500), fast.serialize)
+        return Response(fast.data(tasks))
+
+    @action(detail=True, methods=['get'])
+    def changes(self, request, pk=None):
+        """
+        incremental sync, everything changed after the cursor.
+        GET /api/boards/{id}/changes/?since=<cursor>
+        without ?since only the current cursor is returned.
+        deleted objects are returned as ids in "deleted", comments deleted
+        with their task only as the task. a cursor newer than the log
+        returns 410 with the current cursor.
+        """
+        board = self.get_object()
+
+        since = request.query_params.get('since')
+        if since is None:
+            return Response({'cursor': latest_cursor(board.id), 'has_more': False})
+        try:
+            since = int(since)
+        except ValueError:
+            return Response({"since": "Must be an integer cursor."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        entries, cursor, has_more = collect_changes(board.id, since)
+        if not entries and since > 0:
+            # a replica may lag behind the cursor a client got from an event
+            with primary_reads():
+                latest = latest_cursor(board.id)
+            if since > latest:
+                # a cursor of another database (restore, import), the client
+                # has to reload the board and continue from the returned cursor
+                return Response({"detail": "Unknown cursor, reload the board.",
+                                 "cursor": latest}, status=status.HTTP_410_GONE)
+
+        def changed_ids(kind):
+            return [object_id for (entry_kind, object_id), action in entries.items()
+                    if entry_kind == kind and action != 'deleted']
+
+        def deleted_ids(kind):
+            return [object_id for (entry_kind, object_id), action in entries.items()
+                    if entry_kind == kind and action == 'deleted']
+
+        tasks = board.tasks.filter(id__in=changed_ids('task')).select_related(
+            'assignee',
+            'reviewer'
+        ).annotate(comments_count=Count('comments'))
+        comments = Comment.objects.filter(
+            task__board=board, id__in=changed_ids('comment'))
+        members = board.members.filter(id__in=changed_ids('member'))
+
+        comment_data = []
+        for comment in comments:
+            data = CommentSerializer(comment).data
+            data['task'] = comment.task_id
+            comment_data.append(data)
+
+        return Response({
+            'cursor': cursor,
+            'has_more': has_more,
+            'board': {'id': board.id, 'title': board.title} if changed_ids('board') else None,
+            'tasks': BoardTaskSerializer(tasks, many=True).data,
+            'comments': comment_data,
+            'members': BoardMemberSerializer(members, many=True).data,
+            'deleted': {
+                'tasks': deleted_ids('task'),
+                'comments': deleted_ids('comment'),
+                'members': deleted_ids('member'),
+            },
+        })
+
+    @action(detail=True, methods=['get'])
+    def export(self, request, pk=None):
+        """
+        the whole board as NDJSON download, owner only.
+        GET /api/boards/{id}/export/
+        streamed in chunks (board_app.transfer), import with the
+        import_board management command. not a snapshot, rows written
+        during the download may be missing or dropped on import, the
+        export_board command reads one snapshot on postgresql.
+        """
+        board = self.get_object()
+        # rows are read while the body is sent, after the replica routing
+        # of the request ended, so the export always comes from the primary
+        response = ChunkedStreamingHttpResponse(
+            export_board(board), content_type='application/x-ndjson')
+        response['Content-Disposition'] = f'attachment; filename="board-{board.id}.ndjson"'
+        return response
+
+    @action(detail=True, methods=['post'], url_path='events/ticket', url_name='events-ticket')
+    def events_ticket(self, request, pk=None):
+        """
+        short-lived ticket for the event stream, members only.
+        POST /api/boards/{id}/events/ticket/
+        then GET /api/boards/{id}/events/?ticket=<ticket>
+        """
+        board = self.get_object()
+        return Response({
+            'ticket': issue_ticket(board.id, request.user.id),
+            'expires_in': ticket_max_age(),
+        })
+
+
+class BoardEventsView(View):
+    """
+    server-sent events stream of board changes, served async via ASGI.
+    GET /api/boards/{id}/events/
+    auth via "Authorization: Token <key>" or ?ticket= from
+    POST /api/boards/{id}/events/ticket/ (EventSource can not set headers,
+    the long-lived token never goes into the URL). membership is checked
+    once when connecting.
+    each event carries the change cursor, clients fetch details from
+    /api/boards/{id}/changes/.
+    """
+    keepalive_seconds = 15
+
+    async def get(self, request, pk):
+        user = await sync_to_async(self.authenticate)(request, pk)
+        if user is None:
+            return JsonResponse(
+                {"detail": "Authentication credentials were not provided."}, status=401)
+
+        board = await Board.objects.filter(pk=pk).only('id', 'owner_id').afirst()
+        if board is None:
+            return JsonResponse({"detail": "Not found."}, status=404)
+        if not await sync_to_async(is_board_member)(board, user):
+            return JsonResponse(
+                {"detail": "You do not have permission to perform this action."}, status=403)
+
+        subscription = get_broker().subscribe(board.id)
+        response = StreamingHttpResponse(
+            self.stream(subscription), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    def authenticate(self, request, board_id):
+        ticket = request.GET.get('ticket')
+        if ticket is not None:
+            user_id = read_ticket(ticket, board_id)
+            if user_id is None:
+                return None
+            return User.objects.filter(pk=user_id, is_active=True).first()
+
+        header = request.headers.get('Authorization', '').split()
+        if len(header) != 2 or header[0].lower() != 'token':
+            return None
+        try:
+            user, token = ExpiringTokenAuthentication().authenticate_credentials(header[1])
+        except AuthenticationFailed:
+            return None
+        return user
+
+    async def stream(self, subscription):
+        try:
+            yield b': connected\n\n'
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), self.keepalive_seconds)
+                except asyncio.TimeoutError:
+                    # keeps proxies from closing idle connections
+                    yield b': keepalive\n\n'
+                    continue
+                yield (f"id: {event['cursor']}\nevent: change\n"
+                       f"data: {json.dumps(event)}\n\n").encode()
+        finally:
+            subscription.close()
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BoardAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'board_app'
+
+    def ready(self):
+        # connect signal receivers
+        from board_app import signals  # noqa: F401
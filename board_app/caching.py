@@ -0,0 +1,82 @@
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db import transaction
+
+from core.caching import is_shared_cache
+
+
+BOARD_VERSION_KEY = 'board:{board_id}:version'
+BOARD_DETAIL_KEY = 'board:{board_id}:detail:{version}'
+BOARD_DETAIL_CACHE_TIMEOUT = 60 * 60
+
+
+def board_cache_enabled():
+    """
+    versions, detail payloads and ETags only work in a shared cache
+    (REDIS_URL). in a process-local one a bump would reach only its own
+    worker, the others would keep serving the old detail and 304s.
+    """
+    return is_shared_cache()
+
+
+def get_board_version(board_id):
+    """
+    returns the current version token of a board.
+    a random token (instead of a counter) never repeats after a cache flush,
+    so an old ETag can not match a newer board state.
+    """
+    key = BOARD_VERSION_KEY.format(board_id=board_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, uuid4().hex, None)
+        version = cache.get(key)
+    return version
+
+
+class BoardVersionBump:
+    """
+    on_commit callback of bump_board_version.
+    """
+
+    def __init__(self, board_id):
+        self.board_id = board_id
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        cache.set(BOARD_VERSION_KEY.format(board_id=self.board_id), uuid4().hex, None)
+
+
+def bump_board_version(board_id):
+    """
+    marks every cached representation of the board as stale once the
+    running transaction commits. a bump before the commit would let a
+    concurrent read cache the old rows under the new version.
+    one bump per board and transaction: a pending bump is reused, bumps
+    of a rolled back savepoint are dropped with it.
+    """
+    if not board_cache_enabled():
+        return
+    connection = transaction.get_connection()
+    for savepoints, callback, robust in connection.run_on_commit:
+        if (isinstance(callback, BoardVersionBump) and callback.board_id == board_id
+                and not callback.done):
+            return
+    transaction.on_commit(BoardVersionBump(board_id))
+
+
+def board_etag(board_id, version):
+    return f'"board-{board_id}-{version}"'
+
+
+def get_cached_board_detail(board_id, version):
+    return cache.get(BOARD_DETAIL_KEY.format(board_id=board_id, version=version))
+
+
+def set_cached_board_detail(board_id, version, data):
+    cache.set(
+        BOARD_DETAIL_KEY.format(board_id=board_id, version=version),
+        data,
+        BOARD_DETAIL_CACHE_TIMEOUT,
+    )
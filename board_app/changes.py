@@ -0,0 +1,115 @@
+import threading
+
+from django.db import connections, router, transaction
+
+from board_app.events import publish_changes
+from board_app.models import Board, BoardChange, BoardCounter
+
+
+def lock_change_log(board_ids):
+    """
+    serializes change log writers of a board until they commit.
+    the cursor is the auto increment id, on postgresql concurrent
+    transactions would commit ids out of order and a client that read
+    since=N could skip a lower id committed later. the lock is the row
+    lock the counter updates take anyway, sqlite has one writer at a time.
+    """
+    connection = connections[router.db_for_write(BoardChange)]
+    if not connection.features.has_select_for_update or not board_ids:
+        return
+    list(BoardCounter.objects.select_for_update(no_key=True).filter(
+        board_id__in=board_ids).order_by('board_id').values_list('board_id', flat=True))
+
+
+def record_change(board_id, kind, action, object_id):
+    """
+    appends one entry to the change log of a board
+    and pushes it to subscribed clients after commit.
+    """
+    # no savepoint, a failed insert fails the surrounding transaction anyway
+    with transaction.atomic(savepoint=False):
+        lock_change_log([board_id])
+        change = BoardChange.objects.create(
+            board_id=board_id, kind=kind, action=action, object_id=object_id)
+    publish_changes([change])
+    return change
+
+
+def record_changes(entries):
+    """
+    appends many (board_id, kind, action, object_id) entries in one insert.
+    """
+    changes = [
+        BoardChange(board_id=board_id, kind=kind, action=action, object_id=object_id)
+        for board_id, kind, action, object_id in entries
+    ]
+    if not changes:
+        return changes
+    with transaction.atomic(savepoint=False):
+        lock_change_log({change.board_id for change in changes})
+        changes = BoardChange.objects.bulk_create(changes, batch_size=500)
+    publish_changes(changes)
+    return changes
+
+
+# boards inside a running cascade delete, board id -> origin of the delete.
+# keyed by origin, so an entry left by a failed delete never matches again.
+_deleting = threading.local()
+
+
+def _deleting_boards():
+    boards = getattr(_deleting, 'boards', None)
+    if boards is None:
+        boards = _deleting.boards = {}
+    return boards
+
+
+def mark_board_deletion(board_id, origin):
+    _deleting_boards()[board_id] = origin
+
+
+def unmark_board_deletion(board_id):
+    _deleting_boards().pop(board_id, None)
+
+
+def is_board_deletion(origin, board_id=None):
+    """
+    true if a cascade delete was started by deleting boards, or removes
+    the board board_id with it (e.g. deleting its owner).
+    the change log and counters of those boards are removed with them,
+    so nothing is logged or counted.
+    """
+    if isinstance(origin, Board):
+        return True
+    if getattr(origin, 'model', None) is Board:
+        return True
+    return board_id is not None and _deleting_boards().get(board_id) is origin
+
+
+def latest_cursor(board_id):
+    return BoardChange.objects.filter(board_id=board_id).order_by(
+        '-id').values_list('id', flat=True).first() or 0
+
+
+def collect_changes(board_id, since, limit=500):
+    """
+    reads up to limit log entries after the cursor and collapses them
+    to the last action per object.
+    returns (entries, cursor, has_more), entries maps (kind, object_id) to action.
+    """
+    rows = list(BoardChange.objects.filter(
+        board_id=board_id, id__gt=since
+    ).order_by('id').values_list('id', 'kind', 'action', 'object_id')[:limit + 1])
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    cursor = rows[-1][0] if rows else since
+
+    entries = {}
+    for change_id, kind, action, object_id in rows:
+        previous = entries.get((kind, object_id))
+        # created and then changed inside the window is still a create
+        if previous == 'created' and action == 'updated':
+            continue
+        entries[(kind, object_id)] = action
+    return entries, cursor, has_more
@@ -0,0 +1,173 @@
+from django.apps import apps
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from board_app.models import Board, BoardCounter
+
+
+# maps task status/priority values to their BoardCounter column
+STATUS_FIELDS = {
+    'to-do': 'to_do_count',
+    'in-progress': 'in_progress_count',
+    'review': 'review_count',
+    'done': 'done_count',
+}
+
+PRIORITY_FIELDS = {
+    'low': 'low_prio_count',
+    'medium': 'medium_prio_count',
+    'high': 'high_prio_count',
+}
+
+COUNTER_FIELDS = ['member_count', 'task_count',
+                  *STATUS_FIELDS.values(), *PRIORITY_FIELDS.values()]
+
+
+def count_per_board(queryset):
+    """
+    correlated count of queryset rows per board, 0 when there are none.
+    """
+    rows = queryset.filter(board_id=OuterRef('pk')).order_by().values(
+        'board_id').annotate(count=Count('*')).values('count')
+    return Coalesce(Subquery(rows), 0)
+
+
+def annotate_counters(queryset):
+    """
+    annotates every counter column on a board queryset in one query.
+    each counter is its own subquery, joining members and tasks would
+    count over their product.
+    used to rebuild and verify the stored counters.
+    """
+    # task_app depends on board_app, the model is looked up lazily
+    tasks = apps.get_model('task_app', 'Task').objects.all()
+    annotations = {
+        'member_count': count_per_board(Board.members.through.objects.all()),
+        'task_count': count_per_board(tasks),
+    }
+    for value, field in STATUS_FIELDS.items():
+        annotations[field] = count_per_board(tasks.filter(status=value))
+    for value, field in PRIORITY_FIELDS.items():
+        annotations[field] = count_per_board(tasks.filter(priority=value))
+    return queryset.annotate(**annotations)
+
+
+def apply_task_delta(board_id, status, priority, delta):
+    """
+    adds delta to the total, status and priority counters of a board.
+    uses F() expressions so concurrent writers do not lose updates.
+    """
+    changes = {'task_count': F('task_count') + delta}
+    if status in STATUS_FIELDS:
+        field = STATUS_FIELDS[status]
+        changes[field] = F(field) + delta
+    if priority in PRIORITY_FIELDS:
+        field = PRIORITY_FIELDS[priority]
+        changes[field] = F(field) + delta
+    # a missing row (e.g. board is being deleted) is skipped on purpose,
+    # rebuild_board_counters fills any gaps.
+    BoardCounter.objects.filter(board_id=board_id).update(**changes)
+
+
+def track_task_change(previous, current):
+    """
+    moves a task between counters.
+    previous/current are (board_id, status, priority) tuples or None.
+    """
+    if previous == current:
+        return
+    if previous is not None:
+        apply_task_delta(*previous, delta=-1)
+    if current is not None:
+        apply_task_delta(*current, delta=1)
+
+
+def apply_task_changes(changes):
+    """
+    batched track_task_change for bulk writes.
+    sums all deltas per board and issues one update per board.
+    """
+    deltas = {}
+    for previous, current in changes:
+        if previous == current:
+            continue
+        for state, delta in ((previous, -1), (current, 1)):
+            if state is None:
+                continue
+            board_id, status, priority = state
+            board_deltas = deltas.setdefault(board_id, {})
+            for field in ('task_count', STATUS_FIELDS.get(status),
+                          PRIORITY_FIELDS.get(priority)):
+                if field:
+                    board_deltas[field] = board_deltas.get(field, 0) + delta
+
+    for board_id, board_deltas in deltas.items():
+        updates = {field: F(field) + delta
+                   for field, delta in board_deltas.items() if delta}
+        if updates:
+            BoardCounter.objects.filter(board_id=board_id).update(**updates)
+
+
+def refresh_member_count(board_id):
+    """
+    recounts the members of a board from the m2m table.
+    """
+    member_count = Board.members.through.objects.filter(
+        board_id=board_id).count()
+    BoardCounter.objects.filter(board_id=board_id).update(
+        member_count=member_count)
+
+
+def compute_counters(board_ids=None):
+    """
+    returns {board_id: {field: value}} computed from the source tables.
+    """
+    queryset = Board.objects.all()
+    if board_ids is not None:
+        queryset = queryset.filter(id__in=board_ids)
+    rows = annotate_counters(queryset).values('id', *COUNTER_FIELDS)
+    return {row.pop('id'): row for row in rows}
+
+
+def rebuild_counters(board_ids=None):
+    """
+    recomputes and stores counters, creates missing rows.
+    returns the number of boards rebuilt.
+    """
+    expected = compute_counters(board_ids)
+    existing = set(BoardCounter.objects.filter(
+        board_id__in=expected.keys()).values_list('board_id', flat=True))
+
+    to_create = [BoardCounter(board_id=board_id, **values)
+                 for board_id, values in expected.items()
+                 if board_id not in existing]
+    to_update = [BoardCounter(board_id=board_id, **values)
+                 for board_id, values in expected.items()
+                 if board_id in existing]
+
+    BoardCounter.objects.bulk_create(to_create, batch_size=500)
+    BoardCounter.objects.bulk_update(
+        to_update, COUNTER_FIELDS, batch_size=500)
+    return len(expected)
+
+
+def verify_counters(board_ids=None):
+    """
+    compares stored counters with the source tables.
+    returns a list of (board_id, field, stored, expected) mismatches.
+    """
+    expected = compute_counters(board_ids)
+    stored = {
+        row.pop('board_id'): row
+        for row in BoardCounter.objects.filter(
+            board_id__in=expected.keys()).values('board_id', *COUNTER_FIELDS)
+    }
+
+    mismatches = []
+    for board_id, values in expected.items():
+        current = stored.get(board_id)
+        for field, value in values.items():
+            stored_value = current[field] if current else None
+            if stored_value != value:
+                mismatches.append((board_id, field, stored_value, value))
+    return mismatches
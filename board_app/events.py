@@ -0,0 +1,145 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+
+DEFAULT_BROKER = 'board_app.events.InProcessBroker'
+DEFAULT_TICKET_MAX_AGE = 60
+TICKET_SALT = 'board_app.events.ticket'
+
+
+class Subscription:
+    """
+    event queue of one connected client.
+    """
+
+    def __init__(self, broker, board_id, max_size=100):
+        self.broker = broker
+        self.board_id = board_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=max_size)
+
+    def deliver(self, event):
+        """
+        called from any thread, hands the event over to the client loop.
+        runs in the on_commit publish of a write, so a client whose loop
+        is already closed is dropped instead of failing that request.
+        """
+        try:
+            self.loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            self.close()
+
+    def _put(self, event):
+        if self.queue.full():
+            # slow client, drop the oldest event, it can resync via /changes/
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InProcessBroker:
+    """
+    default pub/sub backend, fans events out inside one process.
+    deployments with several worker processes need a shared broker
+    (e.g. redis pub/sub) implementing subscribe/unsubscribe/publish.
+    """
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, board_id):
+        subscription = Subscription(self, board_id)
+        with self._lock:
+            self._subscriptions[board_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.board_id)
+            if subscriptions is None:
+                return
+            subscriptions.discard(subscription)
+            if not subscriptions:
+                del self._subscriptions[subscription.board_id]
+
+    def publish(self, board_id, event):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(board_id, ()))
+        for subscription in subscriptions:
+            subscription.deliver(event)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """
+    returns the broker configured in settings.BOARD_EVENTS_BROKER.
+    """
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                path = getattr(settings, 'BOARD_EVENTS_BROKER', DEFAULT_BROKER)
+                _broker = import_string(path)()
+    return _broker
+
+
+def publish_changes(changes):
+    """
+    publishes saved BoardChange rows once the transaction is committed.
+    """
+    events = [(change.board_id, {
+        'cursor': change.id,
+        'kind': change.kind,
+        'action': change.action,
+        'id': change.object_id,
+    }) for change in changes]
+    if not events:
+        return
+
+    def publish():
+        broker = get_broker()
+        for board_id, event in events:
+            broker.publish(board_id, event)
+
+    transaction.on_commit(publish)
+
+
+def ticket_max_age():
+    return getattr(settings, 'BOARD_EVENTS_TICKET_MAX_AGE', DEFAULT_TICKET_MAX_AGE)
+
+
+def issue_ticket(board_id, user_id):
+    """
+    signed ticket for the event stream of one board. EventSource can not
+    send headers, the ticket goes into the query string instead of the
+    auth token: it expires after BOARD_EVENTS_TICKET_MAX_AGE seconds and
+    opens nothing but this stream, so a logged URL is worth little.
+    """
+    return signing.TimestampSigner(salt=TICKET_SALT).sign(f'{board_id}:{user_id}')
+
+
+def read_ticket(ticket, board_id):
+    """
+    returns the user id of a valid ticket for the board, or None.
+    """
+    try:
+        value = signing.TimestampSigner(salt=TICKET_SALT).unsign(
+            ticket, max_age=ticket_max_age())
+    except signing.BadSignature:
+        return None
+    ticket_board_id, user_id = value.split(':')
+    if int(ticket_board_id) != board_id:
+        return None
+    return int(user_id)
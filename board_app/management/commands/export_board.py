@@ -0,0 +1,40 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from board_app.models import Board
+from board_app.transfer import CHUNK_SIZE, export_board, export_snapshot
+
+
+class Command(BaseCommand):
+    """
+    writes one board with its users, tasks and comments as NDJSON
+    (board_app.transfer), rows are streamed in chunks.
+    on postgresql the export reads one consistent snapshot.
+    usage: python manage.py export_board ID [--output board.ndjson]
+    """
+    help = 'Export a board with members, tasks and comments as NDJSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('board_id', type=int)
+        parser.add_argument('--output', help='write to this file instead of stdout.')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        board = Board.objects.filter(id=options['board_id']).first()
+        if board is None:
+            raise CommandError(f'board {options["board_id"]} does not exist.')
+
+        if options['output'] is None:
+            self.write(board, sys.stdout.buffer, options['chunk_size'])
+            return
+        with open(options['output'], 'wb') as file:
+            self.write(board, file, options['chunk_size'])
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported board {board.id} to {options["output"]}.'))
+
+    def write(self, board, file, chunk_size):
+        with export_snapshot():
+            for chunk in export_board(board, chunk_size):
+                file.write(chunk)
+        file.flush()
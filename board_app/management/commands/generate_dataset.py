@@ -0,0 +1,139 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from board_app.counters import rebuild_counters
+from board_app.models import Board
+from task_app.models import Comment, Task, display_name
+from task_app.search import get_backend
+
+
+STATUS_WEIGHTS = {'to-do': 4, 'in-progress': 2, 'review': 1, 'done': 3}
+PRIORITY_WEIGHTS = {'low': 3, 'medium': 5, 'high': 2}
+FIRST_NAMES = ['Anna', 'Ben', 'Clara', 'David', 'Elif', 'Finn', 'Greta', 'Hannes', 'Ida', 'Jonas']
+LAST_NAMES = ['Becker', 'Fischer', 'Hoffmann', 'Klein', 'Meyer', 'Neumann', 'Schulz', 'Wagner']
+WORDS = ['api', 'login', 'board', 'sprint', 'layout', 'cache', 'mobile', 'export', 'search',
+         'onboarding', 'release', 'refactor', 'bug', 'docs', 'dashboard', 'billing']
+BATCH_SIZE = 1000
+# due dates are spread around a fixed day, so a seed always gives the same data
+BASE_DATE = date(2025, 6, 1)
+
+
+def skewed(rng, maximum, alpha=1.2):
+    """
+    pareto distributed count between 1 and maximum, most values are
+    small, a few are large.
+    """
+    return min(maximum, int(rng.paretovariate(alpha)))
+
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+class Command(BaseCommand):
+    """
+    fills the database with a synthetic, reproducible data set.
+    membership is skewed: a few users are on many boards, a few boards
+    have many members and tasks. users are user<n>@example.com with
+    the same password, user0 is the most active one.
+    rows are bulk created (bulk_create sets the primary keys on sqlite
+    and postgresql), counters and search index are rebuilt afterwards,
+    the change log stays empty.
+    usage: python manage.py generate_dataset --users 200 --boards 50 --seed 1
+    """
+    help = 'Generate a synthetic KanMind data set (users, boards, tasks, comments).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100)
+        parser.add_argument('--boards', type=int, default=30)
+        parser.add_argument('--max-members', type=int, default=25,
+                            help='largest board membership.')
+        parser.add_argument('--max-tasks', type=int, default=200,
+                            help='most tasks on one board.')
+        parser.add_argument('--max-comments', type=int, default=20,
+                            help='most comments on one task.')
+        parser.add_argument('--password', default='kanmind-dataset')
+        parser.add_argument('--seed', type=int, default=1)
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['boards'] < 1:
+            raise CommandError('--users and --boards must be at least 1.')
+        if User.objects.filter(email='user0@example.com').exists():
+            raise CommandError('generated users exist already, use a fresh database.')
+
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            users = self.create_users(rng, options['users'], options['password'])
+            boards = self.create_boards(rng, users, options['boards'], options['max_members'])
+            tasks = self.create_tasks(rng, boards, options['max_tasks'])
+            comments = self.create_comments(rng, boards, tasks, options['max_comments'])
+            rebuild_counters([board.id for board, members in boards])
+            task_ids = [task.id for task in tasks]
+            backend = get_backend()
+            for start in range(0, len(task_ids), BATCH_SIZE):
+                backend.index_tasks(task_ids[start:start + BATCH_SIZE])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {len(users)} users, {len(boards)} boards, '
+            f'{len(task_ids)} tasks and {comments} comments.'))
+
+    def create_users(self, rng, amount, password):
+        # one hash for everyone, hashing each password would take minutes
+        hashed = make_password(password)
+        return User.objects.bulk_create([
+            User(username=f'user{index}@example.com', email=f'user{index}@example.com',
+                 first_name=rng.choice(FIRST_NAMES), last_name=rng.choice(LAST_NAMES),
+                 password=hashed)
+            for index in range(amount)], batch_size=BATCH_SIZE)
+
+    def create_boards(self, rng, users, amount, max_members):
+        # low user numbers are picked far more often (zipf-like)
+        weights = [1 / (rank + 1) for rank in range(len(users))]
+        boards = []
+        for index in range(amount):
+            size = min(len(users), skewed(rng, max_members))
+            members = set()
+            while len(members) < size:
+                members.add(rng.choices(users, weights)[0])
+            members = sorted(members, key=lambda user: user.id)
+            boards.append((Board(title=f'{sentence(rng, 2)} {index}', owner=members[0]), members))
+        Board.objects.bulk_create([board for board, members in boards], batch_size=BATCH_SIZE)
+
+        Membership = Board.members.through
+        Membership.objects.bulk_create([
+            Membership(board_id=board.id, user_id=member.id)
+            for board, members in boards for member in members], batch_size=BATCH_SIZE)
+        return boards
+
+    def create_tasks(self, rng, boards, max_tasks):
+        tasks = []
+        for board, members in boards:
+            for _ in range(skewed(rng, max_tasks, alpha=0.8)):
+                assignee = rng.choice(members) if rng.random() < 0.8 else None
+                reviewer = rng.choice(members) if rng.random() < 0.4 else None
+                due_date = (BASE_DATE + timedelta(days=rng.randint(-30, 60))
+                            if rng.random() < 0.6 else None)
+                tasks.append(Task(
+                    board=board, creator=rng.choice(members), title=sentence(rng, 4),
+                    description=sentence(rng, rng.randint(0, 30)),
+                    status=rng.choices(*zip(*STATUS_WEIGHTS.items()))[0],
+                    priority=rng.choices(*zip(*PRIORITY_WEIGHTS.items()))[0],
+                    assignee=assignee, reviewer=reviewer, due_date=due_date))
+        return Task.objects.bulk_create(tasks, batch_size=BATCH_SIZE)
+
+    def create_comments(self, rng, boards, tasks, max_comments):
+        members = {board.id: members for board, members in boards}
+        comments = []
+        for task in tasks:
+            for _ in range(skewed(rng, max_comments, alpha=1.5) - 1):
+                author = rng.choice(members[task.board_id])
+                comments.append(Comment(
+                    task=task, author=author, author_name=display_name(author),
+                    content=sentence(rng, rng.randint(3, 20))))
+        Comment.objects.bulk_create(comments, batch_size=BATCH_SIZE)
+        return len(comments)
@@ -0,0 +1,71 @@
+import sys
+from contextlib import contextmanager
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from board_app.transfer import CHUNK_SIZE, BoardImporter, BoardImportError
+from task_app.models import Comment, Task
+
+
+@contextmanager
+def exported_timestamps(*models):
+    """
+    switches auto_now and auto_now_add off, so bulk_create stores the
+    exported timestamps instead of now. a second bulk_update of every row
+    would take longer than the inserts. the fields are shared by the whole
+    process, so this lives in the command, which runs in its own process.
+    """
+    fields = [(field, field.auto_now, field.auto_now_add)
+              for model in models for field in model._meta.concrete_fields
+              if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False)]
+    for field, auto_now, auto_now_add in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in fields:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Command(BaseCommand):
+    """
+    imports an export of export_board as a new board. users are matched
+    by email, unknown users are created without a usable password.
+    a malformed file imports nothing.
+    usage: python manage.py import_board board.ndjson [--owner EMAIL]
+    """
+    help = 'Import a board from an NDJSON export.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='export file, - reads stdin.')
+        parser.add_argument('--owner', help='email of the new owner, default is the exported owner.')
+        parser.add_argument('--batch-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        owner = None
+        if options['owner']:
+            owner = User.objects.filter(email__iexact=options['owner']).first()
+            if owner is None:
+                raise CommandError(f'no user with the email {options["owner"]}.')
+
+        importer = BoardImporter(owner=owner, batch_size=options['batch_size'])
+        try:
+            with exported_timestamps(Task, Comment):
+                if options['path'] == '-':
+                    board = importer.run(sys.stdin)
+                else:
+                    with open(options['path'], encoding='utf-8') as file:
+                        board = importer.run(file)
+        except OSError as error:
+            raise CommandError(str(error))
+        except BoardImportError as error:
+            raise CommandError(f'Nothing imported, {error}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported board {board.id} with {len(importer.tasks)} tasks and '
+            f'{importer.comments} comments, created {importer.created_users} users.'))
+        if importer.skipped_comments:
+            self.stderr.write(self.style.WARNING(
+                f'Skipped {importer.skipped_comments} comments on tasks or by users '
+                'missing from the export.'))
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from board_app.counters import rebuild_counters, verify_counters
+
+
+class Command(BaseCommand):
+    """
+    rebuilds or verifies the denormalized board counters.
+    usage: python manage.py rebuild_board_counters [--verify] [--board ID ...]
+    """
+    help = 'Rebuild (or verify) the denormalized BoardCounter rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='only compare stored counters, exit with error on mismatch.')
+        parser.add_argument(
+            '--board', type=int, action='append', dest='board_ids',
+            help='limit to the given board id (repeatable).')
+
+    def handle(self, *args, **options):
+        board_ids = options['board_ids']
+
+        if options['verify']:
+            mismatches = verify_counters(board_ids)
+            for board_id, field, stored, expected in mismatches:
+                self.stdout.write(
+                    f'board {board_id}: {field} is {stored}, expected {expected}')
+            if mismatches:
+                raise CommandError(
+                    f'{len(mismatches)} counter mismatches found.')
+            self.stdout.write(self.style.SUCCESS('All counters are correct.'))
+            return
+
+        with transaction.atomic():
+            rebuilt = rebuild_counters(board_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt counters for {rebuilt} boards.'))
@@ -0,0 +1,107 @@
+from django.core.cache import cache
+from django.db import transaction
+
+from board_app.models import Board
+from core.caching import is_shared_cache
+from core.db_routers import primary_reads
+
+
+MEMBER_IDS_CACHE_KEY = 'board:{board_id}:member_ids'
+MEMBER_IDS_CACHE_TIMEOUT = 300
+
+Membership = Board.members.through
+
+
+def _cache_key(board_id):
+    return MEMBER_IDS_CACHE_KEY.format(board_id=board_id)
+
+
+def _request_memo(request):
+    """
+    per-request memo of membership answers.
+    stored on the django HttpRequest so it is shared by permissions,
+    serializers and views of one DRF request.
+    """
+    if request is None:
+        return None
+    http_request = getattr(request, '_request', request)
+    memo = getattr(http_request, '_board_membership_memo', None)
+    if memo is None:
+        memo = {}
+        http_request._board_membership_memo = memo
+    return memo
+
+
+def member_cache_enabled():
+    """
+    member id sets are only cached in a shared cache (REDIS_URL),
+    in a process-local one a removed member would keep access in the
+    other workers until the timeout.
+    """
+    return is_shared_cache()
+
+
+def get_member_ids(board_id, request=None):
+    """
+    returns the member ids of a board as a set.
+    kept in the request memo and, with a shared cache, cached until
+    the members of the board change.
+    """
+    memo = _request_memo(request)
+    memo_key = ('member_ids', board_id)
+    if memo is not None and memo_key in memo:
+        return memo[memo_key]
+
+    enabled = member_cache_enabled()
+    member_ids = cache.get(_cache_key(board_id)) if enabled else None
+    if member_ids is None:
+        # the shared cache is filled from the primary, never from a replica
+        with primary_reads():
+            member_ids = set(Membership.objects.filter(
+                board_id=board_id).values_list('user_id', flat=True))
+        if enabled:
+            cache.set(_cache_key(board_id), member_ids, MEMBER_IDS_CACHE_TIMEOUT)
+
+    if memo is not None:
+        memo[memo_key] = member_ids
+    return member_ids
+
+
+def invalidate_member_ids(board_id):
+    """
+    drops the cached ids now and again after commit, a check running
+    before the commit may have cached the old members meanwhile.
+    """
+    if member_cache_enabled():
+        key = _cache_key(board_id)
+        cache.delete(key)
+        transaction.on_commit(lambda: cache.delete(key))
+
+
+def is_board_member(board, user, request=None):
+    """
+    checks if user is owner or member of board.
+    answers from the request memo, then the member id set
+    (get_member_ids) if it is cached or already loaded for the request,
+    and only then with an indexed exists() query on the m2m table.
+    """
+    if user is None or not user.is_authenticated:
+        return False
+    if board.owner_id == user.id:
+        return True
+
+    memo = _request_memo(request)
+    memo_key = (board.id, user.id)
+    if memo is not None and memo_key in memo:
+        return memo[memo_key]
+
+    if (member_cache_enabled()
+            or (memo is not None and ('member_ids', board.id) in memo)):
+        result = user.id in get_member_ids(board.id, request)
+    else:
+        result = Membership.objects.filter(
+            board_id=board.id, user_id=user.id).exists()
+
+    if memo is not None:
+        memo[memo_key] = result
+    return result
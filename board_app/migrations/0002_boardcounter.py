@@ -0,0 +1,77 @@
+# Generated by Django 5.2.8 on 2026-10-18 18:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+
+STATUS_FIELDS = {
+    'to-do': 'to_do_count',
+    'in-progress': 'in_progress_count',
+    'review': 'review_count',
+    'done': 'done_count',
+}
+
+PRIORITY_FIELDS = {
+    'low': 'low_prio_count',
+    'medium': 'medium_prio_count',
+    'high': 'high_prio_count',
+}
+
+
+def backfill_counters(apps, schema_editor):
+    """
+    fills counters for existing boards.
+    members and tasks are counted in separate grouped queries,
+    one query joining both would count over their product.
+    """
+    Board = apps.get_model('board_app', 'Board')
+    BoardCounter = apps.get_model('board_app', 'BoardCounter')
+    Task = apps.get_model('task_app', 'Task')
+
+    counters = {board_id: {} for board_id in Board.objects.values_list('id', flat=True)}
+    members = Board.members.through.objects.values('board_id').annotate(
+        count=Count('*')).order_by()
+    for row in members:
+        counters[row['board_id']]['member_count'] = row['count']
+    for column, fields in (('status', STATUS_FIELDS), ('priority', PRIORITY_FIELDS)):
+        rows = Task.objects.values('board_id', column).annotate(
+            count=Count('*')).order_by()
+        for row in rows:
+            counter = counters[row['board_id']]
+            if column == 'status':
+                counter['task_count'] = counter.get('task_count', 0) + row['count']
+            if row[column] in fields:
+                counter[fields[row[column]]] = row['count']
+
+    BoardCounter.objects.bulk_create(
+        [BoardCounter(board_id=board_id, **counter) for board_id, counter in counters.items()],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('board_app', '0001_initial'),
+        ('task_app', '0003_comment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BoardCounter',
+            fields=[
+                ('board', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counter', serialize=False, to='board_app.board')),
+                ('member_count', models.IntegerField(default=0)),
+                ('task_count', models.IntegerField(default=0)),
+                ('to_do_count', models.IntegerField(default=0)),
+                ('in_progress_count', models.IntegerField(default=0)),
+                ('review_count', models.IntegerField(default=0)),
+                ('done_count', models.IntegerField(default=0)),
+                ('low_prio_count', models.IntegerField(default=0)),
+                ('medium_prio_count', models.IntegerField(default=0)),
+                ('high_prio_count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
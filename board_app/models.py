@@ -14,3 +14,62 @@ class Board(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class BoardCounter(models.Model):
+    """
+    denormalized dashboard counters for a board.
+    kept up to date on task and member changes (see board_app.counters).
+    """
+    board = models.OneToOneField(
+        Board, on_delete=models.CASCADE, primary_key=True, related_name='counter')
+
+    member_count = models.IntegerField(default=0)
+    task_count = models.IntegerField(default=0)
+
+    to_do_count = models.IntegerField(default=0)
+    in_progress_count = models.IntegerField(default=0)
+    review_count = models.IntegerField(default=0)
+    done_count = models.IntegerField(default=0)
+
+    low_prio_count = models.IntegerField(default=0)
+    medium_prio_count = models.IntegerField(default=0)
+    high_prio_count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f'Counters for {self.board}'
+
+
+class BoardChange(models.Model):
+    """
+    change log entry of a board, used for incremental sync.
+    the auto increment id is the sync cursor, writers of one board
+    commit their ids in order (board_app.changes.lock_change_log).
+    """
+    KIND_CHOICES = [
+        ('board', 'Board'),
+        ('task', 'Task'),
+        ('comment', 'Comment'),
+        ('member', 'Member'),
+    ]
+
+    ACTION_CHOICES = [
+        ('created', 'Created'),
+        ('updated', 'Updated'),
+        ('deleted', 'Deleted'),
+    ]
+
+    board = models.ForeignKey(
+        Board, on_delete=models.CASCADE, related_name='changes')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    object_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['board', 'id'], name='boardchange_board_id_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id} {self.action} on {self.board_id}'
@@ -0,0 +1,124 @@
+from django.contrib.auth.models import User
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from board_app.models import Board, BoardCounter
+from board_app.caching import bump_board_version
+from board_app.changes import (
+    mark_board_deletion, record_change, record_changes, unmark_board_deletion)
+from board_app.counters import refresh_member_count
+from board_app.membership import invalidate_member_ids
+
+
+@receiver(post_save, sender=Board)
+def create_board_counter(sender, instance, created, **kwargs):
+    """
+    every new board starts with an empty counter row.
+    """
+    if created:
+        BoardCounter.objects.get_or_create(board_id=instance.pk)
+    else:
+        bump_board_version(instance.pk)
+        record_change(instance.pk, 'board', 'updated', instance.pk)
+
+
+@receiver(pre_delete, sender=Board)
+def mark_deleted_board(sender, instance, origin=None, **kwargs):
+    """
+    tasks and comments deleted with the board skip their counter,
+    cache and change log work (see is_board_deletion).
+    """
+    mark_board_deletion(instance.pk, origin)
+
+
+@receiver(post_delete, sender=Board)
+def drop_board_caches(sender, instance, **kwargs):
+    unmark_board_deletion(instance.pk)
+    invalidate_member_ids(instance.pk)
+    bump_board_version(instance.pk)
+
+
+@receiver(m2m_changed, sender=Board.members.through)
+def update_member_count(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    keeps member_count and the cached member ids in sync
+    with board.members changes.
+    """
+    if action == 'pre_clear':
+        # remember the rows before they are gone
+        if reverse:
+            instance._cleared_board_ids = list(
+                instance.member_boards.values_list('id', flat=True))
+        else:
+            instance._cleared_member_ids = list(
+                instance.members.values_list('id', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        board_ids = [instance.pk]
+    elif action == 'post_clear':
+        board_ids = getattr(instance, '_cleared_board_ids', [])
+    else:
+        board_ids = pk_set
+
+    for board_id in board_ids:
+        refresh_member_count(board_id)
+        invalidate_member_ids(board_id)
+        bump_board_version(board_id)
+
+    log_member_changes(instance, action, reverse, pk_set)
+
+
+def log_member_changes(instance, action, reverse, pk_set):
+    """
+    writes membership entries to the board change log.
+    """
+    change = 'created' if action == 'post_add' else 'deleted'
+    if not reverse:
+        if action == 'post_clear':
+            pk_set = getattr(instance, '_cleared_member_ids', [])
+        entries = [(instance.pk, 'member', change, user_id)
+                   for user_id in pk_set]
+    else:
+        if action == 'post_clear':
+            pk_set = getattr(instance, '_cleared_board_ids', [])
+        entries = [(board_id, 'member', change, instance.pk)
+                   for board_id in pk_set]
+    record_changes(entries)
+
+
+@receiver(post_save, sender=User)
+def bump_boards_of_user(sender, instance, created, update_fields, **kwargs):
+    """
+    names and emails of members are part of the board detail payload.
+    """
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    board_ids = Board.objects.filter(
+        Q(owner=instance) | Q(members=instance)
+    ).values_list('id', flat=True).distinct()
+    for board_id in board_ids:
+        bump_board_version(board_id)
+
+
+@receiver(pre_delete, sender=User)
+def remember_member_boards(sender, instance, **kwargs):
+    """
+    the membership rows of a deleted user cascade without m2m_changed,
+    boards the user owns are deleted with the user.
+    """
+    instance._member_board_ids = list(
+        instance.member_boards.exclude(owner=instance).values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=User)
+def update_member_count_on_user_delete(sender, instance, **kwargs):
+    board_ids = getattr(instance, '_member_board_ids', [])
+    for board_id in board_ids:
+        refresh_member_count(board_id)
+        invalidate_member_ids(board_id)
+        bump_board_version(board_id)
+    record_changes([(board_id, 'member', 'deleted', instance.pk) for board_id in board_ids])
@@ -1,3 +1,715 @@
-from django.test import TestCase
+import asyncio
+import io
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from auth_app.models import AuthToken
+from board_app.caching import get_board_version
+from board_app.changes import record_changes
+from board_app.counters import compute_counters, verify_counters
+from board_app.events import InProcessBroker, get_broker, issue_ticket, read_ticket
+from board_app.management.commands.import_board import exported_timestamps
+from board_app.membership import is_board_member, member_cache_enabled
+from board_app.models import Board, BoardCounter
+from board_app.transfer import BoardImporter, BoardImportError, export_board
+from core.renderers import FastJSONRenderer
+from core.testing import SHARED_CACHES, Budget, QueryBudgetTestCase
+from task_app.models import Task, Comment
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BoardDetailQueryCountTests(APITestCase):
+    """
+    board details must not issue one comment count query per task.
+    """
+
+    def setUp(self):
+        cache.clear()
+        # version bumps run on commit, the test transaction never commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(
+                username='user@example.com', email='user@example.com', password='pw')
+            self.board = Board.objects.create(title='Board', owner=self.user)
+            self.board.members.add(self.user)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('board-detail', args=[self.board.id])
+
+    def create_tasks(self, amount):
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(amount):
+                task = Task.objects.create(
+                    board=self.board, creator=self.user, title=f'Task {index}',
+                    status='to-do', priority='low', assignee=self.user)
+                Comment.objects.create(task=task, author=self.user, content='hi')
+
+    def test_detail_query_count_is_constant(self):
+        self.create_tasks(1)
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+        self.create_tasks(20)
+        with self.assertNumQueries(4):
+            response = self.client.get(self.url)
+        self.assertEqual(len(response.data['tasks']), 21)
+        self.assertEqual(response.data['tasks'][0]['comments_count'], 1)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, CACHES=SHARED_CACHES)
+class BoardDetailCacheTests(APITestCase):
+    """
+    board details are cached per board version and support ETags,
+    only with a shared cache.
+    """
+
+    def setUp(self):
+        cache.clear()
+        # version bumps run on commit, the test transaction never commits
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user = User.objects.create_user(
+                username='user@example.com', email='user@example.com', password='pw')
+            self.board = Board.objects.create(title='Board', owner=self.user)
+            self.board.members.add(self.user)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('board-detail', args=[self.board.id])
+
+    def test_process_local_cache_is_not_used(self):
+        with override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            response = self.client.get(self.url)
+            self.assertNotIn('ETag', response)
+            self.board.title = 'Renamed'
+            self.board.save()
+            self.assertEqual(self.client.get(self.url).data['title'], 'Renamed')
+
+    def test_unchanged_board_returns_304(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    @override_settings(COMPRESSION={'MIN_SIZE': 200})
+    def test_compressed_response_etag_matches(self):
+        for index in range(5):
+            Task.objects.create(
+                board=self.board, creator=self.user, title=f'Task {index}',
+                status='to-do', priority='low')
+        response = self.client.get(self.url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response['ETag'].startswith('W/'))
+        response = self.client.get(
+            self.url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_task_and_comment_changes_invalidate(self):
+        etag = self.client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            task = Task.objects.create(
+                board=self.board, creator=self.user, title='Task',
+                status='to-do', priority='low')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['tasks']), 1)
+
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Comment.objects.create(task=task, author=self.user, content='hi')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.data['tasks'][0]['comments_count'], 1)
+
+    def test_member_change_invalidates(self):
+        etag = self.client.get(self.url)['ETag']
+        other = User.objects.create_user(
+            username='other@example.com', email='other@example.com', password='pw')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.board.members.add(other)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['members']), 2)
+
+    def test_version_changes_once_after_commit(self):
+        version = get_board_version(self.board.id)
+        with self.captureOnCommitCallbacks() as callbacks:
+            for index in range(3):
+                Task.objects.create(board=self.board, creator=self.user,
+                                    title=f'Task {index}', status='to-do', priority='low')
+            self.board.title = 'Renamed'
+            self.board.save()
+            # a read before the commit still sees and caches the old version
+            self.assertEqual(get_board_version(self.board.id), version)
+        bumps = [callback for callback in callbacks
+                 if getattr(callback, 'board_id', None) == self.board.id]
+        self.assertEqual(len(bumps), 1)
+        bumps[0]()
+        self.assertNotEqual(get_board_version(self.board.id), version)
+
+
+class AnnotateCountersTests(APITestCase):
+    """
+    counters computed from the source tables, used by rebuild and verify.
+    """
+
+    def test_counts_with_several_members_and_tasks(self):
+        owner = User.objects.create_user(username='o@example.com', email='o@example.com')
+        other = User.objects.create_user(username='m@example.com', email='m@example.com')
+        board = Board.objects.create(title='Board', owner=owner)
+        board.members.add(owner, other)
+        empty = Board.objects.create(title='Empty', owner=owner)
+        for status, priority in (('to-do', 'high'), ('to-do', 'low'), ('done', 'high')):
+            Task.objects.create(board=board, creator=owner, title='Task',
+                                status=status, priority=priority)
+
+        with self.assertNumQueries(1):
+            counters = compute_counters([board.id, empty.id])
+        self.assertEqual(counters[board.id]['member_count'], 2)
+        self.assertEqual(counters[board.id]['task_count'], 3)
+        self.assertEqual(counters[board.id]['to_do_count'], 2)
+        self.assertEqual(counters[board.id]['done_count'], 1)
+        self.assertEqual(counters[board.id]['high_prio_count'], 2)
+        self.assertEqual(counters[board.id]['medium_prio_count'], 0)
+        self.assertEqual(set(counters[empty.id].values()), {0})
+
+
+class BoardCounterTests(APITestCase):
+    """
+    stored counters follow task and member changes.
+    """
+
+    def setUp(self):
+        self.owner = User.objects.create_user(username='o@example.com', email='o@example.com')
+        self.member = User.objects.create_user(username='m@example.com', email='m@example.com')
+        self.board = Board.objects.create(title='Board', owner=self.owner)
+        self.board.members.add(self.owner, self.member)
+
+    def counter(self, board=None):
+        return BoardCounter.objects.get(board=board or self.board)
+
+    def create_task(self, board=None, creator=None, **fields):
+        fields = {'status': 'to-do', 'priority': 'low', **fields}
+        return Task.objects.create(board=board or self.board, creator=creator or self.owner,
+                                   title='Task', **fields)
+
+    def test_task_changes_move_counters(self):
+        task = self.create_task()
+        self.create_task(status='done', priority='high')
+        task = Task.objects.get(pk=task.pk)
+        task.status, task.priority = 'review', 'high'
+        task.save()
+        counter = self.counter()
+        self.assertEqual((counter.task_count, counter.to_do_count, counter.review_count,
+                          counter.done_count, counter.high_prio_count), (2, 0, 1, 1, 2))
+
+        task.delete()
+        counter = self.counter()
+        self.assertEqual((counter.task_count, counter.review_count), (1, 0))
+        self.assertEqual(verify_counters([self.board.id]), [])
+
+    def test_concurrent_updates_of_a_loaded_task(self):
+        pk = self.create_task().pk
+        first, second = Task.objects.get(pk=pk), Task.objects.get(pk=pk)
+        first.status = 'done'
+        first.save()
+        # loaded before the first update, still says to-do
+        second.status = 'review'
+        with CaptureQueriesContext(connection) as queries:
+            second.save()
+        self.assertTrue([query for query in queries
+                         if query['sql'].startswith('SELECT') and 'task_app_task' in query['sql']])
+        counter = self.counter()
+        self.assertEqual((counter.to_do_count, counter.done_count, counter.review_count), (0, 0, 1))
+        self.assertEqual(compute_counters([self.board.id])[self.board.id]['done_count'], 0)
+
+    def test_member_changes_and_user_deletion(self):
+        self.assertEqual(self.counter().member_count, 2)
+        other = Board.objects.create(title='Other', owner=self.member)
+        other.members.add(self.member, self.owner)
+        self.create_task(board=other, creator=self.owner)
+        self.create_task(creator=self.member)
+
+        self.member.delete()
+        self.assertFalse(Board.objects.filter(pk=other.pk).exists())
+        counter = self.counter()
+        self.assertEqual((counter.member_count, counter.task_count), (1, 0))
+        self.assertEqual(verify_counters([self.board.id]), [])
+
+    def test_board_deletion_does_not_touch_counters_per_task(self):
+        def delete_queries(tasks):
+            board = Board.objects.create(title='Doomed', owner=self.owner)
+            for _ in range(tasks):
+                self.create_task(board=board)
+            with CaptureQueriesContext(connection) as queries:
+                board.delete()
+            return len(queries)
+
+        self.assertEqual(delete_queries(2), delete_queries(10))
+
+    def test_rebuild_command_repairs_counters(self):
+        self.create_task()
+        BoardCounter.objects.filter(board=self.board).update(task_count=7, member_count=0)
+        with self.assertRaises(CommandError):
+            call_command('rebuild_board_counters', '--verify', stdout=io.StringIO())
+
+        call_command('rebuild_board_counters', board=[self.board.id], stdout=io.StringIO())
+        counter = self.counter()
+        self.assertEqual((counter.task_count, counter.member_count), (1, 2))
+        call_command('rebuild_board_counters', '--verify', stdout=io.StringIO())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BoardTasksPaginationTests(APITestCase):
+    """
+    cursor pages and streams of the board tasks.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='u@example.com', email='u@example.com')
+        self.board = Board.objects.create(title='Board', owner=self.user)
+        self.board.members.add(self.user)
+        for index in range(7):
+            Task.objects.create(board=self.board, creator=self.user, title=f'Task {index}',
+                                status='to-do', priority='low')
+        # ties on created_at are paged by id
+        Task.objects.filter(title__in=['Task 2', 'Task 3', 'Task 4']).update(
+            created_at=datetime(2025, 1, 1, tzinfo=timezone.utc))
+        self.ids = list(Task.objects.order_by('created_at', 'id').values_list('id', flat=True))
+        self.client.force_authenticate(self.user)
+        self.url = reverse('board-tasks', args=[self.board.id])
+
+    def test_pages_forward_and_back_without_offset(self):
+        pages, url = [], f'{self.url}?page_size=2'
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertFalse([query for query in queries if 'OFFSET' in query['sql']])
+            pages.append([task['id'] for task in response.data['results']])
+            url = response.data['next']
+        self.assertEqual(sum(pages, []), self.ids)
+        self.assertEqual(len(pages), 4)
+
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual([task['id'] for task in previous.data['results']], pages[-2])
+        previous = self.client.get(previous.data['previous'])
+        self.assertEqual([task['id'] for task in previous.data['results']], pages[-3])
+        following = self.client.get(previous.data['next'])
+        self.assertEqual([task['id'] for task in following.data['results']], pages[-2])
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f'{self.url}?cursor=cD1nYXJiYWdl')
+        self.assertEqual(response.status_code, 404)
+
+    def test_stream(self):
+        response = self.client.get(f'{self.url}?stream=1&status=to-do')
+        self.assertTrue(response.streaming)
+        tasks = json.loads(b''.join(response.streaming_content))
+        self.assertEqual([task['id'] for task in tasks], self.ids)
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    async def test_stream_under_asgi(self):
+        token = await AuthToken.objects.acreate(user=self.user, device='tests')
+        with mock.patch('task_app.api.pagination.FastJSONRenderer.render',
+                        autospec=True, side_effect=FastJSONRenderer.render) as render:
+            response = await AsyncClient().get(
+                f'{self.url}?stream=1', headers={'Authorization': f'Token {token.key}'})
+            # the ASGI handler sends the body through aiter(response)
+            body = aiter(response)
+            self.assertEqual(await anext(body), b'[')
+            self.assertEqual(render.call_count, 0)
+            rest = b''.join([part async for part in body])
+        self.assertEqual([task['id'] for task in json.loads(b'[' + rest)], self.ids)
+        self.assertEqual(render.call_count, 1)
+
+    def test_ordering_is_rejected_with_cursor_pages(self):
+        response = self.client.get(self.url, {'page_size': 2, 'ordering': '-due_date'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ordering', response.data)
+        response = self.client.get(self.url, {'stream': 1, 'ordering': '-due_date'})
+        self.assertEqual(response.status_code, 200)
+
+
+class BoardMembershipTests(APITestCase):
+    """
+    membership checks, cached member ids only with a shared cache.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.owner = User.objects.create_user(username='o@example.com', email='o@example.com')
+        self.member = User.objects.create_user(username='m@example.com', email='m@example.com')
+        self.board = Board.objects.create(title='Board', owner=self.owner)
+        self.board.members.add(self.owner, self.member)
+
+    def is_member(self, user):
+        # a fresh board, the owner may have changed
+        return is_board_member(Board.objects.get(pk=self.board.pk), user)
+
+    def test_process_local_cache_is_not_used(self):
+        self.assertFalse(member_cache_enabled())
+        self.assertTrue(self.is_member(self.member))
+        self.assertIsNone(cache.get(f'board:{self.board.id}:member_ids'))
+
+    def test_shared_cache_follows_member_changes(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': directory}}):
+            self.assertTrue(member_cache_enabled())
+            self.assertTrue(self.is_member(self.member))
+            self.assertEqual(cache.get(f'board:{self.board.id}:member_ids'),
+                             {self.owner.id, self.member.id})
+            with self.assertNumQueries(1):
+                self.assertTrue(self.is_member(self.member))
+
+            self.board.members.remove(self.member)
+            self.assertFalse(self.is_member(self.member))
+            self.board.members.add(self.member)
+            self.assertTrue(self.is_member(self.member))
+            self.board.members.clear()
+            self.assertFalse(self.is_member(self.member))
+
+            self.board.owner = self.member
+            self.board.save()
+            self.assertTrue(self.is_member(self.member))
+            self.assertFalse(self.is_member(self.owner))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BoardChangesTests(APITestCase):
+    """
+    incremental sync through /api/boards/{id}/changes/.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='u@example.com', email='u@example.com')
+        self.board = Board.objects.create(title='Board', owner=self.user)
+        self.board.members.add(self.user)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('board-changes', args=[self.board.id])
+
+    def changes(self, since=None, status=200):
+        params = {} if since is None else {'since': since}
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, status, response.data)
+        return response.data
+
+    def test_changes_since_cursor(self):
+        start = self.changes()['cursor']
+        task = Task.objects.create(board=self.board, creator=self.user, title='Task',
+                                   status='to-do', priority='low')
+        comment = Comment.objects.create(task=task, author=self.user, content='hi')
+        data = self.changes(start)
+        self.assertEqual([item['id'] for item in data['tasks']], [task.id])
+        self.assertEqual([item['id'] for item in data['comments']], [comment.id])
+        self.assertEqual([item['task'] for item in data['comments']], [task.id])
+        self.assertFalse(data['has_more'])
+
+        cursor = data['cursor']
+        self.assertEqual(self.changes(cursor)['tasks'], [])
+        self.board.title = 'Renamed'
+        self.board.save()
+        data = self.changes(cursor)
+        self.assertEqual(data['board'], {'id': self.board.id, 'title': 'Renamed'})
+
+    def test_deletions(self):
+        task = Task.objects.create(board=self.board, creator=self.user, title='Task',
+                                   status='to-do', priority='low')
+        other = Task.objects.create(board=self.board, creator=self.user, title='Other',
+                                    status='to-do', priority='low')
+        Comment.objects.create(task=task, author=self.user, content='gone with the task')
+        comment = Comment.objects.create(task=other, author=self.user, content='hi')
+        cursor = self.changes()['cursor']
+        task_id, comment_id = task.id, comment.id
+        task.delete()
+        comment.delete()
+        self.board.members.remove(self.user)
+
+        data = self.changes(cursor)
+        self.assertEqual(data['deleted'], {
+            'tasks': [task_id], 'comments': [comment_id], 'members': [self.user.id]})
+        self.assertEqual(data['tasks'], [])
+
+    def test_pages_through_a_long_log(self):
+        task = Task.objects.create(board=self.board, creator=self.user, title='Task',
+                                   status='to-do', priority='low')
+        record_changes([(self.board.id, 'task', 'updated', task.id)] * 600)
+        first = self.changes(0)
+        self.assertTrue(first['has_more'])
+        self.assertEqual([item['id'] for item in first['tasks']], [task.id])
+        second = self.changes(first['cursor'])
+        self.assertFalse(second['has_more'])
+        self.assertEqual(second['cursor'], self.changes()['cursor'])
+
+    def test_invalid_and_unknown_cursors(self):
+        self.changes('abc', status=400)
+        latest = self.changes()['cursor']
+        data = self.changes(latest + 100, status=410)
+        self.assertEqual(data['cursor'], latest)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BoardEventsTests(APITestCase):
+    """
+    server-sent events of /api/boards/{id}/events/.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='u@example.com', email='u@example.com')
+        self.outsider = User.objects.create_user(username='x@example.com', email='x@example.com')
+        self.board = Board.objects.create(title='Board', owner=self.user)
+        self.token = AuthToken.objects.create(user=self.user, device='tests')
+        self.url = reverse('board-events', args=[self.board.id])
+
+    async def test_authentication_and_membership(self):
+        client = AsyncClient()
+        response = await client.get(self.url)
+        self.assertEqual(response.status_code, 401)
+        response = await client.get(self.url, {'ticket': 'wrong'})
+        self.assertEqual(response.status_code, 401)
+        # long-lived tokens are not accepted in the query string
+        response = await client.get(self.url, {'token': self.token.key})
+        self.assertEqual(response.status_code, 401)
+
+        outsider_token = await AuthToken.objects.acreate(user=self.outsider, device='tests')
+        response = await client.get(
+            self.url, headers={'Authorization': f'Token {outsider_token.key}'})
+        self.assertEqual(response.status_code, 403)
+        response = await client.get(
+            reverse('board-events', args=[0]),
+            headers={'Authorization': f'Token {self.token.key}'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_tickets(self):
+        ticket_url = reverse('board-events-ticket', args=[self.board.id])
+        self.client.force_authenticate(self.outsider)
+        self.assertEqual(self.client.post(ticket_url).status_code, 403)
+        self.client.force_authenticate(self.user)
+        response = self.client.post(ticket_url)
+        self.assertEqual(response.status_code, 200)
+        ticket = response.data['ticket']
+        self.assertNotIn(self.token.key, ticket)
+
+        self.assertEqual(read_ticket(ticket, self.board.id), self.user.id)
+        other = Board.objects.create(title='Other', owner=self.user)
+        self.assertIsNone(read_ticket(ticket, other.id))
+        self.assertIsNone(read_ticket(ticket[:-1], self.board.id))
+        with override_settings(BOARD_EVENTS_TICKET_MAX_AGE=-1):
+            self.assertIsNone(read_ticket(ticket, self.board.id))
+
+    async def test_connect_with_ticket(self):
+        ticket = issue_ticket(self.board.id, self.user.id)
+        response = await AsyncClient().get(self.url, {'ticket': ticket})
+        self.assertEqual(response.status_code, 200)
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b': connected\n\n')
+        await stream.aclose()
+
+        self.user.is_active = False
+        await self.user.asave(update_fields=['is_active'])
+        response = await AsyncClient().get(self.url, {'ticket': ticket})
+        self.assertEqual(response.status_code, 401)
+
+    async def test_events_are_delivered(self):
+        response = await AsyncClient().get(
+            self.url, headers={'Authorization': f'Token {self.token.key}'})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertEqual(await anext(stream), b': connected\n\n')
+
+        get_broker().publish(self.board.id, {'cursor': 7, 'kind': 'task',
+                                             'action': 'created', 'id': 3})
+        event = await asyncio.wait_for(anext(stream), 5)
+        self.assertTrue(event.startswith(b'id: 7\nevent: change\ndata: '))
+        self.assertEqual(json.loads(event.split(b'data: ')[1])['id'], 3)
+        await stream.aclose()
+
+    def test_closed_client_loop_is_dropped(self):
+        broker = InProcessBroker()
+        loop = asyncio.new_event_loop()
+
+        async def subscribe():
+            return broker.subscribe(self.board.id)
+
+        loop.run_until_complete(subscribe())
+        loop.close()
+        broker.publish(self.board.id, {'cursor': 1})
+        self.assertEqual(broker._subscriptions, {})
+
+
+def spare_board(case):
+    board = Board.objects.create(title=f'Spare {case.spare()}', owner=case.user)
+    board.members.add(case.user)
+    return [board.id]
+
+
+class BoardQueryBudgetTests(QueryBudgetTestCase):
+    budgets = [
+        Budget('board-list', 2),
+        Budget('board-list', 19, 'post', status=201, data=lambda case: {
+            'title': 'New board', 'members': [case.user.id]}),
+        Budget('board-detail', 5, args=lambda case: [case.board.id]),
+        Budget('board-detail', 8, 'patch', args=lambda case: [case.board.id],
+               data=lambda case: {'title': f'Board {case.spare()}'}),
+        Budget('board-detail', 9, 'delete', status=204, args=spare_board),
+        Budget('board-tasks', 3, args=lambda case: [case.board.id]),
+        Budget('board-tasks', 3, args=lambda case: [case.board.id], params='page_size=20'),
+        Budget('board-tasks', 3, args=lambda case: [case.board.id], params='stream=1'),
+        Budget('board-changes', 6, args=lambda case: [case.board.id], params='since=0'),
+        Budget('board-events', 2, args=lambda case: [case.board.id]),
+        Budget('board-events-ticket', 2, 'post', args=lambda case: [case.board.id]),
+        Budget('board-export', 7, args=lambda case: [case.board.id]),
+    ]
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class BoardTransferTests(APITestCase):
+    """
+    ndjson export and import of a board, ids are remapped on import.
+    """
+
+    def setUp(self):
+        self.owner = User.objects.create_user(
+            username='owner@example.com', email='owner@example.com', password='pw')
+        self.member = User.objects.create_user(
+            username='member@example.com', email='member@example.com', password='pw',
+            first_name='Mia', last_name='Member')
+        self.board = Board.objects.create(title='Roadmap', owner=self.owner)
+        self.board.members.add(self.owner, self.member)
+        self.created = datetime(2024, 3, 1, 12, tzinfo=timezone.utc)
+        for index in range(5):
+            task = Task.objects.create(
+                board=self.board, creator=self.owner, title=f'Task {index}',
+                status=('to-do', 'done')[index % 2], priority='high',
+                assignee=self.member, due_date='2025-06-01')
+            Comment.objects.create(task=task, author=self.member, content=f'Comment {index}')
+        Task.objects.update(created_at=self.created)
+        self.client.force_authenticate(self.owner)
+        self.url = reverse('board-export', args=[self.board.id])
+
+    def export(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        return b''.join(response.streaming_content).decode().splitlines()
+
+    def test_export_lists_users_before_tasks_and_comments(self):
+        lines = [json.loads(line) for line in self.export()]
+        self.assertEqual(lines[0]['type'], 'board')
+        self.assertEqual(lines[0]['owner'], self.owner.id)
+        self.assertEqual([line['type'] for line in lines[1:]],
+                         ['user'] * 2 + ['task'] * 5 + ['comment'] * 5)
+        self.assertTrue(all(line['member'] for line in lines[1:3]))
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    async def test_export_streams_under_asgi(self):
+        token = await AuthToken.objects.acreate(user=self.owner, device='tests')
+        produced = []
+
+        def recording_export(board):
+            for chunk in export_board(board, chunk_size=2):
+                produced.append(chunk)
+                yield chunk
+
+        with mock.patch('board_app.api.views.export_board', recording_export):
+            response = await AsyncClient().get(
+                self.url, headers={'Authorization': f'Token {token.key}'})
+            self.assertEqual(response.status_code, 200)
+            # the ASGI handler sends the body through aiter(response)
+            body = aiter(response)
+            first = await anext(body)
+            self.assertEqual(json.loads(first)['type'], 'board')
+            self.assertEqual(len(produced), 1)
+            rest = [part async for part in body]
+        self.assertEqual(b''.join([first, *rest]), b''.join(produced))
+        self.assertGreater(len(produced), 2)
+
+    def test_export_is_owner_only(self):
+        self.client.force_authenticate(self.member)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_import_remaps_ids_and_keeps_timestamps(self):
+        lines = self.export()
+        new_owner = User.objects.create_user(
+            username='new@example.com', email='new@example.com', password='pw')
+        # the member exists with another email case, a third user is new
+        self.member.email = 'Member@Example.com'
+        self.member.save()
+        Task.objects.filter(board=self.board).delete()
+        User.objects.filter(id=self.owner.id).update(email='gone@example.com')
+
+        with exported_timestamps(Task, Comment):
+            board = BoardImporter(owner=new_owner, batch_size=2).run(lines)
+
+        self.assertEqual(board.owner, new_owner)
+        self.assertEqual(board.title, 'Roadmap')
+        self.assertEqual(
+            set(board.members.values_list('email', flat=True)),
+            {'new@example.com', 'Member@Example.com', 'owner@example.com'})
+        created = User.objects.get(email='owner@example.com')
+        self.assertFalse(created.has_usable_password())
+        self.assertEqual(board.tasks.count(), 5)
+        self.assertEqual(set(board.tasks.values_list('created_at', flat=True)), {self.created})
+        self.assertEqual(set(board.tasks.values_list('creator', flat=True)), {created.id})
+        self.assertEqual(set(board.tasks.values_list('assignee', flat=True)), {self.member.id})
+        comment = Comment.objects.filter(task__board=board).first()
+        self.assertEqual(comment.author_name, 'Mia Member')
+        self.assertEqual(board.counter.task_count, 5)
+
+    def test_import_drops_dangling_references(self):
+        lines = self.export()
+        extra = User.objects.create_user(
+            username='late@example.com', email='late@example.com', password='pw')
+        # rows written after the users and tasks of a live export were read
+        task = json.loads(lines[3])
+        task.update(id=999, creator=extra.id, assignee=extra.id, reviewer=extra.id)
+        comments = [
+            {**json.loads(lines[-1]), 'id': 998, 'task': 12345},
+            {**json.loads(lines[-1]), 'id': 999, 'author': extra.id},
+        ]
+        lines = lines[:8] + [json.dumps(task)] + lines[8:] + [json.dumps(row) for row in comments]
+
+        importer = BoardImporter(batch_size=2)
+        board = importer.run(lines)
+        dangling = board.tasks.get(title=task['title'], assignee=None)
+        self.assertEqual((dangling.creator, dangling.reviewer), (board.owner, None))
+        self.assertEqual(importer.comments, 5)
+        self.assertEqual(importer.skipped_comments, 2)
+        self.assertEqual(board.counter.task_count, 6)
+
+    def test_import_without_command_uses_now(self):
+        board = BoardImporter().run(self.export())
+        self.assertNotIn(self.created, board.tasks.values_list('created_at', flat=True))
+
+    def test_malformed_import_rolls_back(self):
+        lines = self.export()
+        lines.insert(4, '{"type": "task", "title": "broken"}')
+        boards, users = Board.objects.count(), User.objects.count()
+        with self.assertRaises(BoardImportError):
+            BoardImporter(batch_size=2).run(lines)
+        self.assertEqual(Board.objects.count(), boards)
+        self.assertEqual(User.objects.count(), users)
+
+    def test_commands_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'board.ndjson')
+            call_command('export_board', self.board.id, output=path, stderr=io.StringIO())
+            stdout = io.StringIO()
+            call_command('import_board', path, owner='MEMBER@example.com', stdout=stdout)
+            with self.assertRaises(CommandError):
+                call_command('import_board', path, owner='nobody@example.com')
+        board = Board.objects.latest('id')
+        self.assertNotEqual(board, self.board)
+        self.assertEqual(board.owner, self.member)
+        self.assertEqual(Comment.objects.filter(task__board=board).count(), 5)
+        self.assertIn('5 tasks and 5 comments, created 0 users', stdout.getvalue())
+        self.assertEqual(set(board.tasks.values_list('created_at', flat=True)), {self.created})
+        # the command restores auto_now for the rest of the process
+        self.assertTrue(Task._meta.get_field('created_at').auto_now_add)
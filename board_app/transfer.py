@@ -0,0 +1,283 @@
+"""
+board export and import as NDJSON, one json object per line:
+
+    {"type": "board", "format": 1, "id": .., "title": .., "owner": <user id>}
+    {"type": "user", "id": .., "email": .., "username": .., "first_name": .., "last_name": .., "member": true}
+    {"type": "task", "id": .., "title": .., ..., "creator": <user id>, "assignee": <user id>}
+    {"type": "comment", "id": .., "task": <task id>, "author": <user id>, ...}
+
+ids are the ids of the exporting database. users come before the tasks
+and comments that reference them and are matched by email on import.
+rows are read with several queries, an export without export_snapshot()
+(e.g. the api download) can reference users or tasks written after
+their part of the file was read. the importer drops those references.
+"""
+import json
+import secrets
+from contextlib import contextmanager
+from itertools import islice
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+from django.utils.dateparse import parse_date, parse_datetime
+
+from board_app.counters import rebuild_counters
+from board_app.models import Board
+from core.renderers import FastJSONRenderer
+from task_app.models import Comment, Task, display_name
+from task_app.search import get_backend
+
+
+FORMAT_VERSION = 1
+CHUNK_SIZE = 2000
+USER_FIELDS = ('id', 'email', 'username', 'first_name', 'last_name')
+TASK_FIELDS = ('id', 'title', 'description', 'status', 'priority', 'creator_id',
+               'assignee_id', 'reviewer_id', 'due_date', 'created_at', 'updated_at')
+COMMENT_FIELDS = ('id', 'task_id', 'author_id', 'content', 'created_at', 'updated_at')
+STATUS_VALUES = {value for value, label in Task.STATUS_CHOICES}
+PRIORITY_VALUES = {value for value, label in Task.PRIORITY_CHOICES}
+
+
+class BoardImportError(ValueError):
+    """
+    the export file is malformed, nothing has been imported.
+    """
+
+
+# same encoding as the api responses, one object per line
+dumps = FastJSONRenderer().render
+
+
+def rename_keys(row):
+    # creator_id -> creator, the ids are references into the same file
+    return {key.removesuffix('_id'): value for key, value in row.items()}
+
+
+@contextmanager
+def export_snapshot():
+    """
+    runs an export in one REPEATABLE READ READ ONLY transaction on
+    postgresql, so all its queries see the same snapshot. other databases
+    get no snapshot: on sqlite a transaction would take the write lock
+    (transaction_mode IMMEDIATE) for the whole export.
+    """
+    if connection.vendor != 'postgresql':
+        yield
+        return
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        yield
+
+
+def export_board(board, chunk_size=CHUNK_SIZE):
+    """
+    yields the board as NDJSON chunks of bytes. rows are read with
+    server-side iterators, memory stays constant however big the board is.
+    """
+    yield dumps({'type': 'board', 'format': FORMAT_VERSION, 'id': board.id,
+                 'title': board.title, 'owner': board.owner_id}) + b'\n'
+
+    tasks = Task.objects.filter(board=board)
+    comments = Comment.objects.filter(task__board=board)
+    member_ids = set(board.members.values_list('id', flat=True))
+    # former members can still be creators, assignees or comment authors
+    users = User.objects.filter(
+        Q(id=board.owner_id) | Q(id__in=member_ids)
+        | Q(id__in=tasks.values('creator_id')) | Q(id__in=tasks.values('assignee_id'))
+        | Q(id__in=tasks.values('reviewer_id')) | Q(id__in=comments.values('author_id'))
+    ).order_by('id').values(*USER_FIELDS)
+
+    for kind, rows in (
+            ('user', users),
+            ('task', tasks.order_by('id').values(*TASK_FIELDS)),
+            ('comment', comments.order_by('id').values(*COMMENT_FIELDS))):
+        rows = rows.iterator(chunk_size=chunk_size)
+        while chunk := list(islice(rows, chunk_size)):
+            lines = []
+            for row in chunk:
+                row = {'type': kind, **rename_keys(row)}
+                if kind == 'user':
+                    row['member'] = row['id'] in member_ids
+                lines.append(dumps(row))
+            yield b'\n'.join(lines) + b'\n'
+
+
+def parse_timestamp(value):
+    timestamp = parse_datetime(value)
+    if timestamp is None:
+        raise ValueError(f'invalid timestamp {value!r}')
+    return timestamp
+
+
+def parse_lines(lines):
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            raise BoardImportError(f'line {number}: not valid json.')
+        if not isinstance(row, dict) or 'type' not in row:
+            raise BoardImportError(f'line {number}: expected an object with a "type".')
+        yield number, row
+
+
+class BoardImporter:
+    """
+    imports one exported board as a new board in batches of bulk_create,
+    inside one transaction. users are matched by email (case-insensitive),
+    unknown users are created without a usable password, with the email
+    as username like a registration.
+    old ids are mapped to new ones, only the id maps grow with the board.
+    references to users or tasks missing from the file are dropped:
+    unknown assignees and reviewers become empty, an unknown creator
+    becomes the board owner, comments on unknown tasks or by unknown
+    authors are skipped and counted in skipped_comments.
+    bulk_create sets auto_now timestamps to now, the import_board
+    command keeps the exported ones.
+    """
+
+    def __init__(self, owner=None, batch_size=CHUNK_SIZE):
+        self.owner = owner
+        self.batch_size = batch_size
+        self.board = None
+        self.users = {}
+        self.members = []
+        self.tasks = {}
+        self.pending = []
+        self.pending_kind = None
+        self.created_users = 0
+        self.comments = 0
+        self.skipped_comments = 0
+
+    @transaction.atomic
+    def run(self, lines):
+        rows = parse_lines(lines)
+        number, header = next(rows, (1, {}))
+        if (header.get('type') != 'board' or header.get('format') != FORMAT_VERSION
+                or not isinstance(header.get('title'), str)):
+            raise BoardImportError(
+                f'line {number}: expected a format {FORMAT_VERSION} board header.')
+        self.header = header
+
+        for number, row in rows:
+            kind = row['type']
+            if kind not in ('user', 'task', 'comment'):
+                raise BoardImportError(f'line {number}: unknown type "{kind}".')
+            if kind != self.pending_kind:
+                self.flush()
+                self.pending_kind = kind
+            try:
+                item = self.build(kind, row)
+            except (KeyError, TypeError, ValueError) as error:
+                raise BoardImportError(f'line {number}: invalid {kind} ({error}).')
+            if item is None:
+                self.skipped_comments += 1
+                continue
+            self.pending.append(item)
+            if len(self.pending) >= self.batch_size:
+                self.flush()
+        self.flush()
+        if self.board is None:
+            self.create_board()
+        self.finish()
+        return self.board
+
+    def build(self, kind, row):
+        if kind == 'user':
+            if not isinstance(row.get('email'), str) or 'id' not in row:
+                raise ValueError('email and id are required')
+            return row
+        if self.board is None:
+            self.create_board()
+        if kind == 'task':
+            if row['status'] not in STATUS_VALUES or row['priority'] not in PRIORITY_VALUES:
+                raise ValueError('unknown status or priority')
+            return Task(
+                board=self.board, title=row['title'], description=row['description'],
+                status=row['status'], priority=row['priority'],
+                creator=self.user(row['creator']) or self.board.owner,
+                assignee=self.user(row['assignee']),
+                reviewer=self.user(row['reviewer']), due_date=parse_date(row['due_date'] or ''),
+                created_at=parse_timestamp(row['created_at']),
+                updated_at=parse_timestamp(row['updated_at'])), row['id']
+        author = self.user(row['author'])
+        comment = Comment(
+            task_id=self.tasks.get(row['task']), author=author,
+            author_name=display_name(author) if author else '',
+            content=row['content'], created_at=parse_timestamp(row['created_at']),
+            updated_at=parse_timestamp(row['updated_at']))
+        if comment.task_id is None or author is None:
+            return None
+        return comment
+
+    def user(self, old_id):
+        return self.users.get(old_id)
+
+    def flush(self):
+        batch, self.pending = self.pending, []
+        if not batch:
+            return
+        if self.pending_kind == 'user':
+            self.import_users(batch)
+        elif self.pending_kind == 'task':
+            self.import_tasks(batch)
+        else:
+            self.import_comments(batch)
+
+    def import_users(self, rows):
+        emails = {row['email'].lower() for row in rows}
+        existing = {user.email.lower(): user for user in User.objects.annotate(
+            email_lower=Lower('email')).filter(email_lower__in=emails)}
+        missing = []
+        for row in rows:
+            user = existing.get(row['email'].lower())
+            if user is None:
+                user = User(email=row['email'], username=row['email'],
+                            first_name=row.get('first_name') or '',
+                            last_name=row.get('last_name') or '')
+                user.set_unusable_password()
+                existing[row['email'].lower()] = user
+                missing.append(user)
+            self.users[row['id']] = user
+            if row.get('member'):
+                self.members.append(user)
+        # a user who changed the email keeps the old one as username
+        taken = set(User.objects.filter(
+            username__in=[user.username for user in missing]).values_list('username', flat=True))
+        for user in missing:
+            if user.username in taken:
+                user.username = f'{user.email}.{secrets.token_hex(4)}'
+        User.objects.bulk_create(missing, batch_size=self.batch_size)
+        self.created_users += len(missing)
+
+    def import_tasks(self, pairs):
+        tasks = Task.objects.bulk_create([task for task, old_id in pairs])
+        for task, (_, old_id) in zip(tasks, pairs):
+            self.tasks[old_id] = task.id
+
+    def import_comments(self, comments):
+        Comment.objects.bulk_create(comments)
+        self.comments += len(comments)
+
+    def create_board(self):
+        owner = self.owner or self.users.get(self.header['owner'])
+        if owner is None:
+            raise BoardImportError('the board owner is missing from the users.')
+        self.board = Board.objects.create(title=self.header['title'], owner=owner)
+        members = {user.id: user for user in self.members}
+        members[owner.id] = owner
+        Board.members.through.objects.bulk_create([
+            Board.members.through(board_id=self.board.id, user_id=user_id)
+            for user_id in members])
+
+    def finish(self):
+        rebuild_counters([self.board.id])
+        backend = get_backend()
+        task_ids = list(self.tasks.values())
+        for start in range(0, len(task_ids), self.batch_size):
+            backend.index_tasks(task_ids[start:start + self.batch_size])
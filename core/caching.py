@@ -0,0 +1,16 @@
+from django.conf import settings
+
+
+# caches that live in one process: an invalidation written there does not
+# reach the other worker processes
+PROCESS_LOCAL_CACHES = {
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+}
+
+
+def is_shared_cache():
+    """
+    True if the default cache is shared by all workers (REDIS_URL).
+    """
+    return settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES
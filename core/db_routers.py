@@ -0,0 +1,74 @@
+"""
+read-replica routing.
+reads go to a replica only while a request runs a view flagged with
+use_read_replica (see core.middleware.ReplicaRoutingMiddleware),
+everything else, all writes and all auth lookups use the primary.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+_use_replica = ContextVar('use_replica', default=False)
+
+# tokens and users are always read from the primary, so a fresh login
+# or a revoked token is never answered from a lagging replica
+PRIMARY_ONLY_APPS = {'auth_app', 'authtoken'}
+
+
+def enable_replica_reads():
+    """
+    routes the following reads to the replicas,
+    returns the token for reset_replica_reads().
+    """
+    return _use_replica.set(True)
+
+
+def reset_replica_reads(token):
+    try:
+        _use_replica.reset(token)
+    except ValueError:
+        # set in a copy of this context, e.g. by a sync process_view
+        # under ASGI, which asgiref copies back into the request task
+        _use_replica.set(False)
+
+
+@contextmanager
+def primary_reads():
+    """
+    reads in this block use the primary, e.g. to fill shared caches,
+    which must never store data from a lagging replica.
+    """
+    token = _use_replica.set(False)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+class ReplicaRouter:
+    """
+    READ_REPLICAS lists the replica aliases, reads are spread randomly.
+    replicas are copies of the primary, they are never migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = getattr(settings, 'READ_REPLICAS', [])
+        if (replicas and _use_replica.get()
+                and model._meta.app_label not in PRIMARY_ONLY_APPS):
+            return random.choice(replicas)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # all aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in getattr(settings, 'READ_REPLICAS', []):
+            return False
+        return None
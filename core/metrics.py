@@ -0,0 +1,126 @@
+"""
+in-process request metrics, filled by core.middleware.MetricsMiddleware
+and served in prometheus text format by core.views.MetricsView.
+every worker process keeps its own histograms, prometheus adds them up
+per instance label.
+"""
+import threading
+from bisect import bisect_left
+
+
+# upper bounds, the +Inf bucket is implicit
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+# drf generic view handlers, the first one the view defines names the action
+METHOD_ACTIONS = {
+    'get': ('list', 'retrieve'),
+    'post': ('create',),
+    'put': ('update',),
+    'patch': ('partial_update',),
+    'delete': ('destroy',),
+}
+
+
+def view_name(view_func, method):
+    """
+    metric label for a resolved view, e.g. BoardViewSet.list or
+    TaskDetailView.partial_update. plain views keep the http method.
+    """
+    method = method.lower()
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if view_class is None:
+        return view_func.__name__
+
+    actions = getattr(view_func, 'actions', None)
+    if actions:
+        return f'{view_class.__name__}.{actions.get(method, method)}'
+    for action in METHOD_ACTIONS.get(method, ()):
+        if hasattr(view_class, action):
+            return f'{view_class.__name__}.{action}'
+    return f'{view_class.__name__}.{method}'
+
+
+def format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+
+class Histogram:
+    """
+    cumulative histogram per view label.
+    """
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, view, value):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(view)
+            if series is None:
+                # bucket counts (+Inf last), sum, count
+                series = self.series[view] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self):
+        with self.lock:
+            self.series.clear()
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self.lock:
+            series = {view: (list(counts), total, count)
+                      for view, (counts, total, count) in self.series.items()}
+        for view in sorted(series):
+            counts, total, count = series[view]
+            label = 'view="{}"'.format(view.replace('\\', '\\\\').replace('"', '\\"'))
+            cumulative = 0
+            for bound, bucket in zip((*self.buckets, '+Inf'), counts):
+                cumulative += bucket
+                lines.append(f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{label}}} {format_value(total)}')
+            lines.append(f'{self.name}_count{{{label}}} {count}')
+        return lines
+
+
+request_duration = Histogram(
+    'kanmind_request_duration_seconds', 'Wall time per request.', SECONDS_BUCKETS)
+request_db_duration = Histogram(
+    'kanmind_request_db_duration_seconds', 'Time spent in SQL per request.', SECONDS_BUCKETS)
+request_render_duration = Histogram(
+    'kanmind_request_render_duration_seconds',
+    'Time spent rendering the response body per request.', SECONDS_BUCKETS)
+request_queries = Histogram(
+    'kanmind_request_queries', 'SQL queries per request.', QUERY_BUCKETS)
+
+HISTOGRAMS = (request_duration, request_db_duration, request_render_duration, request_queries)
+
+
+def record(view, duration, db_duration, render_duration, queries):
+    request_duration.observe(view, duration)
+    request_db_duration.observe(view, db_duration)
+    request_render_duration.observe(view, render_duration)
+    request_queries.observe(view, queries)
+
+
+def render_metrics():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines += histogram.render()
+    return '\n'.join(lines) + '\n'
+
+
+def clear():
+    for histogram in HISTOGRAMS:
+        histogram.clear()
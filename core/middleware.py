@@ -0,0 +1,243 @@
+import hashlib
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+
+from core import metrics
+from core.db_routers import enable_replica_reads, reset_replica_reads
+
+
+class RequestTimings:
+    """
+    query count and durations of one request, in seconds.
+    """
+    __slots__ = ('queries', 'db', 'render', 'render_started')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.render = 0.0
+        self.render_started = None
+
+
+_request_timings = ContextVar('request_timings', default=None)
+
+
+def time_queries(execute, sql, params, many, context):
+    """
+    execute_wrapper, counts into the RequestTimings of the running request.
+    """
+    timings = _request_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += perf_counter() - started
+        timings.queries += 1
+
+
+def install_query_timing():
+    """
+    adds time_queries to the connections of the current thread, once.
+    connections are per thread and under ASGI sync views run on another
+    thread than the middleware, the request is found through the context.
+    inserted first, so execute_wrapper() blocks still pop their own wrapper.
+    """
+    for connection in connections.all():
+        if time_queries not in connection.execute_wrappers:
+            connection.execute_wrappers.insert(0, time_queries)
+
+
+class MetricsMiddleware:
+    """
+    records query count, sql time, render time and wall time per resolved
+    view (e.g. BoardViewSet.list) into core.metrics and, with
+    METRICS['SERVER_TIMING'], into a Server-Timing header.
+    view names are resolved in process_view, unresolved requests (404s)
+    are not recorded. streamed bodies are produced after the response
+    leaves the middleware, only the time until the first byte counts.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        options = getattr(settings, 'METRICS', {})
+        self.enabled = options.get('ENABLED', True)
+        self.server_timing = options.get('SERVER_TIMING', True)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        started = perf_counter()
+        token = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_timings.reset(token)
+        return self.record(request, response, perf_counter() - started)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        started = perf_counter()
+        token = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_timings.reset(token)
+        return self.record(request, response, perf_counter() - started)
+
+    def start(self, request):
+        request._timings = RequestTimings()
+        install_query_timing()
+        return _request_timings.set(request._timings)
+
+    def record(self, request, response, duration):
+        timings = request._timings
+        view = getattr(request, '_metrics_view', None)
+        if view is None:
+            return response
+        metrics.record(view, duration, timings.db, timings.render, timings.queries)
+        if self.server_timing:
+            response['Server-Timing'] = (
+                f'db;dur={timings.db * 1000:.1f};desc="{timings.queries} queries", '
+                f'render;dur={timings.render * 1000:.1f}, '
+                f'total;dur={duration * 1000:.1f}'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # runs on the thread of sync views, also under ASGI
+        if self.enabled:
+            install_query_timing()
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        if self.enabled and getattr(view_class, 'record_metrics', True):
+            request._metrics_view = metrics.view_name(view_func, request.method)
+        return None
+
+    def process_template_response(self, request, response):
+        # drf responses are rendered after the view, time the rendering
+        timings = getattr(request, '_timings', None)
+        if timings is not None:
+            timings.render_started = perf_counter()
+            response.add_post_render_callback(lambda response: self.rendered(timings))
+        return response
+
+    def rendered(self, timings):
+        timings.render = perf_counter() - timings.render_started
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    gzip for responses of at least COMPRESSION['MIN_SIZE'] bytes.
+    small bodies are not worth the cpu, event streams are never
+    compressed because the buffering would hold back events.
+    """
+    skip_content_types = ('text/event-stream',)
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, 'COMPRESSION', {}).get('MIN_SIZE', 1024)
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith(self.skip_content_types):
+            return response
+        if not response.streaming and len(response.content) < self.min_size:
+            return response
+        return super().process_response(request, response)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    safe requests to views with use_read_replica = True read from
+    READ_REPLICAS. after a successful write the client is pinned to the
+    primary for REPLICA_PIN_SECONDS (cookie, and a cache entry per
+    Authorization header for token clients), so it reads its own writes.
+    streamed bodies are produced after the view and read from the primary.
+    """
+    safe_methods = ('GET', 'HEAD', 'OPTIONS')
+    cookie_name = 'primary_pin'
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not getattr(settings, 'READ_REPLICAS', []):
+            return self.get_response(request)
+
+        response = self.get_response(request)
+        if self.finish(request, response):
+            self.pin(request, response)
+        return response
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'READ_REPLICAS', []):
+            return await self.get_response(request)
+
+        response = await self.get_response(request)
+        if self.finish(request, response):
+            await sync_to_async(self.pin)(request, response)
+        return response
+
+    def finish(self, request, response):
+        """
+        ends replica reads of the request, returns True if the client
+        must be pinned to the primary.
+        """
+        token = getattr(request, '_replica_token', None)
+        if token is not None:
+            reset_replica_reads(token)
+        return request.method not in self.safe_methods and response.status_code < 400
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if request.method not in self.safe_methods:
+            return None
+        if not getattr(settings, 'READ_REPLICAS', []):
+            return None
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        if not getattr(view_class, 'use_read_replica', False) or self.is_pinned(request):
+            return None
+        request._replica_token = enable_replica_reads()
+        return None
+
+    def pin_key(self, request):
+        authorization = request.META.get('HTTP_AUTHORIZATION')
+        if not authorization:
+            return None
+        return 'replica_pin:' + hashlib.sha256(authorization.encode()).hexdigest()
+
+    def is_pinned(self, request):
+        if self.cookie_name in request.COOKIES:
+            return True
+        key = self.pin_key(request)
+        return key is not None and cache.get(key) is not None
+
+    def pin(self, request, response):
+        seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 10)
+        response.set_cookie(
+            self.cookie_name, '1', max_age=seconds, httponly=True,
+            samesite='Lax', secure=request.is_secure())
+        key = self.pin_key(request)
+        if key is not None:
+            cache.set(key, 1, seconds)
@@ -0,0 +1,40 @@
+"""
+JSON renderer with an optional faster encoder.
+uses orjson when it is installed, otherwise DRF's json based renderer.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    drop-in replacement for JSONRenderer.
+    datetimes and other non-native types go through DRF's JSONEncoder,
+    indented output (?indent / Accept: ...; indent=4) uses the json module,
+    so does data orjson can not encode (integers wider than 64 bits).
+    floats differ: exponents are written as 1e16 instead of 1e+16, NaN and
+    Infinity become null where JSONRenderer raises.
+    """
+    encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            content = orjson.dumps(
+                data,
+                default=self.encoder.default,
+                option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        # same escaping as JSONRenderer, keeps the output valid javascript
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
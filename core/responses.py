@@ -0,0 +1,22 @@
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+
+
+class ChunkedStreamingHttpResponse(StreamingHttpResponse):
+    """
+    StreamingHttpResponse for sync iterators that read the database
+    while the body is sent. under ASGI django reads a sync iterator with
+    sync_to_async(list), the whole body ends up in memory before the first
+    byte goes out. here each chunk is read on its own, on the request's
+    sync thread, so the response streams under WSGI and ASGI alike.
+    """
+
+    async def __aiter__(self):
+        if self.is_async:
+            async for part in super().__aiter__():
+                yield part
+            return
+        parts = iter(self.streaming_content)
+        done = object()
+        while (part := await sync_to_async(next)(parts, done)) is not done:
+            yield part
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+from datetime import timedelta
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -47,8 +48,58 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'auth_app.authentication.ExpiringTokenAuthentication',
     ],
+    # orjson if installed, stdlib json otherwise
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    # trusted reverse proxies in front of the app. throttles key on
+    # REMOTE_ADDR with 0, on the address the last proxy saw in
+    # X-Forwarded-For otherwise. set NUM_PROXIES=1 behind one nginx.
+    'NUM_PROXIES': int(os.getenv('NUM_PROXIES', '0')),
+}
+
+# gzip responses from MIN_SIZE bytes on (django's GZipMiddleware
+# itself never compresses below 200 bytes)
+COMPRESSION = {
+    'MIN_SIZE': 1024,
+}
+
+# password hashing (login/registration) runs on a bounded thread pool,
+# requests beyond WORKERS + QUEUE_SIZE get 503 with Retry-After.
+PASSWORD_HASHING_POOL = {
+    'WORKERS': 4,
+    'QUEUE_SIZE': 16,
+    'RETRY_AFTER': 1,
+}
+
+# sliding-window rate limits for login and email-check, keyed by IP and
+# by normalized email. the in-process store counts per worker process,
+# use 'auth_app.throttling.CacheThrottleStore' to share counts via CACHES.
+AUTH_THROTTLE = {
+    'BACKEND': 'auth_app.throttling.InProcessThrottleStore',
+    'OPTIONS': {'compact_interval': 60},
+    'RATES': {
+        'login_ip': '30/min',
+        'login_email': '10/min',
+        'email_check_ip': '60/min',
+        'email_check_email': '30/min',
+    },
+}
+
+# lifetime of auth tokens, refreshed (sliding) once less than half is left
+AUTH_TOKEN_LIFETIME = timedelta(days=7)
+
+# in-process token -> user cache of CachedTokenAuthentication.
+# revocations reach the other worker processes through CACHES, so
+# deployments with more than one worker process must use REDIS_URL.
+# without it TTL (seconds) bounds how long another worker process may
+# accept a token after logout or deactivation.
+AUTH_TOKEN_CACHE = {
+    'MAX_SIZE': 10000,
+    'TTL': 60,
 }
 
 # Application definition
@@ -69,14 +120,17 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.MetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -98,18 +152,126 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'core.wsgi.application'
 
+# login and registration are async views when served through ASGI
+# (core.asgi sets SERVER_INTERFACE=asgi), sync APIViews under WSGI
+ASYNC_AUTH_VIEWS = os.getenv('SERVER_INTERFACE', 'wsgi') == 'asgi'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
+# DB_ENGINE=postgresql reads DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+# and uses psycopg's connection pool (needs psycopg[pool]), DB_POOL=0
+# switches to persistent connections instead. the default is sqlite in
+# WAL mode for single-node deployments.
+# persistent connections (DB_CONN_MAX_AGE) are not reused under ASGI,
+# set DB_CONN_MAX_AGE=0 there and prefer the pool.
+
+DB_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', '60'))
+
+if os.getenv('DB_ENGINE', 'sqlite') == 'postgresql':
+    DB_POOL = os.getenv('DB_POOL', '1') == '1'
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.getenv('DB_NAME', 'kanmind'),
+            'USER': os.getenv('DB_USER', ''),
+            'PASSWORD': os.getenv('DB_PASSWORD', ''),
+            'HOST': os.getenv('DB_HOST', 'localhost'),
+            'PORT': os.getenv('DB_PORT', '5432'),
+            # pooled connections must not be persistent as well
+            'CONN_MAX_AGE': 0 if DB_POOL else DB_CONN_MAX_AGE,
+            'CONN_HEALTH_CHECKS': not DB_POOL,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+                    'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                    'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+                },
+            } if DB_POOL else {},
+        }
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.getenv('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+            'OPTIONS': {
+                # seconds a connection waits for a lock (busy timeout)
+                'timeout': int(os.getenv('DB_BUSY_TIMEOUT', '20')),
+                # take the write lock at BEGIN, avoids "database is locked"
+                # when a read transaction upgrades to a write
+                'transaction_mode': 'IMMEDIATE',
+                # WAL: readers never block the writer. synchronous=NORMAL is
+                # safe with WAL, mmap serves reads from the page cache.
+                'init_command': (
+                    'PRAGMA journal_mode=WAL;'
+                    'PRAGMA synchronous=NORMAL;'
+                    'PRAGMA mmap_size=134217728;'
+                    'PRAGMA temp_store=MEMORY;'
+                ),
+            },
+        }
+    }
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# read replicas: DB_REPLICAS lists replica sqlite files, or hosts for
+# postgresql (same credentials as the primary). views with
+# use_read_replica = True read from them, see core.db_routers.
+# replicas mirror the primary in tests, run the suite without DB_REPLICAS.
+READ_REPLICAS = []
+for index, replica in enumerate(filter(None, os.getenv('DB_REPLICAS', '').split(','))):
+    alias = f'replica_{index + 1}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'OPTIONS': dict(DATABASES['default']['OPTIONS']),
+        'TEST': {'MIRROR': 'default'},
     }
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        DATABASES[alias]['NAME'] = replica.strip()
+    else:
+        DATABASES[alias]['HOST'] = replica.strip()
+    READ_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.db_routers.ReplicaRouter']
+
+# seconds a client reads from the primary after one of its writes
+REPLICA_PIN_SECONDS = 10
+
+# per-view query count and timings, see core.middleware.MetricsMiddleware.
+# /api/_metrics needs METRICS_TOKEN as bearer token.
+METRICS = {
+    'ENABLED': True,
+    'SERVER_TIMING': True,
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+# board detail caching (versions, ETags) and member id sets are only
+# used with REDIS_URL, the process-local default cache could not
+# invalidate them in the other worker processes.
+
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# pub/sub backend for /api/boards/{id}/events/
+BOARD_EVENTS_BROKER = 'board_app.events.InProcessBroker'
+# lifetime in seconds of the ?ticket= from POST /api/boards/{id}/events/ticket/
+BOARD_EVENTS_TICKET_MAX_AGE = 60
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
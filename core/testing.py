@@ -0,0 +1,181 @@
+"""
+query budgets for the api routes.
+QueryBudgetTestCase grows one data set through SIZES and requests every
+declared route at each size with cold caches. the query count has to be
+the same at every size and within the declared budget, so an n+1 fails
+the build as soon as it is reintroduced.
+"""
+import os
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from rest_framework.test import APITestCase
+
+from auth_app.authentication import token_cache
+from auth_app.models import AuthToken
+from auth_app.throttling import get_store
+from board_app.models import Board
+from task_app.models import Comment, Task
+
+
+SIZES = (1, 50, 500)
+
+# a cache shared like redis, for the code paths that need one
+# (core.caching.is_shared_cache). clear it in setUp.
+SHARED_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(tempfile.gettempdir(), 'kanmind-test-cache'),
+    }
+}
+
+
+class Budget:
+    """
+    one request and the most queries it may run.
+    args and data are called with the test case before the request,
+    objects they create are not counted.
+    """
+
+    def __init__(self, route, queries, method='get', args=None, data=None, params=None,
+                 status=200, auth=True):
+        # auth: True for the user's token, False for none or a callable
+        # returning another token
+        self.route = route
+        self.queries = queries
+        self.method = method
+        self.args = args
+        self.data = data
+        self.params = params
+        self.status = status
+        self.auth = auth
+
+    def __str__(self):
+        params = f'?{self.params}' if self.params else ''
+        return f'{self.method.upper()} {self.route}{params}'
+
+
+def api_routes(resolver=None):
+    """
+    names of all routes below /api/, e.g. 'board-detail'.
+    """
+    names = set()
+    for pattern in (resolver or get_resolver()).url_patterns:
+        if isinstance(pattern, URLResolver):
+            if resolver is None and not str(pattern.pattern).startswith('api/'):
+                continue
+            names |= api_routes(pattern)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+@override_settings(
+    SECURE_SSL_REDIRECT=False,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class QueryBudgetTestCase(APITestCase):
+    """
+    data set of size n: the user is member of n boards, the first board
+    has n members and n tasks (assigned to and reviewed by the user),
+    the first task has n comments. every object is created through the
+    orm, so signals keep counters, change log and search index filled.
+    subclasses list their routes in budgets.
+    """
+    budgets = []
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='owner@example.com', email='owner@example.com', password='pw')
+        cls.token = AuthToken.objects.create(user=cls.user, device='tests')
+        cls.board = Board.objects.create(title='Board 0', owner=cls.user)
+        cls.board.members.add(cls.user)
+        cls.task = Task.objects.create(
+            board=cls.board, creator=cls.user, title='Task 0', description='first task',
+            status='to-do', priority='high', assignee=cls.user, reviewer=cls.user)
+        cls.spares = 0
+
+    def grow(self, size):
+        boards = Board.objects.filter(members=self.user).count()
+        for index in range(boards, size):
+            board = Board.objects.create(title=f'Board {index}', owner=self.user)
+            board.members.add(self.user)
+
+        members = self.board.members.count()
+        for index in range(members, size):
+            member = User.objects.create_user(
+                username=f'member{index}@example.com', email=f'member{index}@example.com',
+                first_name='Member', last_name=str(index))
+            self.board.members.add(member)
+
+        tasks = self.board.tasks.count()
+        for index in range(tasks, size):
+            Task.objects.create(
+                board=self.board, creator=self.user, title=f'Task {index}',
+                description='planning', status=('to-do', 'review')[index % 2],
+                priority='medium', assignee=self.user, reviewer=self.user,
+                due_date='2025-06-01')
+
+        comments = self.task.comments.count()
+        for index in range(comments, size):
+            Comment.objects.create(task=self.task, author=self.user, content=f'Comment {index}')
+
+    def spare(self):
+        """
+        a unique suffix for objects created by args or data.
+        """
+        type(self).spares += 1
+        return type(self).spares
+
+    def spare_token(self):
+        return AuthToken.objects.create(user=self.user, device=f'spare {self.spare()}')
+
+    def request(self, budget):
+        args = budget.args(self) if budget.args else []
+        data = budget.data(self) if budget.data else None
+        url = reverse(budget.route, args=args)
+        if budget.params:
+            url += '?' + budget.params
+        headers = {}
+        if budget.auth:
+            token = budget.auth(self) if callable(budget.auth) else self.token
+            headers['HTTP_AUTHORIZATION'] = f'Token {token.key}'
+
+        cache.clear()
+        token_cache.clear()
+        get_store().clear()
+        # the log keeps at most 9000 queries, a full log would count none
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = getattr(self.client, budget.method)(url, data, format='json', **headers)
+            if not response.streaming:
+                body = response.content
+            elif response['Content-Type'] != 'text/event-stream':
+                # streamed rows are read while the body is consumed
+                body = b''.join(response.streaming_content)
+            else:
+                body = b''
+        self.assertEqual(response.status_code, budget.status, f'{budget}: {body[:200]}')
+        return len(queries)
+
+    def test_query_budgets(self):
+        if not self.budgets:
+            self.skipTest('no budgets declared')
+        counts = {}
+        for size in SIZES:
+            self.grow(size)
+            for budget in self.budgets:
+                with self.subTest(route=str(budget), size=size):
+                    count = self.request(budget)
+                    first = counts.setdefault(str(budget), count)
+                    self.assertEqual(
+                        count, first, f'{budget}: {first} queries at size {SIZES[0]}, '
+                                      f'{count} at size {size}')
+                    self.assertLessEqual(
+                        count, budget.queries, f'{budget}: over its budget')
@@ -0,0 +1,255 @@
+import gzip
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import AsyncClient, RequestFactory, SimpleTestCase, override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from auth_app.models import AuthToken
+from board_app.models import Board
+from core.db_routers import (
+    ReplicaRouter, _use_replica, enable_replica_reads, primary_reads, reset_replica_reads)
+from auth_app.tests import AuthQueryBudgetTests
+from board_app.api.views import BoardViewSet
+from board_app.tests import BoardQueryBudgetTests
+from core import metrics
+from core.middleware import CompressionMiddleware, ReplicaRoutingMiddleware
+from core.renderers import FastJSONRenderer
+from core.testing import Budget, QueryBudgetTestCase, api_routes
+from task_app.api.views import TaskDetailView
+from task_app.tests import TaskQueryBudgetTests
+
+
+class FastJSONRendererTests(SimpleTestCase):
+
+    def test_same_bytes_as_json_renderer(self):
+        data = {
+            'text': 'Ünïcode \u2028 line',
+            'created': datetime(2025, 1, 2, 3, 4, 5, 678901, tzinfo=timezone.utc),
+            'due': date(2025, 1, 2),
+            'amount': Decimal('1.50'),
+            'nested': [{'id': 1, 'value': None}, True],
+            1: 'int key',
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_indent_is_kept(self):
+        rendered = FastJSONRenderer().render(
+            {'a': 1}, 'application/json; indent=2', {})
+        self.assertEqual(rendered, b'{\n  "a": 1\n}')
+
+    def test_falls_back_for_data_orjson_can_not_encode(self):
+        data = {'id': 2 ** 70, 'title': 'wide'}
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+
+@override_settings(COMPRESSION={'MIN_SIZE': 500})
+class CompressionMiddlewareTests(SimpleTestCase):
+
+    def process(self, response, encoding='gzip'):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING=encoding)
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_threshold(self):
+        small = self.process(HttpResponse(b'x' * 499))
+        self.assertFalse(small.has_header('Content-Encoding'))
+
+        body = b'{"title": "task"}' * 100
+        large = self.process(HttpResponse(body))
+        self.assertEqual(large['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(large.content), body)
+
+        self.assertFalse(self.process(HttpResponse(body), encoding='br').has_header(
+            'Content-Encoding'))
+
+    def test_event_streams_are_not_compressed(self):
+        response = self.process(StreamingHttpResponse(
+            iter([b'data: x\n\n']), content_type='text/event-stream'))
+        self.assertFalse(response.has_header('Content-Encoding'))
+
+
+@override_settings(READ_REPLICAS=['replica_1'])
+class ReplicaRouterTests(SimpleTestCase):
+
+    def test_replica_only_when_enabled(self):
+        router = ReplicaRouter()
+        self.assertEqual(router.db_for_read(Board), 'default')
+        token = enable_replica_reads()
+        try:
+            self.assertEqual(router.db_for_read(Board), 'replica_1')
+            self.assertEqual(router.db_for_read(User), 'replica_1')
+            # tokens are always checked against the primary
+            self.assertEqual(router.db_for_read(AuthToken), 'default')
+            with primary_reads():
+                self.assertEqual(router.db_for_read(Board), 'default')
+            self.assertEqual(router.db_for_write(Board), 'default')
+        finally:
+            reset_replica_reads(token)
+        self.assertFalse(router.allow_migrate('replica_1', 'board_app'))
+
+
+class ReplicaView:
+    use_read_replica = True
+
+
+def replica_view(request):
+    return HttpResponse()
+
+
+replica_view.cls = ReplicaView
+
+
+@override_settings(READ_REPLICAS=['replica_1'], REPLICA_PIN_SECONDS=10)
+class ReplicaRoutingMiddlewareTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def run_request(self, request, status=200):
+        seen = []
+
+        def get_response(request):
+            middleware.process_view(request, replica_view, (), {})
+            seen.append(_use_replica.get())
+            return HttpResponse(status=status)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        response = middleware(request)
+        self.assertFalse(_use_replica.get())
+        return seen[0], response
+
+    def test_safe_requests_use_replica(self):
+        used, response = self.run_request(RequestFactory().get('/'))
+        self.assertTrue(used)
+        self.assertNotIn('primary_pin', response.cookies)
+
+    def test_writes_pin_the_client(self):
+        factory = RequestFactory()
+        used, response = self.run_request(
+            factory.post('/', HTTP_AUTHORIZATION='Token abc'), status=201)
+        self.assertFalse(used)
+        self.assertEqual(response.cookies['primary_pin']['max-age'], 10)
+
+        # pinned by cookie or, for token clients, by the cache entry
+        factory.cookies['primary_pin'] = '1'
+        self.assertFalse(self.run_request(factory.get('/'))[0])
+        self.assertFalse(self.run_request(
+            RequestFactory().get('/', HTTP_AUTHORIZATION='Token abc'))[0])
+        self.assertTrue(self.run_request(
+            RequestFactory().get('/', HTTP_AUTHORIZATION='Token other'))[0])
+
+    def test_failed_writes_do_not_pin(self):
+        response = self.run_request(RequestFactory().post('/'), status=400)[1]
+        self.assertNotIn('primary_pin', response.cookies)
+
+    async def test_async_requests(self):
+        seen = []
+
+        async def get_response(request):
+            # django runs a sync process_view on a copy of the context
+            await sync_to_async(middleware.process_view)(request, replica_view, (), {})
+            seen.append(await sync_to_async(_use_replica.get)())
+            return HttpResponse(status=201 if request.method == 'POST' else 200)
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        response = await middleware(RequestFactory().get('/'))
+        self.assertEqual(seen, [True])
+        self.assertFalse(_use_replica.get())
+        self.assertNotIn('primary_pin', response.cookies)
+
+        response = await middleware(RequestFactory().post('/', HTTP_AUTHORIZATION='Token abc'))
+        self.assertEqual(response.cookies['primary_pin']['max-age'], 10)
+        self.assertFalse(await sync_to_async(middleware.is_pinned)(
+            RequestFactory().get('/', HTTP_AUTHORIZATION='Token other')))
+        self.assertTrue(await sync_to_async(middleware.is_pinned)(
+            RequestFactory().get('/', HTTP_AUTHORIZATION='Token abc')))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False, METRICS={'TOKEN': 'scrape'})
+class MetricsTests(APITestCase):
+
+    def setUp(self):
+        metrics.clear()
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user@example.com', email='user@example.com', password='pw')
+        Board.objects.create(title='Board', owner=self.user).members.add(self.user)
+        self.client.force_authenticate(self.user)
+
+    def test_view_names(self):
+        list_view = BoardViewSet.as_view({'get': 'list', 'post': 'create'})
+        self.assertEqual(metrics.view_name(list_view, 'GET'), 'BoardViewSet.list')
+        detail_view = TaskDetailView.as_view()
+        self.assertEqual(metrics.view_name(detail_view, 'PUT'), 'TaskDetailView.update')
+        self.assertEqual(metrics.view_name(detail_view, 'GET'), 'TaskDetailView.retrieve')
+
+    def test_request_is_recorded(self):
+        response = self.client.get('/api/boards/')
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="[1-9]\d* queries", render;dur=[\d.]+, total;dur=[\d.]+$')
+        # unresolved urls are not recorded
+        self.client.get('/api/unknown/')
+
+        response = self.client.get('/api/_metrics', HTTP_AUTHORIZATION='Bearer scrape')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn(
+            'kanmind_request_duration_seconds_count{view="BoardViewSet.list"} 1\n', body)
+        self.assertIn(
+            'kanmind_request_queries_bucket{view="BoardViewSet.list",le="+Inf"} 1\n', body)
+        self.assertNotIn('unknown', body)
+        self.assertNotIn('MetricsView', body)
+
+    async def test_async_request_is_recorded(self):
+        token = await AuthToken.objects.acreate(user=self.user, device='test')
+        response = await AsyncClient().get(
+            '/api/boards/', headers={'Authorization': f'Token {token.key}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(
+            response['Server-Timing'],
+            r'^db;dur=[\d.]+;desc="[1-9]\d* queries", render;dur=[\d.]+, total;dur=[\d.]+$')
+        self.assertIn(
+            'kanmind_request_duration_seconds_count{view="BoardViewSet.list"} 1\n',
+            metrics.render_metrics())
+
+    def test_metrics_need_the_token(self):
+        self.assertEqual(self.client.get('/api/_metrics').status_code, 403)
+        with override_settings(METRICS={'TOKEN': ''}):
+            self.assertEqual(self.client.get('/api/_metrics').status_code, 404)
+
+
+class HistogramTests(SimpleTestCase):
+
+    def test_buckets_are_cumulative(self):
+        histogram = metrics.Histogram('test_seconds', 'Test.', (0.1, 1))
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe('View.list', value)
+        self.assertEqual(histogram.render()[2:], [
+            'test_seconds_bucket{view="View.list",le="0.1"} 2',
+            'test_seconds_bucket{view="View.list",le="1"} 3',
+            'test_seconds_bucket{view="View.list",le="+Inf"} 4',
+            'test_seconds_sum{view="View.list"} 3.65',
+            'test_seconds_count{view="View.list"} 4',
+        ])
+
+
+@override_settings(DEBUG=True, METRICS={'TOKEN': ''})
+class CoreQueryBudgetTests(QueryBudgetTestCase):
+    budgets = [
+        Budget('api-root', 1),
+        Budget('metrics', 0, auth=False),
+    ]
+
+    def test_every_route_has_a_budget(self):
+        declared = {budget.route for case in (
+            self, AuthQueryBudgetTests, BoardQueryBudgetTests, TaskQueryBudgetTests)
+            for budget in case.budgets}
+        self.assertEqual(api_routes() - declared, set())
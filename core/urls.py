@@ -17,8 +17,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+    path('api/_metrics', MetricsView.as_view(), name='metrics'),
     path('api/', include('auth_app.api.urls')),
     path('api/', include('board_app.api.urls')),
     path('api/', include('task_app.api.urls')),
@@ -0,0 +1,28 @@
+import hmac
+
+from django.conf import settings
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.views import View
+
+from core.metrics import render_metrics
+
+
+class MetricsView(View):
+    """
+    GET /api/_metrics in prometheus text format.
+    scrapers send Authorization: Bearer <METRICS['TOKEN']>, without a
+    token the endpoint only exists when DEBUG is on.
+    """
+    record_metrics = False
+
+    def get(self, request):
+        token = getattr(settings, 'METRICS', {}).get('TOKEN')
+        if not token:
+            if not settings.DEBUG:
+                raise Http404
+        elif not hmac.compare_digest(
+                request.META.get('HTTP_AUTHORIZATION', '').encode(),
+                f'Bearer {token}'.encode()):
+            return HttpResponseForbidden()
+        return HttpResponse(
+            render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,196 @@
+from datetime import date
+
+from django.db.models import Case, Count, F, IntegerField, Value, When
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+from rest_framework.response import Response
+
+from task_app.models import Task
+from .fast_serializers import get_fast_serializer
+from .pagination import OptionalCursorPagination, stream_json_chunks, wants_stream
+
+
+STATUS_VALUES = [value for value, label in Task.STATUS_CHOICES]
+PRIORITY_VALUES = [value for value, label in Task.PRIORITY_CHOICES]
+
+# columns the nested user serializers read
+USER_COLUMNS = ('id', 'email', 'first_name', 'last_name', 'username')
+USER_FIELDS = ('assignee', 'reviewer')
+
+
+def parse_list(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+def parse_date(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: "Must be a date (YYYY-MM-DD)."})
+
+
+class TaskFilterBackend(BaseFilterBackend):
+    """
+    ?status=to-do,review  ?priority=high  ?board=1,2
+    ?due_from=2025-01-01&due_to=2025-01-31 (inclusive)
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        for name, allowed in (('status', STATUS_VALUES), ('priority', PRIORITY_VALUES)):
+            values = parse_list(request, name)
+            if values is None:
+                continue
+            invalid = [value for value in values if value not in allowed]
+            if invalid:
+                raise ValidationError({name: f"Unknown value(s): {', '.join(invalid)}."})
+            queryset = queryset.filter(**{f'{name}__in': values})
+
+        boards = parse_list(request, 'board')
+        if boards is not None:
+            if not all(board.isdigit() for board in boards):
+                raise ValidationError({'board': "Must be board ids."})
+            queryset = queryset.filter(board_id__in=boards)
+
+        due_from = parse_date(request, 'due_from')
+        if due_from is not None:
+            queryset = queryset.filter(due_date__gte=due_from)
+        due_to = parse_date(request, 'due_to')
+        if due_to is not None:
+            queryset = queryset.filter(due_date__lte=due_to)
+        return queryset
+
+
+def choice_rank(field, values):
+    """
+    orders choices by their declared order instead of alphabetically.
+    """
+    return Case(
+        *[When(**{field: value}, then=Value(rank)) for rank, value in enumerate(values)],
+        output_field=IntegerField(),
+    )
+
+
+class TaskOrderingFilter(BaseFilterBackend):
+    """
+    ?ordering=due_date,-priority
+    priority and status follow their workflow order, tasks without
+    due date come last. id breaks ties.
+    cursor pagination keeps its own (created_at, id) order, the
+    combination with ?cursor= or ?page_size= is rejected.
+    """
+    ordering_fields = ('created_at', 'updated_at', 'due_date', 'title', 'priority', 'status')
+
+    def filter_queryset(self, request, queryset, view):
+        fields = parse_list(request, 'ordering')
+        if not fields:
+            return queryset
+        if OptionalCursorPagination.is_requested(request) and not wants_stream(request):
+            raise ValidationError(
+                {'ordering': "Cursor pages are ordered by created_at, id."})
+
+        expressions = []
+        for field in fields:
+            name = field.lstrip('-')
+            if name not in self.ordering_fields:
+                raise ValidationError({'ordering': f"Cannot order by {name}."})
+            if name == 'priority':
+                expression = choice_rank('priority', PRIORITY_VALUES)
+            elif name == 'status':
+                expression = choice_rank('status', STATUS_VALUES)
+            else:
+                expression = F(name)
+            descending = field.startswith('-')
+            expressions.append(expression.desc(nulls_last=True) if descending
+                               else expression.asc(nulls_last=True))
+        return queryset.order_by(*expressions, 'id')
+
+
+def parse_fields(request, serializer_class):
+    """
+    ?fields=id,title,status, validated against the serializer fields.
+    None if the client wants every field.
+    """
+    fields = parse_list(request, 'fields')
+    if fields is None:
+        return None
+    allowed = serializer_class.Meta.fields
+    invalid = [field for field in fields if field not in allowed]
+    if invalid or not fields:
+        raise ValidationError({'fields': f"Allowed fields: {', '.join(allowed)}."})
+    return fields
+
+
+def select_task_fields(queryset, fields):
+    """
+    loads only what the requested fields need: nested users are joined
+    and comments are counted only if requested, other columns are deferred.
+    fields=None loads everything.
+    """
+    if fields is None:
+        return queryset.select_related(*USER_FIELDS).annotate(
+            comments_count=Count('comments'))
+
+    # created_at and id are always loaded for cursor pagination
+    columns = {'id', 'created_at'}
+    related = []
+    for field in fields:
+        if field in USER_FIELDS:
+            related.append(field)
+            columns.update(f'{field}__{column}' for column in USER_COLUMNS)
+        elif field != 'comments_count':
+            columns.add(field)
+
+    queryset = queryset.only(*columns)
+    if related:
+        # select_related() without arguments would follow every foreign key
+        queryset = queryset.select_related(*related)
+    if 'comments_count' in fields:
+        queryset = queryset.annotate(comments_count=Count('comments'))
+    return queryset
+
+
+class TaskListMixin:
+    """
+    filters, ordering, sparse fieldsets and ?stream=1 for task list views.
+    get_task_queryset() returns the unfiltered tasks of the view.
+    plain lists and streams are built from .values() rows by the fast
+    serializer, cursor pages go through the DRF serializer.
+    """
+    filter_backends = [TaskFilterBackend, TaskOrderingFilter]
+    pagination_class = OptionalCursorPagination
+    stream_chunk_size = 500
+
+    def get_requested_fields(self):
+        if not hasattr(self, '_requested_fields'):
+            self._requested_fields = parse_fields(
+                self.request, self.get_serializer_class())
+        return self._requested_fields
+
+    def get_queryset(self):
+        return select_task_fields(self.get_task_queryset(), self.get_requested_fields())
+
+    def get_serializer(self, *args, **kwargs):
+        kwargs.setdefault('fields', self.get_requested_fields())
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        streaming = wants_stream(request)
+        if not streaming and OptionalCursorPagination.is_requested(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_task_queryset())
+        fast = get_fast_serializer(
+            self.get_serializer_class(), self.get_requested_fields())
+        if not streaming:
+            return Response(fast.data(queryset))
+        if not queryset.query.order_by:
+            queryset = queryset.order_by('created_at', 'id')
+        return stream_json_chunks(
+            fast.values(queryset).iterator(chunk_size=self.stream_chunk_size),
+            fast.serialize, self.stream_chunk_size)
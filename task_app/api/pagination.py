@@ -0,0 +1,214 @@
+import json
+from itertools import islice
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from core.renderers import FastJSONRenderer
+from core.responses import ChunkedStreamingHttpResponse
+
+
+def reverse_ordering(ordering):
+    return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+
+def keyset_after(ordering, values):
+    """
+    rows after the position values in ordering, e.g. for (created_at, id):
+    created_at >= :created_at and (created_at > :created_at
+    or created_at = :created_at and id > :id). the leading >= keeps
+    the index range scan on the first column.
+    """
+    fields = [(field.lstrip('-'), 'lt' if field.startswith('-') else 'gt') for field in ordering]
+    after = Q()
+    for index, (field, lookup) in enumerate(fields):
+        equal = {name: value for (name, _), value in zip(fields[:index], values)}
+        after |= Q(**equal, **{f'{field}__{lookup}': values[index]})
+    first, lookup = fields[0]
+    inclusive = {'gt': 'gte', 'lt': 'lte'}[lookup]
+    return Q(**{f'{first}__{inclusive}': values[0]}) & after
+
+
+class OptionalCursorPagination(CursorPagination):
+    """
+    opt-in keyset pagination on (created_at, id).
+    only active if the client sends ?cursor= or ?page_size=,
+    otherwise the endpoint keeps returning the plain list.
+    unlike drf's cursor (first ordering field plus an offset for ties)
+    the cursor holds every ordering value, pages start with a keyset
+    filter and never with an OFFSET. the ordering has to end with a
+    unique field.
+    """
+    ordering = ('created_at', 'id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+    @staticmethod
+    def is_requested(request):
+        params = request.query_params
+        return 'cursor' in params or 'page_size' in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if not self.is_requested(request):
+            return None
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        position = self.cursor.position if self.cursor else None
+
+        ordering = reverse_ordering(self.ordering) if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(
+                keyset_after(ordering, self.parse_position(queryset.model, position)))
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        following = None
+        if len(results) > len(self.page):
+            following = self._get_position_from_instance(results[-1], self.ordering)
+
+        # positions are unique, the inherited link building never needs an offset
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.next_position = position is not None, position
+            self.has_previous, self.previous_position = following is not None, following
+        else:
+            self.has_next, self.next_position = following is not None, following
+            self.has_previous, self.previous_position = position is not None, position
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for field in ordering:
+            name = field.lstrip('-')
+            value = instance[name] if isinstance(instance, dict) else getattr(instance, name)
+            values.append(str(value))
+        return json.dumps(values)
+
+    def parse_position(self, model, position):
+        try:
+            values = json.loads(position)
+            if not isinstance(values, list) or len(values) != len(self.ordering):
+                raise ValueError
+            return [model._meta.get_field(field.lstrip('-')).to_python(value)
+                    for field, value in zip(self.ordering, values)]
+        except (ValueError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class CommentCursorPagination(OptionalCursorPagination):
+    """
+    optional keyset pagination in the order the view asks for,
+    oldest or newest comments first.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        return view.get_ordering()
+
+
+class RankedPagination(LimitOffsetPagination):
+    """
+    limit/offset for ranked results that are not a queryset (search).
+    no count query: the caller fetches limit + 1 rows to know
+    whether a next page exists.
+    """
+    default_limit = 20
+    max_limit = 100
+
+    def get_window(self, request):
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.offset = self.get_offset(request)
+        return self.limit, self.offset
+
+    def get_paginated_response(self, data, has_more=False):
+        url = self.request.build_absolute_uri()
+        next_link = None
+        if has_more:
+            next_link = replace_query_param(
+                url, self.offset_query_param, self.offset + self.limit)
+        previous_link = None
+        if self.offset > 0:
+            previous_offset = max(self.offset - self.limit, 0)
+            previous_link = (
+                replace_query_param(url, self.offset_query_param, previous_offset)
+                if previous_offset else remove_query_param(url, self.offset_query_param))
+        return Response({'next': next_link, 'previous': previous_link, 'results': data})
+
+
+def wants_stream(request):
+    """
+    true if the client asked for the streaming response mode (?stream=1).
+    """
+    return request.query_params.get('stream') in ('1', 'true')
+
+
+def stream_json_chunks(rows, serialize, chunk_size=500):
+    """
+    streams rows as json array, serialize() turns a chunk of rows
+    into a list. rows should come from a server-side iterator, under
+    ASGI they are read chunk by chunk as well (core.responses).
+    """
+    renderer = FastJSONRenderer()
+
+    def generate():
+        yield b'['
+        first = True
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            body = renderer.render(serialize(chunk))[1:-1]
+            if not body:
+                continue
+            if not first:
+                yield b','
+            yield body
+            first = False
+        yield b']'
+
+    return ChunkedStreamingHttpResponse(generate(), content_type='application/json')
+
+
+def stream_json_list(queryset, serializer_class, context=None, chunk_size=500):
+    """
+    streams a queryset as json array.
+    rows come from a server-side iterator and are serialized chunk by chunk,
+    so the full list is never held in memory.
+    """
+    return stream_json_chunks(
+        queryset.iterator(chunk_size=chunk_size),
+        lambda chunk: serializer_class(chunk, many=True, context=context).data,
+        chunk_size,
+    )
+
+
+class StreamingListMixin:
+    """
+    adds ?stream=1 to a ListAPIView.
+    streams in (created_at, id) order unless a filter ordered the queryset.
+    """
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        if wants_stream(request):
+            queryset = self.filter_queryset(self.get_queryset())
+            if not queryset.query.order_by:
+                queryset = queryset.order_by('created_at', 'id')
+            return stream_json_list(
+                queryset,
+                self.get_serializer_class(),
+                context=self.get_serializer_context(),
+                chunk_size=self.stream_chunk_size,
+            )
+        return super().list(request, *args, **kwargs)
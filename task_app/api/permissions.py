@@ -1,5 +1,7 @@
 from rest_framework import permissions
 
+from board_app.membership import is_board_member
+
 
 class IsBoardMember(permissions.BasePermission):
     """
@@ -8,7 +10,7 @@ class IsBoardMember(permissions.BasePermission):
 
     def has_object_permission(self, request, view, obj):
         # obj is the task instance
-        return request.user in obj.board.members.all() or request.user == obj.board.owner
+        return is_board_member(obj.board, request.user, request)
 
 
 class IsTaskCreatorOrBoardOwner(permissions.BasePermission):
@@ -28,4 +30,4 @@ class IsCommentAuthor(permissions.BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        return obj.author == request.user
+        return obj.author_id == request.user.id
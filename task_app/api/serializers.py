@@ -2,10 +2,31 @@ from rest_framework import serializers
 from rest_framework.exceptions import PermissionDenied
 
 from django.contrib.auth.models import User
+from django.db import transaction
 
 
 from task_app.models import Task, Comment
 from board_app.models import Board
+from board_app.membership import is_board_member
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    resolves ids from context['preloaded'] ({model: {pk: obj}}) if present.
+    lets bulk requests load all related rows up front,
+    unknown ids fall back to the normal lookup and its error messages.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get('preloaded', {}).get(self.queryset.model)
+        if preloaded is not None:
+            try:
+                obj = preloaded.get(int(data))
+            except (TypeError, ValueError):
+                obj = None
+            if obj is not None:
+                return obj
+        return super().to_internal_value(data)
 
 
 class TaskCreateSerializer(serializers.ModelSerializer):
@@ -13,10 +34,10 @@ class TaskCreateSerializer(serializers.ModelSerializer):
     serializer for creating a task.
     accept Ids for relations.
     """
-    board = serializers.PrimaryKeyRelatedField(queryset=Board.objects.all())
-    assignee_id = serializers.PrimaryKeyRelatedField(
+    board = PreloadedPrimaryKeyRelatedField(queryset=Board.objects.all())
+    assignee_id = PreloadedPrimaryKeyRelatedField(
         queryset=User.objects.all(), required=False, allow_null=True, source='assignee')
-    reviewer_id = serializers.PrimaryKeyRelatedField(
+    reviewer_id = PreloadedPrimaryKeyRelatedField(
         queryset=User.objects.all(), required=False, allow_null=True, source='reviewer')
 
     class Meta:
@@ -33,11 +54,11 @@ class TaskCreateSerializer(serializers.ModelSerializer):
         ]
 
     def validate(self, data):
-        user = self.context['request'].user
+        request = self.context['request']
         board = data['board']
 
         # API DOC requires 403 Forbiddenif not member
-        if user != board.owner and user not in board.members.all():
+        if not is_board_member(board, request.user, request):
             raise PermissionDenied(
                 "you must be a board member to create tasks.")
         self._validated_members(board, data.get('assignee'), "assignee_id")
@@ -45,12 +66,15 @@ class TaskCreateSerializer(serializers.ModelSerializer):
         return data
 
     def _validated_members(self, board, user, field_name):
-        if user and user != board.owner and user not in board.members.all():
+        request = self.context.get('request')
+        if user and not is_board_member(board, user, request):
             raise serializers.ValidationError(
                 {field_name: "Must be a board member."}
             )
 
+    @transaction.atomic
     def create(self, validated_data):
+        # board counters are updated by task_app.signals in this transaction
         creator = self.context['request'].user
         return Task.objects.create(creator=creator, **validated_data)
 
@@ -59,9 +83,9 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
     """
     serializer for updating a task.
     """
-    assignee_id = serializers.PrimaryKeyRelatedField(
+    assignee_id = PreloadedPrimaryKeyRelatedField(
         queryset=User.objects.all(), required=False, allow_null=True, source='assignee')
-    reviewer_id = serializers.PrimaryKeyRelatedField(
+    reviewer_id = PreloadedPrimaryKeyRelatedField(
         queryset=User.objects.all(), required=False, allow_null=True, source='reviewer')
 
     class Meta:
@@ -79,23 +103,53 @@ class TaskUpdateSerializer(serializers.ModelSerializer):
     def validate(self, data):
         task = self.instance
         board = task.board
+        request = self.context.get('request')
 
         if 'assignee' in data:
             assignee = data['assignee']
-            if assignee and assignee not in board.members.all():
+            if assignee and not is_board_member(board, assignee, request):
                 raise serializers.ValidationError(
                     {"assignee_id": "Assignee must be board member."}
                 )
 
         if 'reviewer' in data:
             reviewer = data['reviewer']
-            if reviewer and reviewer not in board.members.all():
+            if reviewer and not is_board_member(board, reviewer, request):
                 raise serializers.ValidationError(
                     {"reviewer_id": "Reviewer must be board member."}
                 )
         return data
 
 
+class TaskBulkUpdateSerializer(TaskUpdateSerializer):
+    """
+    serializer for one update item of the bulk endpoint.
+    same rules as TaskUpdateSerializer, limited to the board fields.
+    """
+
+    class Meta(TaskUpdateSerializer.Meta):
+        fields = [
+            'status',
+            'priority',
+            'assignee_id',
+            'reviewer_id',
+            'due_date',
+        ]
+
+
+class SparseFieldsMixin:
+    """
+    fields=[...] keeps only the given fields (sparse fieldsets),
+    the other fields are never evaluated.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
 class UserPreviewSerializer(serializers.ModelSerializer):
     """
     serializer for displaying user info in task.
@@ -115,7 +169,8 @@ class CommentSerializer(serializers.ModelSerializer):
     """
     serializer for comments.
     """
-    author = serializers.SerializerMethodField()
+    # denormalized display name, no user row needed
+    author = serializers.CharField(source='author_name', read_only=True)
 
     class Meta:
         model = Comment
@@ -126,12 +181,8 @@ class CommentSerializer(serializers.ModelSerializer):
             'content'
         ]
 
-    def get_author(self, obj):
-        full = obj.author.get_full_name()
-        return full if full else obj.author.username
-
 
-class TaskReadSerializer(serializers.ModelSerializer):
+class TaskReadSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     """
     serializer for reading task data (nested objects).
     """
@@ -155,6 +206,10 @@ class TaskReadSerializer(serializers.ModelSerializer):
         ]
 
     def get_comments_count(self, obj):
+        # annotated by the list views, single query otherwise
+        annotated = getattr(obj, 'comments_count', None)
+        if annotated is not None:
+            return annotated
         return obj.comments.count()
 
 
@@ -1,7 +1,7 @@
 from django.urls import path
 
 
-from .views import TaskCommentDeleteView, TaskCreateView, TaskDetailView, TasksAssignedToMeView, TasksReviewingView, TaskCommentView
+from .views import TaskBulkView, TaskSearchView, TaskCommentDeleteView, TaskCreateView, TaskDetailView, TasksAssignedToMeView, TasksReviewingView, TaskCommentView
 
 
 urlpatterns = [
@@ -10,6 +10,8 @@ urlpatterns = [
     path("tasks/reviewing/", TasksReviewingView.as_view(),
          name="tasks-reviewing"),
     path("tasks/", TaskCreateView.as_view(), name="task-create"),
+    path("tasks/bulk/", TaskBulkView.as_view(), name="task-bulk"),
+    path("tasks/search/", TaskSearchView.as_view(), name="task-search"),
     path("tasks/<int:pk>/", TaskDetailView.as_view(), name="task-detail"),
     path("tasks/<int:task_id>/comments/",
          TaskCommentView.as_view(), name="task-comments"),
@@ -1,15 +1,25 @@
 from rest_framework.generics import ListAPIView, CreateAPIView, RetrieveUpdateDestroyAPIView, ListCreateAPIView, DestroyAPIView
 from rest_framework.response import Response
+from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Count, Q
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
 
 
 from board_app.models import Board
+from board_app.membership import get_member_ids, is_board_member
 from task_app.models import Task, Comment
+from task_app.search import get_backend, parse_terms
+from task_app.signals import counter_state, tasks_bulk_changed
+from .filters import TaskListMixin
+from .pagination import CommentCursorPagination, RankedPagination, StreamingListMixin
 from .permissions import IsBoardMember, IsTaskCreatorOrBoardOwner, IsCommentAuthor
-from .serializers import TaskCreateSerializer, TaskReadSerializer, TaskUpdateSerializer, CommentSerializer, TaskUpdateResponseSerializer
+from .serializers import TaskBulkUpdateSerializer, TaskCreateSerializer, TaskReadSerializer, TaskUpdateSerializer, CommentSerializer, TaskUpdateResponseSerializer
 
 
 class TaskCreateView(CreateAPIView):
@@ -35,38 +45,329 @@ class TaskCreateView(CreateAPIView):
         return Response(response_serializer.data, status=status.HTTP_201_CREATED)
 
 
-class TasksAssignedToMeView(ListAPIView):
+MAX_ID = 2 ** 63 - 1
+
+
+def parse_id(value):
+    """
+    int for an id sent as number or numeric string, None if invalid.
+    """
+    if isinstance(value, str) and value.isascii() and value.isdigit():
+        value = int(value)
+    if isinstance(value, bool) or not isinstance(value, int) or not 0 < value <= MAX_ID:
+        return None
+    return value
+
+
+def clean_item(item, id_fields):
+    """
+    copy of a bulk item with its ids as ints.
+    returns (item, None) or (None, errors) for a malformed item.
+    """
+    if not isinstance(item, dict):
+        return None, {"detail": "Invalid item."}
+    item = dict(item)
+    errors = {}
+    for field in id_fields:
+        if item.get(field) is None:
+            continue
+        value = parse_id(item[field])
+        if value is None:
+            errors[field] = "Must be an id."
+        else:
+            item[field] = value
+    return (None, errors) if errors else (item, None)
+
+
+class TaskBulkView(APIView):
+    """
+    endpoint for batched task changes in one transaction.
+    POST /api/tasks/bulk/
+    body: {"create": [task, ...],
+           "update": [{"id": 1, "status": "done", ...}, ...],
+           "delete": [1, 2, ...]}
+    items follow the rules of the single task endpoints, ids may be sent
+    as numbers or numeric strings. if any item fails, nothing is written
+    and the per-item results are returned with 400.
+    """
+    permission_classes = [IsAuthenticated]
+    max_items = 100
+
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response({"detail": "Expected an object with create, update and delete."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        create_items = request.data.get('create', [])
+        update_items = request.data.get('update', [])
+        delete_ids = request.data.get('delete', [])
+
+        if not all(isinstance(items, list)
+                   for items in (create_items, update_items, delete_ids)):
+            return Response({"detail": "create, update and delete must be lists."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if len(create_items) + len(update_items) + len(delete_ids) > self.max_items:
+            return Response({"detail": f"At most {self.max_items} items per request."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # (item, errors) pairs, ids are ints from here on
+        create_items = [clean_item(item, ('board', 'assignee_id', 'reviewer_id'))
+                        for item in create_items]
+        update_items = [clean_item(item, ('id', 'assignee_id', 'reviewer_id'))
+                        for item in update_items]
+        delete_ids = [parse_id(task_id) for task_id in delete_ids]
+
+        tasks = self.load_tasks(update_items, delete_ids)
+        context = {'request': request, 'view': self,
+                   'preloaded': self.preload_related(create_items, update_items, tasks)}
+
+        create_results, new_tasks = self.validate_create(create_items, context)
+        update_results, changed_tasks = self.validate_update(
+            update_items, tasks, context)
+        delete_results, deleted_ids = self.validate_delete(delete_ids, tasks)
+
+        results = {
+            'create': create_results,
+            'update': update_results,
+            'delete': delete_results,
+        }
+        failed = any(item['status'] >= 400
+                     for items in results.values() for item in items)
+        if failed:
+            # valid items are not applied either (424 failed dependency)
+            for items in results.values():
+                for item in items:
+                    if item['status'] < 400:
+                        item['status'] = status.HTTP_424_FAILED_DEPENDENCY
+                        item['errors'] = {"detail": "Not applied, another item failed."}
+            return Response(results, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            self.write(new_tasks, changed_tasks, deleted_ids)
+
+        for result, task in zip(create_results, new_tasks):
+            result['data'] = TaskReadSerializer(task).data
+        for result, (previous, task) in zip(update_results, changed_tasks):
+            result['data'] = TaskUpdateResponseSerializer(task).data
+        return Response(results, status=status.HTTP_200_OK)
+
+    def load_tasks(self, update_items, delete_ids):
+        """
+        loads every task referenced by update or delete in one query.
+        """
+        ids = [item['id'] for item, errors in update_items if item and 'id' in item]
+        ids += [task_id for task_id in delete_ids if task_id is not None]
+        return Task.objects.select_related(
+            'board', 'assignee', 'reviewer').in_bulk(ids)
+
+    def preload_related(self, create_items, update_items, tasks):
+        """
+        loads referenced boards and users in one query each and the member
+        ids of every board, so membership is checked once per board.
+        """
+        board_ids, user_ids = set(), set()
+        for item, errors in create_items + update_items:
+            if item is None:
+                continue
+            board_ids.add(item.get('board'))
+            user_ids.update([item.get('assignee_id'), item.get('reviewer_id')])
+
+        boards = Board.objects.in_bulk(
+            [pk for pk in board_ids if isinstance(pk, int)])
+        users = User.objects.in_bulk(
+            [pk for pk in user_ids if isinstance(pk, int)])
+
+        for board_id in set(boards) | {task.board_id for task in tasks.values()}:
+            get_member_ids(board_id, self.request)
+        return {Board: boards, User: users}
+
+    def validate_create(self, items, context):
+        results, new_tasks = [], []
+        for item, errors in items:
+            if errors:
+                results.append({'status': 400, 'errors': errors})
+                continue
+            board_id = item.get('board')
+            if board_id and board_id not in context['preloaded'][Board]:
+                results.append({'status': 404, 'errors': {"board": "Board not found."}})
+                continue
+
+            serializer = TaskCreateSerializer(data=item, context=context)
+            try:
+                valid = serializer.is_valid()
+            except PermissionDenied as exc:
+                results.append({'status': 403, 'errors': {"detail": exc.detail}})
+                continue
+            if not valid:
+                results.append({'status': 400, 'errors': serializer.errors})
+                continue
+
+            task = Task(creator=context['request'].user, **serializer.validated_data)
+            task.comments_count = 0
+            new_tasks.append(task)
+            results.append({'status': 201})
+        return results, new_tasks
+
+    def validate_update(self, items, tasks, context):
+        results, changed_tasks = [], []
+        request = context['request']
+        for item, errors in items:
+            if errors:
+                results.append({'id': None, 'status': 400, 'errors': errors})
+                continue
+            task_id = item.get('id')
+            task = tasks.get(task_id)
+            if task is None:
+                results.append({'id': task_id, 'status': 404,
+                                'errors': {"detail": "Task not found."}})
+                continue
+            if not is_board_member(task.board, request.user, request):
+                results.append({'id': task_id, 'status': 403,
+                                'errors': {"detail": "you must be a board member to update tasks."}})
+                continue
+
+            fields = {key: value for key, value in item.items() if key != 'id'}
+            serializer = TaskBulkUpdateSerializer(
+                task, data=fields, partial=True, context=context)
+            if not serializer.is_valid():
+                results.append({'id': task_id, 'status': 400,
+                                'errors': serializer.errors})
+                continue
+
+            previous = counter_state(task)
+            for attr, value in serializer.validated_data.items():
+                setattr(task, attr, value)
+            changed_tasks.append((previous, task))
+            results.append({'id': task_id, 'status': 200})
+        return results, changed_tasks
+
+    def validate_delete(self, delete_ids, tasks):
+        """
+        same rule as IsTaskCreatorOrBoardOwner.
+        """
+        results, deleted_ids = [], []
+        user = self.request.user
+        for task_id in delete_ids:
+            if task_id is None:
+                results.append({'id': None, 'status': 400,
+                                'errors': {"detail": "Must be a task id."}})
+                continue
+            task = tasks.get(task_id)
+            if task is None:
+                results.append({'id': task_id, 'status': 404,
+                                'errors': {"detail": "Task not found."}})
+            elif user.id not in (task.creator_id, task.board.owner_id):
+                results.append({'id': task_id, 'status': 403,
+                                'errors': {"detail": "only the creator or board owner can delete tasks."}})
+            else:
+                deleted_ids.append(task_id)
+                results.append({'id': task_id, 'status': 204})
+        return results, deleted_ids
+
+    def write(self, new_tasks, changed_tasks, deleted_ids):
+        Task.objects.bulk_create(new_tasks)
+
+        updated = [task for previous, task in changed_tasks]
+        if updated:
+            # the loaded states may be stale, counter deltas start
+            # from the rows as they are locked in this transaction
+            locked = {row[0]: row[1:] for row in Task.objects.select_for_update(
+                no_key=True).filter(id__in=[task.pk for task in updated]).values_list(
+                'id', 'board_id', 'status', 'priority')}
+            changed_tasks[:] = [(locked.get(task.pk, previous), task)
+                                for previous, task in changed_tasks]
+            # bulk_update skips pre_save, auto_now is set by hand
+            now = timezone.now()
+            for task in updated:
+                task.updated_at = now
+            Task.objects.bulk_update(
+                updated, ['status', 'priority', 'assignee', 'reviewer', 'due_date', 'updated_at'])
+
+        # queryset delete still sends post_delete per task (counters, caches),
+        # the rows are locked first so it loads their current state
+        if deleted_ids:
+            tasks = Task.objects.filter(id__in=deleted_ids)
+            list(tasks.select_for_update().values_list('id', flat=True))
+            tasks.delete()
+
+        tasks_bulk_changed.send(
+            sender=Task, created=new_tasks, updated=changed_tasks)
+
+
+class TasksAssignedToMeView(TaskListMixin, ListAPIView):
     """
     endpoint to get tasjs assigned to current user
     GET /api/tasks/assigned-to-me/
+    optional: ?cursor= / ?page_size= for pagination, ?stream=1 for streaming,
+    filters, ?ordering= and ?fields= (see TaskListMixin).
     """
     serializer_class = TaskReadSerializer
     permission_classes = [IsAuthenticated]
+    use_read_replica = True
 
-    def get_queryset(self):
-        user = self.request.user
-        return Task.objects.filter(assignee=user).select_related(
-            'assignee',
-            'reviewer',
-            'board'
-        )
+    def get_task_queryset(self):
+        return Task.objects.filter(assignee=self.request.user)
 
 
-class TasksReviewingView(ListAPIView):
+class TasksReviewingView(TaskListMixin, ListAPIView):
     """
     endpoint to get tasks reviewed by current user
     GET /api/tasks/reviewing/
+    optional: ?cursor= / ?page_size= for pagination, ?stream=1 for streaming,
+    filters, ?ordering= and ?fields= (see TaskListMixin).
     """
     serializer_class = TaskReadSerializer
     permission_classes = [IsAuthenticated]
+    use_read_replica = True
 
-    def get_queryset(self):
-        user = self.request.user
-        return Task.objects.filter(reviewer=user).select_related(
-            'assignee',
-            'reviewer',
-            'board'
-        )
+    def get_task_queryset(self):
+        return Task.objects.filter(reviewer=self.request.user)
+
+
+class TaskSearchView(APIView):
+    """
+    endpoint for full-text search over task title, description and comments
+    GET /api/tasks/search/?q=...&board=...
+    ranked, only boards of the current user, ?limit= / ?offset= pagination.
+    """
+    permission_classes = [IsAuthenticated]
+    pagination_class = RankedPagination
+
+    def get(self, request):
+        terms = parse_terms(request.query_params.get('q'))
+        if not terms:
+            return Response({"error": "Provide a search term (q)."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        boards = self.get_boards(request)
+        paginator = self.pagination_class()
+        limit, offset = paginator.get_window(request)
+        task_ids = get_backend().search(terms, boards, limit + 1, offset)
+        has_more = len(task_ids) > limit
+        task_ids = task_ids[:limit]
+
+        tasks = Task.objects.select_related(
+            'assignee', 'reviewer', 'board'
+        ).annotate(comments_count=Count('comments')).in_bulk(task_ids)
+        data = TaskReadSerializer(
+            [tasks[pk] for pk in task_ids if pk in tasks], many=True).data
+        return paginator.get_paginated_response(data, has_more)
+
+    def get_boards(self, request):
+        """
+        ids of the boards to search in, as a subquery.
+        """
+        board_id = request.query_params.get('board')
+        if board_id is None:
+            user = request.user
+            return Board.objects.filter(
+                Q(owner=user) | Q(members=user)).values('id')
+
+        if not board_id.isdigit():
+            raise ValidationError({"board": "Must be a board id."})
+        board = get_object_or_404(Board, id=board_id)
+        if not is_board_member(board, request.user, request):
+            raise PermissionDenied("you must be a board member to search its tasks.")
+        return Board.objects.filter(id=board.id).values('id')
 
 
 class TaskDetailView(RetrieveUpdateDestroyAPIView):
@@ -76,6 +377,13 @@ class TaskDetailView(RetrieveUpdateDestroyAPIView):
     """
     queryset = Task.objects.all()
 
+    def get_queryset(self):
+        # board is needed by every permission check
+        queryset = super().get_queryset().select_related('board')
+        if self.request.method == 'GET':
+            queryset = queryset.annotate(comments_count=Count('comments'))
+        return queryset
+
     def get_permissions(self):
         """
         dynamic permissions based on action.
@@ -103,29 +411,58 @@ class TaskDetailView(RetrieveUpdateDestroyAPIView):
         response_serializer = TaskUpdateResponseSerializer(instance)
         return Response(response_serializer.data)
 
+    def perform_update(self, serializer):
+        # keep task row and board counters consistent
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            # counters are decremented from the current row, not the loaded one
+            instance.refresh_from_db(
+                fields=['board', 'status', 'priority'],
+                from_queryset=Task.objects.select_for_update())
+            instance.delete()
 
-class TaskCommentView(ListCreateAPIView):
+
+class TaskCommentView(StreamingListMixin, ListCreateAPIView):
     """
     endpoint to list and create comments for a task.
     GET/POST /api/tasks/{id}/comments/
+    optional: ?cursor= / ?page_size= for pagination, ?stream=1 for streaming,
+    ?ordering=-created_at for newest first.
     """
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = CommentCursorPagination
+    use_read_replica = True
+    # served by the (task, created_at, id) index in both directions
+    orderings = {
+        'created_at': ('created_at', 'id'),
+        '-created_at': ('-created_at', '-id'),
+    }
+
+    def get_ordering(self):
+        ordering = self.request.query_params.get('ordering', 'created_at')
+        if ordering not in self.orderings:
+            raise ValidationError({'ordering': "Use created_at or -created_at."})
+        return self.orderings[ordering]
 
     def get_queryset(self):
         task_id = self.kwargs.get('task_id')
-        task = get_object_or_404(Task, id=task_id)
+        task = get_object_or_404(Task.objects.select_related('board'), id=task_id)
 
         # check board membership(403 forbidden)
-        if self.request.user != task.board.owner and self.request.user not in task.board.members.all():
+        if not is_board_member(task.board, self.request.user, self.request):
             raise PermissionDenied(
                 "you must be a board member to view comments")
-        return task.comments.all().order_by('created_at')
+        # author names are stored on the comments, no join needed
+        return task.comments.order_by(*self.get_ordering())
 
     def perform_create(self, serializer):
         task_id = self.kwargs.get('task_id')
-        task = get_object_or_404(Task, id=task_id)
-        if self.request.user != task.board.owner and self.request.user not in task.board.members.all():
+        task = get_object_or_404(Task.objects.select_related('board'), id=task_id)
+        if not is_board_member(task.board, self.request.user, self.request):
             raise PermissionDenied(
                 "you must be a board member to add comments")
         serializer.save(author=self.request.user, task=task)
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TaskAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'task_app'
+
+    def ready(self):
+        # connect signal receivers
+        from task_app import signals  # noqa: F401
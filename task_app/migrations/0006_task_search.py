@@ -0,0 +1,57 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:05
+
+from django.db import migrations
+
+
+def create_search_index(apps, schema_editor):
+    """
+    full-text index of task title, description and comments,
+    one row per task. sqlite uses an FTS5 table (rowid = task id),
+    postgresql a tsvector column with a GIN index.
+    other databases fall back to icontains, see task_app.search.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS task_search USING fts5('
+            'title, description, comments, board_id UNINDEXED, '
+            "tokenize='unicode61 remove_diacritics 2')")
+        schema_editor.execute(
+            'INSERT INTO task_search (rowid, title, description, comments, board_id) '
+            'SELECT t.id, t.title, t.description, '
+            "COALESCE((SELECT group_concat(c.content, char(10)) FROM task_app_comment c "
+            "WHERE c.task_id = t.id), ''), t.board_id FROM task_app_task t")
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE TABLE IF NOT EXISTS task_search ('
+            'task_id bigint PRIMARY KEY, board_id bigint NOT NULL, '
+            'document tsvector NOT NULL)')
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS task_search_document_idx '
+            'ON task_search USING GIN (document)')
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS task_search_board_idx ON task_search (board_id)')
+        schema_editor.execute(
+            'INSERT INTO task_search (task_id, board_id, document) '
+            'SELECT t.id, t.board_id, '
+            "setweight(to_tsvector('simple', t.title), 'A') || "
+            "setweight(to_tsvector('simple', t.description), 'B') || "
+            "setweight(to_tsvector('simple', COALESCE((SELECT string_agg(c.content, E'\\n') "
+            "FROM task_app_comment c WHERE c.task_id = t.id), '')), 'C') "
+            'FROM task_app_task t')
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute('DROP TABLE IF EXISTS task_search')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('task_app', '0005_task_comment_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
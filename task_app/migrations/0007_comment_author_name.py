@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+def fill_author_names(apps, schema_editor):
+    """
+    one update per comment author, same name as display_name().
+    """
+    User = apps.get_model('auth', 'User')
+    Comment = apps.get_model('task_app', 'Comment')
+    authors = User.objects.filter(comments__isnull=False).distinct().values_list(
+        'id', 'first_name', 'last_name', 'username')
+    for user_id, first_name, last_name, username in authors.iterator():
+        name = f'{first_name} {last_name}'.strip() or username
+        Comment.objects.filter(author_id=user_id).update(author_name=name[:255])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('task_app', '0006_task_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='author_name',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.RunPython(fill_author_names, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
 
@@ -42,10 +42,38 @@ class Task(models.Model):
     due_date = models.DateField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # assigned-to-me / reviewing lists, ordered for cursor pagination
+            models.Index(fields=['assignee', 'created_at', 'id'],
+                         name='task_assignee_created_idx'),
+            models.Index(fields=['reviewer', 'created_at', 'id'],
+                         name='task_reviewer_created_idx'),
+            # board counters and filters
+            models.Index(fields=['board', 'status'],
+                         name='task_board_status_idx'),
+            models.Index(fields=['board', 'priority'],
+                         name='task_board_priority_idx'),
+        ]
 
     def __str__(self):
         return self.title
 
+    def save(self, *args, **kwargs):
+        # the save signals lock the stored row to compute the counter
+        # deltas (task_app.signals), which needs a transaction
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            super().save(*args, **kwargs)
+
+
+def display_name(user):
+    """
+    full name of a user, the username if no name is set.
+    """
+    return (user.get_full_name() or user.username)[:255]
+
 
 class Comment(models.Model):
     """
@@ -55,9 +83,20 @@ class Comment(models.Model):
         Task, on_delete=models.CASCADE, related_name='comments')
     author = models.ForeignKey(
         User, on_delete=models.CASCADE, related_name='comments')
+    # display_name(author), so comment lists need no join on the users.
+    # filled on save and refreshed on renames by task_app.signals
+    author_name = models.CharField(max_length=255, blank=True)
 
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # comment thread of a task, ordered by creation
+            models.Index(fields=['task', 'created_at', 'id'],
+                         name='comment_task_created_idx'),
+        ]
 
     def __str__(self):
         return f'Comment by {self.author} on {self.task}'
@@ -0,0 +1,199 @@
+import re
+from collections import defaultdict
+
+from django.db import connection, transaction
+from django.db.models import Case, IntegerField, Q, Value, When
+
+from task_app.models import Comment, Task
+
+
+SEARCH_TABLE = 'task_search'
+MAX_TERMS = 10
+
+
+def parse_terms(query):
+    """
+    splits the user input into word tokens, quotes and operators are dropped.
+    every term must match (AND), as prefix.
+    """
+    return re.findall(r'\w+', query or '')[:MAX_TERMS]
+
+
+def load_documents(task_ids):
+    """
+    (task_id, board_id, title, description, comments) of the given tasks,
+    comments joined in creation order. two queries.
+    """
+    comments = defaultdict(list)
+    for task_id, content in Comment.objects.filter(task_id__in=task_ids).order_by(
+            'task_id', 'created_at', 'id').values_list('task_id', 'content'):
+        comments[task_id].append(content)
+    return [
+        (task_id, board_id, title, description, '\n'.join(comments[task_id]))
+        for task_id, board_id, title, description in Task.objects.filter(
+            id__in=task_ids).values_list('id', 'board_id', 'title', 'description')
+    ]
+
+
+class SqliteSearchBackend:
+    """
+    FTS5 table, rowid is the task id. ranked by bm25,
+    title weighs more than description, description more than comments.
+    """
+
+    def index_tasks(self, task_ids):
+        documents = load_documents(task_ids)
+        with connection.cursor() as cursor:
+            self._delete(cursor, task_ids)
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (rowid, board_id, title, description, comments) '
+                'VALUES (%s, %s, %s, %s, %s)', documents)
+
+    def remove_tasks(self, task_ids):
+        with connection.cursor() as cursor:
+            self._delete(cursor, task_ids)
+
+    def remove_board(self, board_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE board_id = %s', [board_id])
+
+    def _delete(self, cursor, task_ids):
+        cursor.executemany(
+            f'DELETE FROM {SEARCH_TABLE} WHERE rowid = %s', [[pk] for pk in task_ids])
+
+    def search(self, terms, boards, limit, offset):
+        match = ' '.join(f'"{term}"*' for term in terms)
+        boards_sql, boards_params = boards.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {SEARCH_TABLE} '
+                f'WHERE {SEARCH_TABLE} MATCH %s AND board_id IN ({boards_sql}) '
+                f'ORDER BY bm25({SEARCH_TABLE}, 10.0, 4.0, 1.0), rowid DESC '
+                'LIMIT %s OFFSET %s',
+                [match, *boards_params, limit, offset])
+            return [row[0] for row in cursor.fetchall()]
+
+
+class PostgresSearchBackend:
+    """
+    tsvector column with a GIN index, weights A (title), B (description),
+    C (comments), ranked by ts_rank.
+    """
+    document_sql = (
+        "setweight(to_tsvector('simple', %s), 'A') || "
+        "setweight(to_tsvector('simple', %s), 'B') || "
+        "setweight(to_tsvector('simple', %s), 'C')"
+    )
+
+    def index_tasks(self, task_ids):
+        documents = load_documents(task_ids)
+        with connection.cursor() as cursor:
+            self._delete(cursor, task_ids)
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} (task_id, board_id, document) '
+                f'VALUES (%s, %s, {self.document_sql})', documents)
+
+    def remove_tasks(self, task_ids):
+        with connection.cursor() as cursor:
+            self._delete(cursor, task_ids)
+
+    def remove_board(self, board_id):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SEARCH_TABLE} WHERE board_id = %s', [board_id])
+
+    def _delete(self, cursor, task_ids):
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE task_id = ANY(%s)', [list(task_ids)])
+
+    def search(self, terms, boards, limit, offset):
+        tsquery = ' & '.join(f"'{term}':*" for term in terms)
+        boards_sql, boards_params = boards.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT task_id FROM {SEARCH_TABLE}, to_tsquery('simple', %s) query "
+                f'WHERE document @@ query AND board_id IN ({boards_sql}) '
+                'ORDER BY ts_rank(document, query) DESC, task_id DESC '
+                'LIMIT %s OFFSET %s',
+                [tsquery, *boards_params, limit, offset])
+            return [row[0] for row in cursor.fetchall()]
+
+
+class FallbackSearchBackend:
+    """
+    no index: icontains over the columns, title hits rank first.
+    """
+
+    def index_tasks(self, task_ids):
+        pass
+
+    def remove_tasks(self, task_ids):
+        pass
+
+    def remove_board(self, board_id):
+        pass
+
+    def search(self, terms, boards, limit, offset):
+        queryset = Task.objects.filter(board_id__in=boards)
+        for term in terms:
+            queryset = queryset.filter(
+                Q(title__icontains=term) | Q(description__icontains=term)
+                | Q(comments__content__icontains=term))
+        title_hit = Q()
+        for term in terms:
+            title_hit &= Q(title__icontains=term)
+        ranked = queryset.annotate(rank=Case(
+            When(title_hit, then=Value(1)), default=Value(0),
+            output_field=IntegerField(),
+        )).order_by('-rank', '-id').values_list('id', flat=True).distinct()
+        return list(ranked[offset:offset + limit])
+
+
+class SearchReindex:
+    """
+    on_commit callback of index_tasks_on_commit,
+    collects the task ids of one transaction.
+    """
+
+    def __init__(self):
+        self.task_ids = set()
+        self.done = False
+
+    def __call__(self):
+        self.done = True
+        get_backend().index_tasks(sorted(self.task_ids))
+
+
+def index_tasks_on_commit(task_ids):
+    """
+    reindexes the tasks once the running transaction commits. a task's
+    document holds all its comments, so writing a thread of comments in
+    one transaction costs one reindex per task, not one per comment.
+    """
+    connection = transaction.get_connection()
+    for savepoints, callback, robust in connection.run_on_commit:
+        if isinstance(callback, SearchReindex) and not callback.done:
+            callback.task_ids.update(task_ids)
+            return
+    reindex = SearchReindex()
+    reindex.task_ids.update(task_ids)
+    transaction.on_commit(reindex)
+
+
+_backend = None
+
+
+def get_backend():
+    """
+    picks the backend once per process, depending on the database
+    and whether the migration could create the index table.
+    """
+    global _backend
+    if _backend is None:
+        has_table = SEARCH_TABLE in connection.introspection.table_names()
+        if has_table and connection.vendor == 'sqlite':
+            _backend = SqliteSearchBackend()
+        elif has_table and connection.vendor == 'postgresql':
+            _backend = PostgresSearchBackend()
+        else:
+            _backend = FallbackSearchBackend()
+    return _backend
@@ -0,0 +1,184 @@
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from board_app.caching import bump_board_version
+from board_app.changes import is_board_deletion, record_change, record_changes
+from board_app.counters import apply_task_changes, track_task_change
+from board_app.models import Board
+from task_app.models import Comment, Task, display_name
+from task_app.search import get_backend, index_tasks_on_commit
+
+
+# sent after bulk_create/bulk_update of tasks, which skip the model signals.
+# created: list of new tasks
+# updated: list of (previous_state, task), previous_state from counter_state()
+tasks_bulk_changed = Signal()
+
+
+TRACKED_FIELDS = ('board_id', 'status', 'priority', 'title', 'description')
+
+
+def counter_state(task):
+    return (task.board_id, task.status, task.priority)
+
+
+@receiver(pre_save, sender=Task)
+def remember_previous_state(sender, instance, **kwargs):
+    """
+    stores the persisted board/status/priority and the searchable
+    text before an update. the row is read locked inside the save
+    transaction (Task.save): the values loaded into the instance may be
+    stale, and a concurrent update must not move the task out of the
+    same counter bucket twice.
+    """
+    instance._previous_counter_state = None
+    instance._previous_search_text = None
+    if instance.pk is None:
+        return
+    previous = Task.objects.select_for_update(no_key=True).filter(
+        pk=instance.pk).values_list(*TRACKED_FIELDS).first()
+    if previous is not None:
+        instance._previous_counter_state = tuple(previous[:3])
+        instance._previous_search_text = tuple(previous[3:])
+
+
+def search_text(task):
+    return (task.title, task.description)
+
+
+@receiver(post_save, sender=Task)
+def update_counters_on_save(sender, instance, created, **kwargs):
+    """
+    moves the task between board counters after create or update,
+    reindexes it for search if board, title or description changed.
+    """
+    previous = getattr(instance, '_previous_counter_state', None)
+    track_task_change(previous, counter_state(instance))
+    bump_board_version(instance.board_id)
+    record_change(instance.board_id, 'task',
+                  'created' if created else 'updated', instance.pk)
+    if previous is not None and previous[0] != instance.board_id:
+        bump_board_version(previous[0])
+        record_change(previous[0], 'task', 'deleted', instance.pk)
+
+    if (previous is None or previous[0] != instance.board_id
+            or getattr(instance, '_previous_search_text', None) != search_text(instance)):
+        get_backend().index_tasks([instance.pk])
+
+
+@receiver(post_delete, sender=Task)
+def update_counters_on_delete(sender, instance, origin=None, **kwargs):
+    # the board, its counters, versions and search rows go away as a whole
+    if is_board_deletion(origin, instance.board_id):
+        return
+    track_task_change(counter_state(instance), None)
+    bump_board_version(instance.board_id)
+    record_change(instance.board_id, 'task', 'deleted', instance.pk)
+    get_backend().remove_tasks([instance.pk])
+
+
+@receiver(post_delete, sender=Board)
+def remove_board_from_search(sender, instance, **kwargs):
+    """
+    drops the search rows of a deleted board in one statement.
+    """
+    get_backend().remove_board(instance.pk)
+
+
+def is_task_deletion(origin):
+    if isinstance(origin, Task):
+        return True
+    return getattr(origin, 'model', None) is Task
+
+
+def _comment_board_id(comment, origin=None):
+    """
+    board id of a comment without loading a task that may already be deleted.
+    lookups are memoized on the origin of a cascade delete, so deleting
+    a user's comments costs one query per task, not per comment.
+    """
+    if Comment.task.is_cached(comment):
+        return comment.task.board_id
+    memo = {}
+    if origin is not None:
+        memo = origin.__dict__.setdefault('_comment_board_ids', {})
+    if comment.task_id not in memo:
+        memo[comment.task_id] = Task.objects.filter(
+            pk=comment.task_id).values_list('board_id', flat=True).first()
+    return memo[comment.task_id]
+
+
+@receiver(pre_save, sender=Comment)
+def fill_author_name(sender, instance, **kwargs):
+    if not instance.author_name:
+        instance.author_name = display_name(instance.author)
+
+
+@receiver(post_save, sender=User)
+def refresh_author_names(sender, instance, created, update_fields, **kwargs):
+    """
+    one update for all comments of a renamed user, recorded as
+    comment updates in the change feeds of their boards.
+    """
+    if created or (update_fields and not set(update_fields) & {
+            'first_name', 'last_name', 'username'}):
+        return
+    name = display_name(instance)
+    comments = list(Comment.objects.filter(author=instance).exclude(
+        author_name=name).values_list('pk', 'task__board_id'))
+    if not comments:
+        return
+    with transaction.atomic(savepoint=False):
+        Comment.objects.filter(pk__in=[pk for pk, board_id in comments]).update(
+            author_name=name)
+        record_changes([(board_id, 'comment', 'updated', pk) for pk, board_id in comments])
+
+
+@receiver(post_save, sender=Comment)
+def bump_board_on_comment_save(sender, instance, created, **kwargs):
+    """
+    comments_count is part of the board detail payload.
+    the task is reindexed once per transaction, see index_tasks_on_commit.
+    """
+    board_id = _comment_board_id(instance)
+    if board_id is not None:
+        bump_board_version(board_id)
+        record_change(board_id, 'comment',
+                      'created' if created else 'updated', instance.pk)
+        index_tasks_on_commit([instance.task_id])
+
+
+@receiver(post_delete, sender=Comment)
+def bump_board_on_comment_delete(sender, instance, origin=None, **kwargs):
+    # comments deleted with their task or board are implied by that entry
+    if is_board_deletion(origin) or is_task_deletion(origin):
+        return
+    board_id = _comment_board_id(instance, origin)
+    if board_id is not None and not is_board_deletion(origin, board_id):
+        bump_board_version(board_id)
+        record_change(board_id, 'comment', 'deleted', instance.pk)
+        index_tasks_on_commit([instance.task_id])
+
+
+@receiver(tasks_bulk_changed)
+def update_after_bulk_change(sender, created, updated, **kwargs):
+    """
+    counters, board versions and search index for bulk writes.
+    bulk updates never change title, description or board,
+    so only created tasks are indexed.
+    """
+    changes = [(None, counter_state(task)) for task in created]
+    changes += [(previous, counter_state(task)) for previous, task in updated]
+    apply_task_changes(changes)
+
+    board_ids = {state[0] for pair in changes for state in pair if state}
+    for board_id in board_ids:
+        bump_board_version(board_id)
+
+    record_changes(
+        [(task.board_id, 'task', 'created', task.pk) for task in created]
+        + [(task.board_id, 'task', 'updated', task.pk) for previous, task in updated])
+    if created:
+        get_backend().index_tasks([task.pk for task in created])
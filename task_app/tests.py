@@ -1,3 +1,478 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from board_app.api.serializers import BoardTaskSerializer
+from board_app.models import Board, BoardChange
+from core.testing import Budget, QueryBudgetTestCase
+from task_app.api.fast_serializers import get_fast_serializer
+from task_app.api.serializers import TaskReadSerializer
+from task_app.models import Task, Comment
+from task_app.search import get_backend
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TaskListQueryCountTests(APITestCase):
+    """
+    comments_count must not trigger one query per task.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user@example.com', email='user@example.com', password='pw')
+        self.board = Board.objects.create(title='Board', owner=self.user)
+        self.board.members.add(self.user)
+        self.client.force_authenticate(self.user)
+
+    def create_tasks(self, amount):
+        for index in range(amount):
+            task = Task.objects.create(
+                board=self.board, creator=self.user, title=f'Task {index}',
+                status='to-do', priority='low',
+                assignee=self.user, reviewer=self.user)
+            Comment.objects.create(task=task, author=self.user, content='hi')
+
+    def assert_constant_queries(self, url):
+        self.create_tasks(1)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data[0]['comments_count'], 1)
+
+        self.create_tasks(20)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data), 21)
+        self.assertTrue(all(task['comments_count'] == 1
+                            for task in response.data))
+
+    def test_assigned_to_me_query_count(self):
+        self.assert_constant_queries(reverse('tasks-assigned-to-me'))
+
+    def test_reviewing_query_count(self):
+        self.assert_constant_queries(reverse('tasks-reviewing'))
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TaskSearchTests(APITestCase):
+    """
+    search runs on the index, which signals keep up to date.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user@example.com', email='user@example.com', password='pw')
+        self.other = User.objects.create_user(
+            username='other@example.com', email='other@example.com', password='pw')
+        self.board = Board.objects.create(title='Board', owner=self.user)
+        self.foreign_board = Board.objects.create(title='Foreign', owner=self.other)
+        self.client.force_authenticate(self.user)
+
+    def create_task(self, title, description='', board=None):
+        return Task.objects.create(
+            board=board or self.board, creator=self.user, title=title,
+            description=description, status='to-do', priority='low')
+
+    def search(self, **params):
+        response = self.client.get(reverse('task-search'), params)
+        self.assertEqual(response.status_code, 200)
+        return [task['title'] for task in response.data['results']]
+
+    def test_ranked_and_restricted_to_member_boards(self):
+        self.create_task('Notes', description='deploy the release')
+        self.create_task('Deploy release')
+        self.create_task('Deploy elsewhere', board=self.foreign_board)
+        self.assertEqual(self.search(q='deploy'), ['Deploy release', 'Notes'])
+        self.assertEqual(self.search(q='depl rel'), ['Deploy release', 'Notes'])
+
+    def test_index_follows_changes(self):
+        task = self.create_task('Old title')
+        task.title = 'New title'
+        task.save()
+        self.assertEqual(self.search(q='old'), [])
+        self.assertEqual(self.search(q='new'), ['New title'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            comment = Comment.objects.create(task=task, author=self.user, content='flaky test')
+        self.assertEqual(self.search(q='flaky'), ['New title'])
+        with self.captureOnCommitCallbacks(execute=True):
+            comment.delete()
+        self.assertEqual(self.search(q='flaky'), [])
+
+        task.delete()
+        self.assertEqual(self.search(q='new'), [])
+
+    def test_comments_reindex_once_per_transaction(self):
+        task = self.create_task('Thread')
+        other = self.create_task('Other')
+        backend = get_backend()
+        with mock.patch.object(backend, 'index_tasks', wraps=backend.index_tasks) as index_tasks:
+            with self.captureOnCommitCallbacks(execute=True):
+                for index in range(5):
+                    Comment.objects.create(task=task, author=self.user, content=f'reply {index}')
+                Comment.objects.create(task=other, author=self.user, content='reply other')
+        index_tasks.assert_called_once_with(sorted([task.pk, other.pk]))
+        self.assertCountEqual(self.search(q='reply'), ['Thread', 'Other'])
+
+    def test_bulk_created_tasks_are_indexed(self):
+        response = self.client.post(reverse('task-bulk'), {'create': [
+            {'board': self.board.id, 'title': 'Bulk searchable',
+             'status': 'to-do', 'priority': 'low'}]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search(q='searchable'), ['Bulk searchable'])
+
+    def test_board_filter_and_pagination(self):
+        for index in range(3):
+            self.create_task(f'Report {index}')
+        response = self.client.get(reverse('task-search'), {'q': 'report', 'limit': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+
+        response = self.client.get(
+            reverse('task-search'), {'q': 'report', 'board': self.foreign_board.id})
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(reverse('task-search'), {'q': ' '})
+        self.assertEqual(response.status_code, 400)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TaskListFilterTests(APITestCase):
+    """
+    filters, ordering and sparse fieldsets run in SQL.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user@example.com', email='user@example.com', password='pw')
+        self.board = Board.objects.create(title='Board', owner=self.user)
+        self.other_board = Board.objects.create(title='Other', owner=self.user)
+        self.client.force_authenticate(self.user)
+        for title, status, priority, due, board in [
+            ('a', 'to-do', 'high', '2025-01-10', self.board),
+            ('b', 'done', 'low', '2025-02-10', self.board),
+            ('c', 'review', 'medium', None, self.other_board),
+        ]:
+            Task.objects.create(
+                board=board, creator=self.user, title=title, status=status,
+                priority=priority, due_date=due, assignee=self.user)
+
+    def titles(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return [task['title'] for task in response.data]
+
+    def test_filters(self):
+        url = reverse('tasks-assigned-to-me')
+        self.assertEqual(self.titles(url, status='to-do,done', ordering='title'), ['a', 'b'])
+        self.assertEqual(self.titles(url, priority='medium'), ['c'])
+        self.assertEqual(self.titles(url, board=self.other_board.id), ['c'])
+        self.assertEqual(self.titles(url, due_from='2025-01-15', due_to='2025-12-31'), ['b'])
+        self.assertEqual(self.client.get(url, {'status': 'open'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'due_to': 'soon'}).status_code, 400)
+
+    def test_ordering(self):
+        url = reverse('tasks-assigned-to-me')
+        self.assertEqual(self.titles(url, ordering='-priority'), ['a', 'c', 'b'])
+        self.assertEqual(self.titles(url, ordering='-due_date'), ['b', 'a', 'c'])
+        self.assertEqual(self.client.get(url, {'ordering': 'creator'}).status_code, 400)
+
+    def test_sparse_fields(self):
+        url = reverse('tasks-assigned-to-me')
+        with self.assertNumQueries(1) as queries:
+            response = self.client.get(url, {'fields': 'id,title,status'})
+        self.assertEqual(set(response.data[0]), {'id', 'title', 'status'})
+        sql = queries.captured_queries[0]['sql']
+        self.assertNotIn('description', sql)
+        self.assertNotIn('auth_user', sql)
+        self.assertNotIn('task_app_comment', sql)
+        self.assertEqual(self.client.get(url, {'fields': 'id,secret'}).status_code, 400)
+
+    def test_board_tasks(self):
+        url = reverse('board-tasks', args=[self.board.id])
+        response = self.client.get(url, {'fields': 'title,assignee', 'status': 'done'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, [{
+            'title': 'b',
+            'assignee': {'id': self.user.id, 'email': 'user@example.com',
+                         'fullname': 'user@example.com'},
+        }])
+
+
+class FastSerializerGoldenTests(APITestCase):
+    """
+    the fast path must produce exactly what the DRF serializers produce.
+    """
+
+    def setUp(self):
+        named = User.objects.create_user(
+            username='anna@example.com', email='anna@example.com',
+            first_name='Anna', last_name='Berg')
+        unnamed = User.objects.create_user(username='bob', email='bob@example.com')
+        half = User.objects.create_user(username='carl', email='c@example.com', last_name='Dorn')
+        board = Board.objects.create(title='Board', owner=named)
+        for index, (assignee, reviewer, due) in enumerate([
+            (named, unnamed, '2025-03-01'),
+            (None, half, None),
+            (unnamed, None, '2024-12-31'),
+            (None, None, None),
+        ]):
+            task = Task.objects.create(
+                board=board, creator=named, title=f'Task {index}',
+                description='x' * index, status='review', priority='high',
+                assignee=assignee, reviewer=reviewer, due_date=due)
+            for _ in range(index):
+                Comment.objects.create(task=task, author=named, content='c')
+
+    def assert_same_output(self, serializer_class, fields=None):
+
+        tasks = Task.objects.order_by('id')
+        expected = serializer_class(
+            tasks.select_related('assignee', 'reviewer').annotate(
+                comments_count=Count('comments')),
+            many=True, fields=fields).data
+        actual = get_fast_serializer(serializer_class, fields).data(tasks)
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_task_read_serializer(self):
+        self.assert_same_output(TaskReadSerializer)
+        self.assert_same_output(TaskReadSerializer, ['reviewer', 'title', 'due_date'])
+
+    def test_board_task_serializer(self):
+        self.assert_same_output(BoardTaskSerializer)
+        self.assert_same_output(BoardTaskSerializer, ['comments_count', 'assignee'])
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class CommentThreadTests(APITestCase):
+    """
+    comment pages in both directions, author names without user rows.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user@example.com', email='user@example.com', password='pw',
+            first_name='Ada', last_name='Lovelace')
+        self.other = User.objects.create_user(
+            username='other@example.com', email='other@example.com', password='pw')
+        board = Board.objects.create(title='Board', owner=self.user)
+        board.members.add(self.user, self.other)
+        self.task = Task.objects.create(
+            board=board, creator=self.user, title='Task', status='to-do', priority='low')
+        for index in range(5):
+            Comment.objects.create(
+                task=self.task, author=(self.user, self.other)[index % 2],
+                content=f'Comment {index}')
+        self.client.force_authenticate(self.user)
+        self.url = reverse('task-comments', args=[self.task.id])
+
+    def contents(self, data):
+        return [comment['content'] for comment in data]
+
+    def test_pages_in_both_directions(self):
+        response = self.client.get(self.url, {'ordering': '-created_at', 'page_size': 2})
+        self.assertEqual(self.contents(response.data['results']), ['Comment 4', 'Comment 3'])
+        response = self.client.get(response.data['next'])
+        self.assertEqual(self.contents(response.data['results']), ['Comment 2', 'Comment 1'])
+
+        response = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual(self.contents(response.data['results']), ['Comment 0', 'Comment 1'])
+        response = self.client.get(self.url, {'ordering': '-created_at'})
+        self.assertEqual(self.contents(response.data)[0], 'Comment 4')
+        response = self.client.get(self.url, {'ordering': 'content'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_page_queries_do_not_grow(self):
+        url = f'{self.url}?ordering=-created_at&page_size=20'
+        self.client.get(url)
+        # task with board, one page of comments (members are cached)
+        with self.assertNumQueries(2):
+            self.client.get(url)
+        Comment.objects.bulk_create([
+            Comment(task=self.task, author=self.other, author_name='other@example.com',
+                    content='bulk') for _ in range(100)])
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(len(response.data['results']), 20)
+
+    def test_author_names_follow_renames(self):
+        response = self.client.get(self.url)
+        self.assertEqual([comment['author'] for comment in response.data[:2]],
+                         ['Ada Lovelace', 'other@example.com'])
+
+        self.user.last_name = 'King'
+        with self.assertNumQueries(5):
+            # the user row, the renamed comments, one update of them,
+            # their change log entries, boards to bump
+            self.user.save(update_fields=['last_name'])
+        with self.assertNumQueries(1):
+            self.user.save(update_fields=['last_login'])
+
+        response = self.client.get(self.url)
+        self.assertEqual([comment['author'] for comment in response.data[:2]],
+                         ['Ada King', 'other@example.com'])
+        renamed = Comment.objects.filter(author=self.user).values_list('pk', flat=True)
+        self.assertEqual(
+            set(BoardChange.objects.filter(kind='comment', action='updated').values_list(
+                'board_id', 'object_id')),
+            {(self.task.board_id, pk) for pk in renamed})
+
+
+def spare_task(case):
+    return Task.objects.create(
+        board=case.board, creator=case.user, title=f'Spare {case.spare()}',
+        status='to-do', priority='low')
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class TaskBulkTests(APITestCase):
+    """
+    POST /api/tasks/bulk/ writes everything or nothing.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='u@example.com', email='u@example.com')
+        self.other = User.objects.create_user(username='x@example.com', email='x@example.com')
+        self.board = Board.objects.create(title='Board', owner=self.user)
+        self.board.members.add(self.user)
+        self.foreign = Board.objects.create(title='Foreign', owner=self.other)
+        self.task = self.create_task(self.board)
+        self.client.force_authenticate(self.user)
+        self.url = reverse('task-bulk')
+
+    def create_task(self, board, title='Task'):
+        return Task.objects.create(board=board, creator=board.owner, title=title,
+                                   status='to-do', priority='low')
+
+    def new_task(self, **fields):
+        return {'board': self.board.id, 'title': 'New', 'status': 'to-do',
+                'priority': 'high', **fields}
+
+    def post(self, body, status=200):
+        response = self.client.post(self.url, body, format='json')
+        self.assertEqual(response.status_code, status, response.data)
+        return response.data
+
+    def test_applies_every_item(self):
+        doomed = self.create_task(self.board, 'Doomed')
+        data = self.post({'create': [self.new_task(assignee_id=self.user.id)],
+                          'update': [{'id': self.task.id, 'status': 'done'}],
+                          'delete': [doomed.id]})
+        self.assertEqual([item['status'] for item in data['create']], [201])
+        self.assertEqual(data['update'][0]['data']['status'], 'done')
+        self.assertEqual(data['delete'], [{'id': doomed.id, 'status': 204}])
+        self.assertEqual(set(self.board.tasks.values_list('title', 'status')),
+                         {('Task', 'done'), ('New', 'to-do')})
+        self.assertEqual(self.board.counter.done_count, 1)
+
+    def test_update_sets_updated_at(self):
+        Task.objects.filter(pk=self.task.pk).update(
+            updated_at=timezone.now() - timedelta(days=30))
+        self.post({'update': [{'id': self.task.id, 'priority': 'high'}]})
+        self.task.refresh_from_db()
+        self.assertGreater(self.task.updated_at, timezone.now() - timedelta(minutes=1))
+
+    def test_one_failure_applies_nothing(self):
+        data = self.post({'create': [self.new_task(), self.new_task(status='nope')],
+                          'update': [{'id': self.task.id, 'status': 'done'}],
+                          'delete': [self.task.id]}, status=400)
+        self.assertEqual([item['status'] for item in data['create']], [424, 400])
+        self.assertEqual(data['update'][0]['status'], 424)
+        self.assertEqual(data['delete'][0]['status'], 424)
+        self.assertEqual(list(self.board.tasks.values_list('status', flat=True)), ['to-do'])
+
+    def test_max_items(self):
+        self.post({'delete': [self.task.id] * 101}, status=400)
+        self.assertTrue(Task.objects.filter(pk=self.task.pk).exists())
+
+    def test_other_boards_are_denied(self):
+        foreign_task = self.create_task(self.foreign)
+        data = self.post({'create': [self.new_task(board=self.foreign.id)],
+                          'update': [{'id': foreign_task.id, 'status': 'done'}],
+                          'delete': [foreign_task.id]}, status=400)
+        self.assertEqual([data['create'][0]['status'], data['update'][0]['status'],
+                          data['delete'][0]['status']], [403, 403, 403])
+
+    def test_queries_do_not_grow_with_items(self):
+        def queries(amount):
+            tasks = [self.create_task(self.board) for _ in range(amount)]
+            body = {'create': [self.new_task() for _ in range(amount)],
+                    'update': [{'id': task.id, 'priority': 'high'} for task in tasks]}
+            with CaptureQueriesContext(connection) as captured:
+                self.post(body)
+            return len(captured)
+
+        self.assertEqual(queries(2), queries(10))
+
+    def test_malformed_bodies_are_rejected(self):
+        for body in ([self.new_task()],
+                     {'create': [self.new_task(board=[self.board.id])]},
+                     {'create': [self.new_task(board={'a': 1})]},
+                     {'update': [{'id': self.task.id, 'assignee_id': [1]}]},
+                     {'update': [{'id': [self.task.id]}]},
+                     {'delete': [[self.task.id]]},
+                     {'delete': [2 ** 70]}):
+            with self.subTest(body=body):
+                self.post(body, status=400)
+        self.assertEqual(self.board.tasks.count(), 1)
+
+    def test_numeric_string_ids(self):
+        data = self.post({'create': [self.new_task(board=str(self.board.id))],
+                          'update': [{'id': str(self.task.id), 'status': 'review'}]})
+        self.assertEqual(data['update'][0]['id'], self.task.id)
+        self.assertEqual(self.board.tasks.count(), 2)
+
+
+
+def spare_comment(case):
+    comment = Comment.objects.create(task=case.task, author=case.user, content='spare')
+    return [case.task.id, comment.id]
+
+
+def task_data(case):
+    return {'board': case.board.id, 'title': f'New task {case.spare()}', 'status': 'to-do',
+            'priority': 'low', 'assignee_id': case.user.id, 'reviewer_id': case.user.id}
+
+
+class TaskQueryBudgetTests(QueryBudgetTestCase):
+    budgets = [
+        Budget('tasks-assigned-to-me', 2),
+        Budget('tasks-assigned-to-me', 2, params='page_size=20'),
+        Budget('tasks-assigned-to-me', 2, params='stream=1'),
+        Budget('tasks-assigned-to-me', 2, params='fields=id,title,assignee&ordering=-priority'),
+        Budget('tasks-reviewing', 2),
+        Budget('task-create', 15, 'post', status=201, data=task_data),
+        Budget('task-bulk', 23, 'post', data=lambda case: {
+            'create': [task_data(case)],
+            'update': [{'id': spare_task(case).id, 'status': 'done'}],
+            'delete': [spare_task(case).id]}),
+        Budget('task-search', 3, params='q=task'),
+        Budget('task-detail', 4, args=lambda case: [case.task.id]),
+        Budget('task-detail', 13, 'patch', args=lambda case: [case.task.id],
+               data=lambda case: {'title': f'Task {case.spare()}'}),
+        Budget('task-detail', 12, 'delete', status=204,
+               args=lambda case: [spare_task(case).id]),
+        Budget('task-comments', 3, args=lambda case: [case.task.id]),
+        Budget('task-comments', 3, args=lambda case: [case.task.id], params='page_size=20'),
+        Budget('task-comments', 3, args=lambda case: [case.task.id], params='stream=1'),
+        Budget('task-comments', 3, args=lambda case: [case.task.id],
+               params='ordering=-created_at&page_size=20'),
+        Budget('task-comments', 8, 'post', status=201, args=lambda case: [case.task.id],
+               data=lambda case: {'content': 'new comment'}),
+        Budget('task-comment-delete', 10, 'delete', status=204, args=spare_comment),
+    ]